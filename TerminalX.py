@@ -12,15 +12,32 @@ import time
 import subprocess
 import json
 import hashlib
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
 import shutil
 import glob
+import heapq
+import bisect
+import operator
+import errno
+import fnmatch
 import re
 import threading
+import contextlib
 import getpass
-import zipfile
-import tarfile
+import tempfile
+import socketserver
+import stat
+import zlib
+import io
+import codecs
+import math
+import struct
+import collections
+import collections.abc
+import itertools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 # Constants and Configuration
 DRIVE_PATHS = {
@@ -53,7 +70,7 @@ DRIVE_PATHS = {
 }
 
 HOST_NAME = socket.gethostname()
-HOST_IP = socket.gethostbyname(HOST_NAME)
+_HOST_IP = None
 # Fixed the CHARS string - removed the problematic quote
 CHARS = string.ascii_letters + string.digits + '!@#$%^&*().,?~[]{}+=_-|:;"<>/'
 
@@ -102,9 +119,9 @@ ALIASES = {
 
 # Global variables
 CURRENT_COLOR = COLOR_CODES['default']
-CURRENT_DIR = os.getcwd()
-COMMAND_HISTORY = []
-ENVIRONMENT_VARS = dict(os.environ)
+# The environment (ENVIRONMENT_VARS), history and code page belong to the
+# calling thread's Session; see SESSIONS AND SERVER MODE.
+_SESSION_LOCAL = threading.local()
 
 def show_banner():
     """Display TerminalX banner"""
@@ -124,12 +141,311 @@ def show_banner():
 """
     print(banner)
 
+# ========== SHARED HELPERS ==========
+
+def _host_ip():
+    """Resolve the host address on first use rather than at startup"""
+    global _HOST_IP
+    if _HOST_IP is None:
+        try:
+            _HOST_IP = socket.gethostbyname(HOST_NAME)
+        except OSError:
+            _HOST_IP = '127.0.0.1'
+    return _HOST_IP
+
+def _split_args(args):
+    """Split an argument string into tokens, honouring double quotes (also inside a token, as in /TR:"a b")"""
+    return [token.replace('"', '') for token in re.findall(r'(?:[^\s"]|"[^"]*")+', args or "")]
+
+def _parse_switches(args):
+    """Separate CMD-style /X and /X:value switches from positional arguments.
+
+    Returns (switches, positional) where switches maps the upper-cased switch
+    name to its value (or True). Tokens that look like switches but name an
+    existing path (e.g. /tmp) are kept as positional arguments.
+    """
+    switches = {}
+    positional = []
+    for token in _split_args(args):
+        match = re.match(r'^/([A-Za-z?][A-Za-z0-9]*)(?::(.*))?$', token)
+        if match and not os.path.exists(token):
+            switches[match.group(1).upper()] = match.group(2) if match.group(2) is not None else True
+        else:
+            positional.append(token)
+    return switches, positional
+
+def _process_context():
+    """multiprocessing context for process pools.
+
+    Forking a process that runs job, scheduler and session threads can copy a
+    lock held by another thread, so workers are started fresh instead.
+    """
+    import multiprocessing
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+def _default_workers():
+    """Worker count for I/O-bound thread pools"""
+    return min(32, (os.cpu_count() or 1) * 4)
+
+def _bounded_map(func, items, workers=None):
+    """Run func over items on a thread pool, yielding (item, result, error) as they finish.
+
+    Only a bounded window of work is queued at once, so long generators such as
+    recursive directory walks are never materialised in memory.
+    """
+    workers = workers or _default_workers()
+    func = _bind_session(func)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def drain(return_when):
+            done, _ = wait(pending, return_when=return_when)
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                yield item, (None if error else future.result()), error
+
+        for item in items:
+            _check_cancelled()
+            pending[pool.submit(func, item)] = item
+            if len(pending) >= workers * 4:
+                yield from drain(FIRST_COMPLETED)
+        while pending:
+            yield from drain(FIRST_COMPLETED)
+
+def _walk_files(root, pattern="*", recursive=False):
+    """Stream os.DirEntry objects for files under root matching a wildcard pattern"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                stack.append(entry.path)
+                        elif fnmatch.fnmatch(entry.name, pattern) and \
+                                (pattern.startswith('.') or not entry.name.startswith('.')):
+                            yield entry
+                    except OSError:
+                        continue
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            continue
+
+def _data_path(*parts):
+    """Path inside TerminalX's per-user data directory (~/.terminalx), created on demand"""
+    directory = os.path.join(os.path.expanduser('~'), '.terminalx')
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, *parts)
+
+def _format_bytes(size):
+    """Human readable byte count"""
+    for unit in ['bytes', 'KB', 'MB', 'GB', 'TB']:
+        if size < 1024 or unit == 'TB':
+            return f"{size:,.0f} {unit}" if unit == 'bytes' else f"{size:,.1f} {unit}"
+        size /= 1024
+
+class _Progress:
+    """Throttled single-line progress reporter for long bulk operations"""
+
+    def __init__(self, label, interval=1.0):
+        self.label = label
+        self.interval = interval
+        self.started = time.monotonic()
+        self._last = self.started
+        self._shown = False
+
+    def update(self, count, nbytes, force=False):
+        now = time.monotonic()
+        if force or now - self._last >= self.interval:
+            self._last = now
+            self._shown = True
+            rate = nbytes / max(now - self.started, 1e-6)
+            print(f"\r{self.label}: {count:,} files, {_format_bytes(nbytes)} ({_format_bytes(rate)}/s)   ",
+                  end='', flush=True)
+
+    def done(self):
+        if self._shown:
+            print()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+class _ThreadLocalStream:
+    """sys.stdout/sys.stdin stand-in that lets a thread redirect its own I/O.
+
+    Threads that never call redirect() see the original stream, so the
+    interactive console (including readline editing in input()) is unaffected.
+    """
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def redirect(self, stream):
+        self._local.stream = stream
+
+    def reset(self):
+        self._local.stream = None
+
+    @property
+    def redirected(self):
+        return getattr(self._local, 'stream', None) is not None
+
+    @property
+    def current(self):
+        return getattr(self._local, 'stream', None) or self._default
+
+    def __getattr__(self, name):
+        return getattr(self.current, name)
+
+def _install_stream_proxies():
+    """Route sys.stdout/sys.stdin through per-thread redirectable proxies (idempotent)"""
+    if not isinstance(sys.stdout, _ThreadLocalStream):
+        sys.stdout = _ThreadLocalStream(sys.stdout)
+    if not isinstance(sys.stdin, _ThreadLocalStream):
+        sys.stdin = _ThreadLocalStream(sys.stdin)
+
+def _stdout_redirected():
+    return isinstance(sys.stdout, _ThreadLocalStream) and sys.stdout.redirected
+
+def _run_external(command, shell=False):
+    """Run an external program and return its exit status.
+
+    When this thread's output is redirected (server sessions, background
+    jobs), the program's output is relayed through sys.stdout instead of the
+    real terminal, and a cancelled background job terminates the program.
+    """
+    env = dict(ENVIRONMENT_VARS)
+    if not _stdout_redirected():
+        return subprocess.call(command, shell=shell, env=env)
+    proc = subprocess.Popen(command, shell=shell, env=env, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+    job = _current_job()
+    if job is not None:
+        def watch():
+            while proc.poll() is None:
+                if job.cancel_event.wait(0.2):
+                    proc.terminate()
+                    return
+        threading.Thread(target=watch, daemon=True).start()
+    for line in proc.stdout:
+        sys.stdout.write(line.decode(errors='replace'))
+    status = proc.wait()
+    _check_cancelled()
+    return status
+
+# Windows code page numbers accepted by CHCP, /E and ICONV besides codec names
+_CODE_PAGES = {
+    65001: 'utf-8', 1200: 'utf-16-le', 1201: 'utf-16-be', 12000: 'utf-32-le',
+    12001: 'utf-32-be', 28591: 'latin-1', 20127: 'ascii',
+}
+# UTF-32 LE must be tested before UTF-16 LE, whose BOM is its prefix
+_BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'), (codecs.BOM_UTF32_BE, 'utf-32'), (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+_DETECT_SAMPLE = 64 * 1024
+
+class BinaryFileError(ValueError):
+    """Raised when a file opened as text looks like binary data"""
+
+def _codec_name(value):
+    """Normalise a code page number or codec name; raises LookupError if unknown"""
+    value = str(value).strip()
+    if value.isdigit():
+        value = _CODE_PAGES.get(int(value), f"cp{value}")
+    return codecs.lookup(value).name
+
+def _code_page_number(name):
+    for number, codec in _CODE_PAGES.items():
+        if codecs.lookup(codec).name == name:
+            return number
+    match = re.fullmatch(r'cp(\d+)', name)
+    return int(match.group(1)) if match else name
+
+def _detect_encoding(sample):
+    """Guess the encoding of a leading sample from its BOM, NUL layout and UTF-8 validity.
+
+    Returns None when the sample looks like binary data.
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    if b'\0' in sample:
+        # BOM-less UTF-16: ASCII-range text leaves every other byte NUL
+        half = max(len(sample) // 2, 1)
+        if sample[1::2].count(0) > half * 0.3 and not sample[0::2].count(0):
+            return 'utf-16-le'
+        if sample[0::2].count(0) > half * 0.3 and not sample[1::2].count(0):
+            return 'utf-16-be'
+        return None
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+def _ascii_compatible(encoding):
+    """True if ASCII text encodes to the same bytes, so byte-level scanning is safe"""
+    return codecs.lookup(encoding).name in ('utf-8', 'utf-8-sig') or \
+        not encoding.startswith(('utf-16', 'utf-32')) and ' \nAZaz09'.encode(encoding) == b' \nAZaz09'
+
+def _encoding_switch(args):
+    """Remove a /E:encoding switch from raw arguments. Returns (encoding or None, remaining args)."""
+    match = re.search(r'(?:^|\s)/E:(\S+)', args, re.IGNORECASE)
+    if not match:
+        return None, args
+    return _codec_name(match.group(1)), (args[:match.start()] + args[match.end():]).strip()
+
+def _open_binary(filename):
+    """Open a file for reading as bytes, transparently expanding COMPACT'ed files"""
+    f = open(filename, 'rb', buffering=_DETECT_SAMPLE)
+    compacted = _compact_size(f.read(_COMPACT_HEADER.size)) is not None
+    f.seek(0)
+    if compacted:
+        return io.BufferedReader(_CompactReader(f), buffer_size=_DETECT_SAMPLE)
+    return f
+
+def _sniff(f, filename, encoding=None):
+    """Pick the encoding for an open binary stream: explicit, CHCP, or detected"""
+    encoding = encoding or _session().code_page
+    if encoding:
+        return encoding
+    detected = _detect_encoding(f.peek(_DETECT_SAMPLE)[:_DETECT_SAMPLE])
+    if detected is None:
+        raise BinaryFileError(f"{filename} appears to be a binary file (see HEXDUMP)")
+    return detected
+
+def _open_text(filename, encoding=None):
+    """Open a file for reading as text, transparently expanding COMPACT'ed files.
+
+    The encoding is, in order: the explicit argument (/E), the CHCP code page,
+    or detected from the BOM and a leading sample. Undecodable bytes are
+    replaced rather than aborting, as mixed-encoding logs are common.
+    """
+    f = _open_binary(filename)
+    try:
+        encoding = _sniff(f, filename, encoding)
+    except BaseException:
+        f.close()
+        raise
+    return io.TextIOWrapper(f, encoding=encoding, errors='replace')
+
 # ========== FILE AND DIRECTORY OPERATIONS ==========
 
 def cmd_dir(args=""):
     """List directory contents (equivalent to Windows DIR command)"""
     if not args:
-        path = CURRENT_DIR
+        path = os.getcwd()
     else:
         path = args.strip()
         if not os.path.exists(path):
@@ -170,17 +486,15 @@ def cmd_dir(args=""):
 
 def cmd_cd(args=""):
     """Change directory (equivalent to Windows CD command)"""
-    global CURRENT_DIR
-
     if not args:
-        print(CURRENT_DIR)
+        print(os.getcwd())
         return
 
     path = args.strip()
 
     # Handle special cases
     if path == "..":
-        path = os.path.dirname(CURRENT_DIR)
+        path = os.path.dirname(os.getcwd())
     elif path == "\\":
         path = "\\"
     elif path == "~":
@@ -190,7 +504,6 @@ def cmd_cd(args=""):
 
     try:
         os.chdir(path)
-        CURRENT_DIR = os.getcwd()
     except Exception as e:
         print(f"{COLOR_CODES['red']}The system cannot find the path specified.{COLOR_CODES['default']}")
 
@@ -206,25 +519,118 @@ def cmd_md(args=""):
     except Exception as e:
         print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
 
+def _unlink_counted(path, dry_run=False):
+    """Remove one file (unless dry_run) and return the number of bytes it held"""
+    size = os.lstat(path).st_size
+    if not dry_run:
+        os.unlink(path)
+    return size
+
+def _bulk_unlink(paths, dry_run=False, quiet=True, label="Deleting"):
+    """Unlink a stream of paths on a thread pool. Returns (count, bytes, errors)."""
+    count = total = 0
+    errors = []
+    progress = _Progress(label)
+    for path, size, error in _bounded_map(lambda p: _unlink_counted(p, dry_run), paths):
+        if error:
+            errors.append((path, error))
+            continue
+        count += 1
+        total += size
+        if not quiet:
+            print(f"{'Would delete' if dry_run else 'Deleted file'} - {os.path.normpath(path)}")
+        else:
+            progress.update(count, total)
+    progress.done()
+    return count, total, errors
+
+def _report_unlink_errors(errors, limit=10):
+    for path, error in errors[:limit]:
+        print(f"{COLOR_CODES['red']}Could not delete {path}: {error}{COLOR_CODES['default']}")
+    if len(errors) > limit:
+        print(f"{COLOR_CODES['red']}... and {len(errors) - limit:,} more error(s).{COLOR_CODES['default']}")
+
 def cmd_rd(args=""):
     """Remove directory (equivalent to Windows RD/RMDIR command)"""
-    if not args:
+    switches, targets = _parse_switches(args)
+    if not targets:
         print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
         return
 
-    path = args.strip()
-    if not os.path.exists(path):
+    path = targets[0]
+    if not os.path.lexists(path):
         print(f"{COLOR_CODES['red']}The system cannot find the file specified.{COLOR_CODES['default']}")
         return
 
-    try:
-        if "/s" in args.lower():
-            shutil.rmtree(path)
+    if os.path.islink(path):
+        # Remove the link itself, never walk into the directory it points at
+        if not os.path.isdir(path):
+            print(f"{COLOR_CODES['red']}The directory name is invalid.{COLOR_CODES['default']}")
+        elif 'L' in switches:
+            print(f"Would remove the link {path}.")
         else:
+            try:
+                os.unlink(path)
+                print(f"{COLOR_CODES['green']}Directory removed successfully.{COLOR_CODES['default']}")
+            except OSError as e:
+                print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+        return
+
+    if 'S' not in switches:
+        try:
             os.rmdir(path)
+            print(f"{COLOR_CODES['green']}Directory removed successfully.{COLOR_CODES['default']}")
+        except Exception as e:
+            print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+        return
+
+    dry_run = 'L' in switches
+    if 'Q' not in switches and not dry_run:
+        # Like CMD, RD /S asks before removing a whole tree unless /Q
+        try:
+            answer = input(f"{path}, Are you sure (Y/N)? ")
+        except EOFError:
+            answer = ''
+        if answer.strip().lower() not in ('y', 'yes'):
+            return
+    directories = []
+
+    def tree_files():
+        # Stream files to the unlink pool while remembering directories
+        # (far fewer than files) so they can be removed deepest-first.
+        stack = [path]
+        while stack:
+            directory = stack.pop()
+            directories.append(directory)
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            yield entry.path
+            except OSError as e:
+                print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+
+    count, total, errors = _bulk_unlink(tree_files(), dry_run, quiet=True, label="Removing")
+
+    removed = 0
+    if not dry_run:
+        for directory in sorted(directories, key=lambda d: d.count(os.sep), reverse=True):
+            try:
+                os.rmdir(directory)
+                removed += 1
+            except OSError as e:
+                errors.append((directory, e))
+    _report_unlink_errors(errors)
+
+    if dry_run:
+        print(f"Would remove {count:,} file(s) ({total:,} bytes) in {len(directories):,} director(ies).")
+    elif errors:
+        print(f"{COLOR_CODES['yellow']}Removed {count:,} file(s) and {removed:,} director(ies); "
+              f"{len(errors):,} item(s) could not be removed.{COLOR_CODES['default']}")
+    else:
         print(f"{COLOR_CODES['green']}Directory removed successfully.{COLOR_CODES['default']}")
-    except Exception as e:
-        print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
 
 def cmd_copy(args=""):
     """Copy files (equivalent to Windows COPY command)"""
@@ -245,53 +651,216 @@ def cmd_copy(args=""):
             print(f"{COLOR_CODES['green']}        1 file(s) copied.{COLOR_CODES['default']}")
         else:
             print(f"{COLOR_CODES['red']}The system cannot find the file specified.{COLOR_CODES['default']}")
+            _STATUS.code = 1
     except Exception as e:
         print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+        _STATUS.code = 1
+
+def _file_digest(path, algorithm='sha256'):
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_COMPACT_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _tree_manifest(root, verify=False):
+    """Map each file under root (by relative path) to its size, plus its digest when verifying"""
+    manifest = {}
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            if os.path.islink(path):
+                manifest[os.path.relpath(path, root)] = ('link', os.readlink(path))
+            else:
+                manifest[os.path.relpath(path, root)] = (os.path.getsize(path),
+                                                         _file_digest(path) if verify else None)
+    return manifest
+
+def _move_one(source, target, verify=False):
+    """Move one path, renaming when possible. Returns (bytes_copied, renamed)."""
+    try:
+        os.rename(source, target)
+        return 0, True
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    # Cross-device: copy (shutil uses sendfile/copy_file_range where available), verify, then unlink
+    if os.path.isdir(source) and not os.path.islink(source):
+        expected = _tree_manifest(source, verify)
+        shutil.copytree(source, target, symlinks=True)
+        if _tree_manifest(target, verify) != expected:
+            shutil.rmtree(target)
+            raise OSError(f"verification failed for {target}")
+        shutil.rmtree(source)
+        return sum(size for size, _ in expected.values() if size != 'link'), False
+    shutil.copy2(source, target)
+    size = os.path.getsize(source)
+    if os.path.getsize(target) != size or (verify and _file_digest(source) != _file_digest(target)):
+        os.remove(target)
+        raise OSError(f"verification failed for {target}")
+    os.remove(source)
+    return size, False
 
 def cmd_move(args=""):
     """Move files (equivalent to Windows MOVE command)"""
-    if not args:
-        print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
+    switches, parts = _parse_switches(args)
+    if '?' in switches:
+        print("MOVE [/V] [/Y] source [source ...] destination")
+        print()
+        print("  source       Files or wildcards to move.")
+        print("  destination  New name, or directory when several sources are given.")
+        print("  /V           Verifies cross-device copies by checksum before deleting.")
+        print("  /Y           Overwrites existing destination files without prompting.")
         return
-
-    parts = args.strip().split()
     if len(parts) < 2:
         print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
         return
 
-    source, dest = parts[0], parts[1]
+    dest = parts[-1]
+    sources = []
+    for pattern in parts[:-1]:
+        matches = sorted(glob.glob(pattern)) if any(c in pattern for c in '*?[') else [pattern]
+        sources.extend(m for m in matches if os.path.lexists(m))
+    if not sources:
+        print(f"{COLOR_CODES['red']}The system cannot find the file specified.{COLOR_CODES['default']}")
+        return
 
-    try:
-        shutil.move(source, dest)
-        print(f"{COLOR_CODES['green']}        1 file(s) moved.{COLOR_CODES['default']}")
-    except Exception as e:
-        print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+    dest_is_dir = os.path.isdir(dest)
+    if len(sources) > 1 and not dest_is_dir:
+        print(f"{COLOR_CODES['red']}Cannot move multiple files to a single file.{COLOR_CODES['default']}")
+        return
+
+    def target_of(source):
+        return os.path.join(dest, os.path.basename(source.rstrip('/\\'))) if dest_is_dir else dest
+
+    # Concurrent renames onto one target would silently overwrite each other
+    by_target = collections.defaultdict(list)
+    for source in sources:
+        by_target[os.path.normcase(os.path.abspath(target_of(source)))].append(source)
+    clashes = [group for group in by_target.values() if len(group) > 1]
+    if clashes:
+        for group in clashes:
+            print(f"{COLOR_CODES['red']}Cannot move {', '.join(group)} to the same destination "
+                  f"{target_of(group[0])}.{COLOR_CODES['default']}")
+        return
+
+    # Like CMD, ask before replacing an existing destination unless /Y
+    overwrite_all = 'Y' in switches
+    kept = []
+    for source in sources:
+        target = target_of(source)
+        if not overwrite_all and os.path.lexists(target) \
+                and os.path.abspath(source) != os.path.abspath(target):
+            try:
+                answer = input(f"Overwrite {target}? (Yes/No/All): ").strip().lower()
+            except EOFError:
+                answer = ''
+            if answer in ('a', 'all'):
+                overwrite_all = True
+            elif answer not in ('y', 'yes'):
+                continue
+        kept.append(source)
+    sources = kept
+
+    verify = 'V' in switches
+    moved = []
+    failed = []
+    copied = 0
+    progress = _Progress("Moving")
+    for source, result, error in _bounded_map(lambda src: _move_one(src, target_of(src), verify), sources):
+        if error:
+            failed.append((source, error))
+            continue
+        moved.append(source)
+        copied += result[0]
+        progress.update(len(moved), copied)
+    progress.done()
+
+    if failed:
+        for source in moved:
+            print(f"Moved: {source} -> {target_of(source)}")
+        for source, error in failed:
+            print(f"{COLOR_CODES['red']}Failed: {source}: {error}{COLOR_CODES['default']}")
+        print(f"{COLOR_CODES['yellow']}{len(moved):>9} file(s) moved, {len(failed)} failed.{COLOR_CODES['default']}")
+        return
+
+    print(f"{COLOR_CODES['green']}{len(moved):>9} file(s) moved.{COLOR_CODES['default']}")
+    if copied:
+        elapsed = progress.elapsed
+        print(f"          {_format_bytes(copied)} copied across devices in {elapsed:.1f}s "
+              f"({_format_bytes(copied / max(elapsed, 1e-6))}/s).")
 
 def cmd_del(args=""):
     """Delete files (equivalent to Windows DEL command)"""
-    if not args:
+    switches, names = _parse_switches(args)
+    if '?' in switches:
+        print("DEL [/S] [/Q] [/L] names")
+        print()
+        print("  names  Specifies a list of one or more files, wildcards or directories.")
+        print("  /S     Deletes specified files from all subdirectories.")
+        print("  /Q     Quiet mode, only progress and totals are shown.")
+        print("  /L     Lists what would be deleted with counts and bytes (dry run).")
+        return
+    if not names:
         print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
         return
 
-    filename = args.strip()
+    recursive = 'S' in switches
+    dry_run = 'L' in switches
+    quiet = 'Q' in switches or not recursive
 
-    try:
-        if '*' in filename or '?' in filename:
-            files = glob.glob(filename)
-            if not files:
-                print(f"{COLOR_CODES['red']}Could Not Find {filename}{COLOR_CODES['default']}")
-                return
-            for file in files:
-                os.remove(file)
-            print(f"{COLOR_CODES['green']}{len(files)} file(s) deleted.{COLOR_CODES['default']}")
-        else:
+    # Like CMD, ask before deleting a whole directory or every file (*, *.*) unless /Q
+    if 'Q' not in switches and not dry_run:
+        for name in names:
+            if os.path.isdir(name) or os.path.basename(name) in ('*', '*.*'):
+                target = os.path.join(name, '*') if os.path.isdir(name) else name
+                try:
+                    answer = input(f"{os.path.abspath(target)}, Are you sure (Y/N)? ")
+                except EOFError:
+                    answer = ''
+                if answer.strip().lower() not in ('y', 'yes'):
+                    return
+
+    # A plain filename keeps the simple single-file path
+    if len(names) == 1 and not recursive and not any(c in names[0] for c in '*?') \
+            and not os.path.isdir(names[0]):
+        filename = names[0]
+        try:
             if os.path.exists(filename):
-                os.remove(filename)
-                print(f"{COLOR_CODES['green']}1 file deleted.{COLOR_CODES['default']}")
+                if dry_run:
+                    print(f"Would delete 1 file ({os.path.getsize(filename):,} bytes).")
+                else:
+                    os.remove(filename)
+                    print(f"{COLOR_CODES['green']}1 file deleted.{COLOR_CODES['default']}")
             else:
                 print(f"{COLOR_CODES['red']}Could Not Find: {filename}{COLOR_CODES['default']}")
-    except Exception as e:
-        print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+                _STATUS.code = 1
+        except Exception as e:
+            print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+            _STATUS.code = 1
+        return
+
+    def matching_files():
+        for name in names:
+            if os.path.isdir(name):
+                root, pattern = name, '*'
+            else:
+                root, pattern = os.path.split(name)
+            for entry in _walk_files(root or '.', pattern, recursive):
+                yield entry.path
+
+    count, total, errors = _bulk_unlink(matching_files(), dry_run, quiet)
+    _report_unlink_errors(errors)
+    if errors or not count:
+        _STATUS.code = 1
+
+    if not count and not errors:
+        print(f"{COLOR_CODES['red']}Could Not Find {' '.join(names)}{COLOR_CODES['default']}")
+    elif dry_run:
+        print(f"Would delete {count:,} file(s) ({total:,} bytes).")
+    else:
+        print(f"{COLOR_CODES['green']}{count:,} file(s) deleted ({_format_bytes(total)}).{COLOR_CODES['default']}")
 
 def cmd_ren(args=""):
     """Rename files (equivalent to Windows REN command)"""
@@ -318,15 +887,18 @@ def cmd_type(args=""):
         print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
         return
 
-    filename = args.strip()
-
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            print(f.read())
+        encoding, filename = _encoding_switch(args.strip())
+        with _open_text(filename, encoding) as f:
+            for chunk in iter(lambda: f.read(_DETECT_SAMPLE), ''):
+                print(chunk, end='')
+            print()
     except FileNotFoundError:
         print(f"{COLOR_CODES['red']}The system cannot find the file specified.{COLOR_CODES['default']}")
+        _STATUS.code = 1
     except Exception as e:
         print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+        _STATUS.code = 1
 
 def cmd_more(args=""):
     """Display file contents page by page (equivalent to Windows MORE command)"""
@@ -334,10 +906,9 @@ def cmd_more(args=""):
         print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
         return
 
-    filename = args.strip()
-
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
+        encoding, filename = _encoding_switch(args.strip())
+        with _open_text(filename, encoding) as f:
             lines = f.readlines()
 
         lines_per_page = 20
@@ -403,7 +974,7 @@ def cmd_ipconfig(args=""):
     print(f"   Description . . . . . . . . . . . : Network Adapter")
     print(f"   Physical Address. . . . . . . . . : XX-XX-XX-XX-XX-XX")
     print(f"   DHCP Enabled. . . . . . . . . . . : Yes")
-    print(f"   IP Address. . . . . . . . . . . . : {HOST_IP}")
+    print(f"   IP Address. . . . . . . . . . . . : {_host_ip()}")
 
 def cmd_whoami(args=""):
     """Display current username"""
@@ -432,6 +1003,293 @@ def cmd_time(args=""):
     current_time = datetime.now()
     print(f"The current time is: {current_time.strftime('%I:%M:%S.%f')[:-4]} {current_time.strftime('%p')}")
 
+# ========== PERFORMANCE MONITOR ==========
+
+_PID_FD_CACHE = 256  # /proc/<pid>/stat fds kept open for the busiest processes; the rest are opened per sample
+
+class _ProcFile:
+    """A /proc file kept open between samples and re-read with a single pread"""
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self):
+        data = os.pread(self.fd, 65536, 0)
+        if len(data) == 65536:
+            chunks = [data]
+            while len(data) == 65536:
+                data = os.pread(self.fd, 65536, sum(len(c) for c in chunks))
+                chunks.append(data)
+            data = b"".join(chunks)
+        return data
+
+    def close(self):
+        os.close(self.fd)
+
+class _ProcSampler:
+    """Incremental /proc sampler; every call to sample() returns rates since the last one"""
+
+    def __init__(self):
+        self.files = {name: _ProcFile(f'/proc/{name}') for name in ['stat', 'meminfo', 'diskstats', 'net/dev']}
+        self.pid_files = {}  # pid -> _ProcFile for the busiest processes, bounded by pid_file_limit
+        self.pid_file_limit = _PID_FD_CACHE
+        with contextlib.suppress(ImportError, ValueError, OSError):
+            import resource
+            soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+            if soft != resource.RLIM_INFINITY:
+                self.pid_file_limit = max(16, min(_PID_FD_CACHE, soft // 4))
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self.block_devices = set(os.listdir('/sys/block')) if os.path.isdir('/sys/block') else None
+        self.previous = None
+        self.previous_procs = {}
+        self.previous_time = None
+
+    def close(self):
+        for f in list(self.files.values()) + list(self.pid_files.values()):
+            f.close()
+        self.pid_files.clear()
+
+    def _cpu_times(self):
+        times = []
+        for line in self.files['stat'].read().split(b'\n'):
+            if not line.startswith(b'cpu'):
+                break
+            fields = [int(v) for v in line.split()[1:9]]
+            idle = fields[3] + fields[4]
+            times.append((sum(fields), idle))
+        return times
+
+    def _meminfo(self):
+        info = {}
+        for line in self.files['meminfo'].read().split(b'\n'):
+            key, _, rest = line.partition(b':')
+            if key in (b'MemTotal', b'MemAvailable', b'SwapTotal', b'SwapFree'):
+                info[key.decode()] = int(rest.split()[0]) * 1024
+        return info
+
+    def _disk_sectors(self):
+        read = written = 0
+        for line in self.files['diskstats'].read().split(b'\n'):
+            fields = line.split()
+            if len(fields) < 10:
+                continue
+            name = fields[2].decode()
+            if self.block_devices is not None and name not in self.block_devices:
+                continue  # skip partitions so bytes are not counted twice
+            if name.startswith(('loop', 'ram')):
+                continue
+            read += int(fields[5])
+            written += int(fields[9])
+        return read * 512, written * 512
+
+    def _net_bytes(self):
+        rx = tx = 0
+        for line in self.files['net/dev'].read().split(b'\n')[2:]:
+            name, _, rest = line.partition(b':')
+            fields = rest.split()
+            if not fields or name.strip() == b'lo':
+                continue
+            rx += int(fields[0])
+            tx += int(fields[8])
+        return rx, tx
+
+    def _processes(self):
+        """Read every /proc/<pid>/stat. Returns ({pid: (comm, cpu ticks, rss)}, {pid: file opened now})."""
+        procs, opened = {}, {}
+        for name in os.listdir('/proc'):
+            if not name.isdigit():
+                continue
+            pid = int(name)
+            f = self.pid_files.get(pid)
+            try:
+                if f is not None:
+                    try:
+                        data = f.read()
+                    except OSError as e:
+                        if e.errno not in (errno.ESRCH, errno.ENOENT):
+                            raise
+                        # The process behind a cached fd exited (the PID may have been reused): reopen once
+                        del self.pid_files[pid]
+                        f.close()
+                        f = None
+                if f is None:
+                    f = opened[pid] = _ProcFile(f'/proc/{pid}/stat')
+                    data = f.read()
+            except OSError:
+                continue
+            comm_end = data.rfind(b')')
+            fields = data[comm_end + 2:].split()
+            if len(fields) < 22:
+                continue
+            comm = data[data.find(b'(') + 1:comm_end].decode(errors='replace')
+            procs[pid] = (comm, int(fields[11]) + int(fields[12]), int(fields[21]) * self.page_size)
+        return procs, opened
+
+    def _retain(self, procs, opened):
+        """Keep fds open for the processes that used the most CPU since the last sample.
+
+        The busy set changes slowly, so the same fds are reused sample after
+        sample; ties keep the fds already open rather than churning through
+        idle processes. Everything else is read with a fresh open each time.
+        """
+        previous = self.previous_procs
+
+        def busy(pid):
+            old = previous.get(pid)
+            return procs[pid][1] - old[1] if old else procs[pid][1], pid in self.pid_files
+        keep = set(heapq.nlargest(self.pid_file_limit, procs, key=busy))
+        for pid in [pid for pid in self.pid_files if pid not in keep]:
+            self.pid_files.pop(pid).close()
+        for pid, f in opened.items():
+            if pid in keep:
+                self.pid_files[pid] = f
+            else:
+                f.close()
+
+    def sample(self):
+        now = time.monotonic()
+        current = {
+            'cpu': self._cpu_times(),
+            'disk': self._disk_sectors(),
+            'net': self._net_bytes(),
+        }
+        procs, opened = self._processes()
+        self._retain(procs, opened)
+        mem = self._meminfo()
+
+        result = {'mem': mem, 'cpu': [], 'disk': (0.0, 0.0), 'net': (0.0, 0.0), 'procs': []}
+        if self.previous is not None:
+            elapsed = max(now - self.previous_time, 1e-6)
+            for (total, idle), (old_total, old_idle) in zip(current['cpu'], self.previous['cpu']):
+                delta = total - old_total
+                result['cpu'].append(100.0 * (delta - (idle - old_idle)) / delta if delta else 0.0)
+            result['disk'] = tuple((a - b) / elapsed for a, b in zip(current['disk'], self.previous['disk']))
+            result['net'] = tuple((a - b) / elapsed for a, b in zip(current['net'], self.previous['net']))
+            ticks = elapsed * self.clock_ticks
+            for pid, (comm, cpu_ticks, rss) in procs.items():
+                old = self.previous_procs.get(pid)
+                if old is not None:
+                    result['procs'].append((100.0 * (cpu_ticks - old[1]) / ticks, pid, comm, rss))
+        self.previous = current
+        self.previous_procs = procs
+        self.previous_time = now
+        return result
+
+def _render_monitor(sample, top_count, overhead):
+    """Build the monitor screen as a list of lines"""
+    cpus = sample['cpu']
+    mem = sample['mem']
+    lines = [
+        f"{COLOR_CODES['bright_cyan']}TerminalX Performance Monitor - {HOST_NAME}{COLOR_CODES['default']}"
+        f"   {datetime.now().strftime('%H:%M:%S')}   (monitor CPU {overhead:.2f}%)",
+        "",
+        f"CPU total: {cpus[0]:5.1f}%" if cpus else "CPU total:   ...",
+    ]
+    cores = cpus[1:]
+    for i in range(0, len(cores), 4):
+        lines.append("  ".join(
+            f"cpu{i + j:<3} {value:5.1f}% [{'|' * int(value / 10):<10}]" for j, value in enumerate(cores[i:i + 4])))
+    used = mem.get('MemTotal', 0) - mem.get('MemAvailable', 0)
+    swap_used = mem.get('SwapTotal', 0) - mem.get('SwapFree', 0)
+    lines += [
+        "",
+        f"Memory: {_format_bytes(used)} used of {_format_bytes(mem.get('MemTotal', 0))}"
+        f"   Swap: {_format_bytes(swap_used)} used of {_format_bytes(mem.get('SwapTotal', 0))}",
+        f"Disk:   read {_format_bytes(sample['disk'][0])}/s   write {_format_bytes(sample['disk'][1])}/s",
+        f"Net:    recv {_format_bytes(sample['net'][0])}/s   sent {_format_bytes(sample['net'][1])}/s",
+        "",
+        f"{COLOR_CODES['cyan']}{'PID':>8}  {'CPU%':>6}  {'Memory':>12}  Image Name{COLOR_CODES['default']}",
+    ]
+    for cpu, pid, comm, rss in heapq.nlargest(top_count, sample['procs']):
+        lines.append(f"{pid:>8}  {cpu:6.1f}  {_format_bytes(rss):>12}  {comm}")
+    return lines
+
+def cmd_perfmon(args=""):
+    """Live CPU, memory, disk, network and process monitor sampled from /proc"""
+    switches, _ = _parse_switches(args)
+    if '?' in switches:
+        print("PERFMON [/I:seconds] [/N:samples] [/P:processes] [/CSV:file] [/B]")
+        print()
+        print("  /I     Sampling interval in seconds (default 2).")
+        print("  /N     Stop after this many samples (default: until Ctrl+C).")
+        print("  /P     Number of top processes to show (default 10).")
+        print("  /CSV   Append one row per sample to a CSV file.")
+        print("  /B     Batch mode: no screen redraw, useful with /CSV.")
+        return
+    if not os.path.exists('/proc/stat'):
+        print(f"{COLOR_CODES['red']}PERFMON requires a /proc filesystem (Linux).{COLOR_CODES['default']}")
+        return
+
+    try:
+        interval = max(0.1, float(switches.get('I', 2)))
+        samples = int(switches['N']) if 'N' in switches else None
+        top_count = int(switches.get('P', 10))
+    except ValueError:
+        print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
+        return
+    batch = 'B' in switches
+    csv_path = switches.get('CSV') if isinstance(switches.get('CSV'), str) else None
+
+    sampler = _ProcSampler()
+    csv_file = None
+    previous_lines = []
+    taken = 0
+    cpu_clock = time.process_time()
+    wall_clock = time.monotonic()
+    try:
+        sampler.sample()
+        if csv_path:
+            csv_file = open(csv_path, 'a', newline='')
+        if not batch:
+            print("\033[2J", end='')
+        while samples is None or taken < samples:
+            _sleep(interval)
+            sample = sampler.sample()
+            taken += 1
+
+            now_cpu, now_wall = time.process_time(), time.monotonic()
+            overhead = 100.0 * (now_cpu - cpu_clock) / max(now_wall - wall_clock, 1e-6)
+            cpu_clock, wall_clock = now_cpu, now_wall
+
+            if csv_file:
+                if csv_file.tell() == 0:
+                    csv_file.write("timestamp,cpu_total," + ",".join(
+                        f"cpu{i}" for i in range(len(sample['cpu']) - 1)) +
+                        ",mem_used,mem_total,disk_read_Bps,disk_write_Bps,net_rx_Bps,net_tx_Bps\n")
+                mem = sample['mem']
+                row = [datetime.now().isoformat(timespec='seconds')]
+                row += [f"{v:.1f}" for v in sample['cpu']]
+                row += [str(mem.get('MemTotal', 0) - mem.get('MemAvailable', 0)), str(mem.get('MemTotal', 0))]
+                row += [f"{v:.0f}" for v in sample['disk'] + sample['net']]
+                csv_file.write(",".join(row) + "\n")
+                csv_file.flush()
+
+            lines = _render_monitor(sample, top_count, overhead)
+            if batch:
+                if not csv_file:
+                    # Title, CPU total, one row per four cores, then memory, disk and network
+                    summary = 3 + -(-(len(sample['cpu']) - 1) // 4) + 4
+                    print("\n".join(lines[:summary]))
+                continue
+            # Redraw only the rows that changed since the previous frame
+            out = []
+            for row, line in enumerate(lines):
+                if row >= len(previous_lines) or previous_lines[row] != line:
+                    out.append(f"\033[{row + 1};1H{line}\033[K")
+            for row in range(len(lines), len(previous_lines)):
+                out.append(f"\033[{row + 1};1H\033[K")
+            out.append(f"\033[{len(lines) + 1};1H")
+            sys.stdout.write("".join(out))
+            sys.stdout.flush()
+            previous_lines = lines
+    except KeyboardInterrupt:
+        print()
+    finally:
+        sampler.close()
+        if csv_file:
+            csv_file.close()
+
 # ========== PROCESS MANAGEMENT COMMANDS ==========
 
 def cmd_tasklist(args=""):
@@ -454,9 +1312,9 @@ def cmd_tasklist(args=""):
         print(f"{COLOR_CODES['yellow']}Process listing requires psutil module.{COLOR_CODES['default']}")
         print("Alternative: Using basic process listing...")
         if platform.system().lower() == 'windows':
-            os.system('tasklist')
+            _run_external(['tasklist'])
         else:
-            os.system('ps aux')
+            _run_external(['ps', 'aux'])
 
 def cmd_taskkill(args=""):
     """Terminate processes (equivalent to Windows TASKKILL command)"""
@@ -549,7 +1407,7 @@ def cmd_ping(args=""):
     cmd = ['ping', param, str(count), host]
 
     try:
-        subprocess.run(cmd, shell=False, check=False)
+        _run_external(cmd)
     except Exception as e:
         print(f"{COLOR_CODES['red']}Ping request could not find host. {host}.{COLOR_CODES['default']}")
 
@@ -557,13 +1415,13 @@ def cmd_netstat(args=""):
     """Display network statistics (equivalent to Windows NETSTAT command)"""
     try:
         if platform.system().lower() == 'windows':
-            os.system(f'netstat {args}')
+            _run_external(f'netstat {args}', shell=True)
         else:
             # Linux/Mac equivalent
             if args:
-                os.system(f'netstat {args}')
+                _run_external(f'netstat {args}', shell=True)
             else:
-                os.system('netstat -tuln')
+                _run_external(['netstat', '-tuln'])
     except Exception as e:
         print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
 
@@ -581,7 +1439,6 @@ def cmd_nslookup(args=""):
         host = args.strip()
 
     try:
-        import socket
         ip_address = socket.gethostbyname(host)
         print(f"Server:  dns.google")
         print(f"Address:  8.8.8.8")
@@ -591,45 +1448,107 @@ def cmd_nslookup(args=""):
         print(f"Address:  {ip_address}")
     except Exception as e:
         print(f"{COLOR_CODES['red']}DNS request timed out.{COLOR_CODES['default']}")
+        _STATUS.code = 1
 
 # ========== TEXT PROCESSING COMMANDS ==========
 
+def _findstr_bytes(f, filename, needle, encoding):
+    """Byte-level scan for an ASCII needle; chunks without a match are skipped undecoded"""
+    found = False
+    line_number = 0
+    tail = b""
+    for chunk in iter(lambda: f.read(_ANALYTICS_CHUNK), b""):
+        _check_cancelled()
+        cut = chunk.rfind(b'\n') + 1
+        if not cut:
+            tail += chunk
+            continue
+        block, tail = tail + chunk[:cut], chunk[cut:]
+        if needle not in block.lower():
+            line_number += block.count(b'\n')
+            continue
+        lines = block.split(b'\n')
+        lines.pop()
+        for line in lines:
+            line_number += 1
+            if needle in line.lower():
+                print(f"{filename}:{line_number}:{line.decode(encoding, errors='replace').rstrip()}")
+                found = True
+    if tail and needle in tail.lower():
+        print(f"{filename}:{line_number + 1}:{tail.decode(encoding, errors='replace').rstrip()}")
+        found = True
+    return found
+
+def _findstr_file(filename, search_string, encoding=None):
+    """Print matching lines of one file. Returns True if anything matched."""
+    found = False
+    with _open_binary(filename) as f:
+        encoding = _sniff(f, filename, encoding)
+        if search_string.isascii() and _ascii_compatible(encoding):
+            return _findstr_bytes(f, filename, search_string.lower().encode('ascii'), encoding)
+        text = io.TextIOWrapper(f, encoding=encoding, errors='replace')
+        line_number = 0
+        for line in text:
+            line_number += 1
+            if search_string.lower() in line.lower():
+                print(f"{filename}:{line_number}:{line.rstrip()}")
+                found = True
+        text.detach()
+    return found
+
 def cmd_findstr(args=""):
     """Search for strings in files (equivalent to Windows FINDSTR command)"""
-    if not args:
+    switches, parts = _parse_switches(args)
+    if len(parts) < 2:
         print("FINDSTR: Bad command line.")
+        _STATUS.code = 2
         return
-
-    parts = args.strip().split('"')
-    if len(parts) >= 3:  # "search string" filename format
-        search_string = parts[1]
-        filename = parts[2].strip()
-    else:
-        # Space-separated format
-        parts = args.strip().split()
-        if len(parts) < 2:
-            print("FINDSTR: Bad command line.")
-            return
-        search_string = parts[0]
-        filename = parts[1]
-
+    search_string, targets = parts[0], parts[1:]
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            line_number = 0
-            found = False
-            for line in f:
-                line_number += 1
-                if search_string.lower() in line.lower():
-                    print(f"{filename}:{line_number}:{line.rstrip()}")
-                    found = True
+        encoding = _codec_name(switches['E']) if 'E' in switches else None
+    except LookupError as e:
+        print(f"FINDSTR: {e}")
+        _STATUS.code = 2
+        return
 
-            if not found:
+    # Single file: the original direct scan
+    if len(targets) == 1 and 'S' not in switches and not os.path.isdir(targets[0]) \
+            and not any(c in targets[0] for c in '*?'):
+        filename = targets[0]
+        try:
+            if not _findstr_file(filename, search_string, encoding):
                 print("FINDSTR: No matches found.")
+                _STATUS.code = 1
+        except FileNotFoundError:
+            print(f"FINDSTR: Cannot open: {filename}")
+            _STATUS.code = 2
+        except Exception as e:
+            print(f"FINDSTR: Error - {e}")
+            _STATUS.code = 2
+        return
 
-    except FileNotFoundError:
-        print(f"FINDSTR: Cannot open: {filename}")
-    except Exception as e:
-        print(f"FINDSTR: Error - {e}")
+    found = False
+    for target in targets:
+        if os.path.isdir(target):
+            root, pattern = target, '*'
+        else:
+            root, pattern = os.path.split(target)
+            root = root or os.curdir
+        files = _walk_files(root, pattern, recursive='S' in switches or os.path.isdir(target))
+        if 'NOINDEX' not in switches:
+            files = _narrow_with_index(root, files, search_string, encoding)
+        for entry in files:
+            path = entry if isinstance(entry, str) else entry.path
+            try:
+                found = _findstr_file(os.path.normpath(path), search_string, encoding) or found
+            except BinaryFileError:
+                continue
+            except Exception as e:
+                print(f"FINDSTR: Cannot open: {path} ({e})")
+                _STATUS.code = 2
+    if not found:
+        print("FINDSTR: No matches found.")
+        _STATUS.code = _STATUS.code or 1
 
 def cmd_sort(args=""):
     """Sort text file contents (equivalent to Windows SORT command)"""
@@ -637,10 +1556,9 @@ def cmd_sort(args=""):
         print("The syntax of the command is incorrect.")
         return
 
-    filename = args.strip()
-
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
+        encoding, filename = _encoding_switch(args.strip())
+        with _open_text(filename, encoding) as f:
             lines = f.readlines()
 
         sorted_lines = sorted(lines)
@@ -654,7 +1572,12 @@ def cmd_sort(args=""):
 
 def cmd_fc(args=""):
     """Compare files (equivalent to Windows FC command)"""
-    parts = args.strip().split()
+    try:
+        encoding, args = _encoding_switch(args.strip())
+    except LookupError as e:
+        print(f"Error: {e}")
+        return
+    parts = args.split()
     if len(parts) < 2:
         print("The syntax of the command is incorrect.")
         return
@@ -662,9 +1585,9 @@ def cmd_fc(args=""):
     file1, file2 = parts[0], parts[1]
 
     try:
-        with open(file1, 'r', encoding='utf-8') as f1:
+        with _open_text(file1, encoding) as f1:
             lines1 = f1.readlines()
-        with open(file2, 'r', encoding='utf-8') as f2:
+        with _open_text(file2, encoding) as f2:
             lines2 = f2.readlines()
 
         print(f"Comparing files {file1} and {file2}")
@@ -689,88 +1612,2848 @@ def cmd_fc(args=""):
     except Exception as e:
         print(f"Error: {e}")
 
-# ========== SYSTEM UTILITIES ==========
-
-def cmd_tree(args=""):
-    """Display directory tree structure (equivalent to Windows TREE command)"""
-    path = args.strip() if args else CURRENT_DIR
-
-    if not os.path.exists(path):
-        print("Invalid path - No such file or directory.")
+# ========== LOG ANALYTICS ==========
+
+# WC, TOPK and DISTINCT work on raw bytes in fixed-size chunks, so memory
+# does not depend on file size. Files above _SPLIT_THRESHOLD are cut into
+# line-aligned byte ranges that are processed on a (forked) process pool and
+# merged: line/word counts add up, heavy-hitter sketches sum, and
+# HyperLogLog registers take the maximum.
+_ANALYTICS_CHUNK = 4 * 1024 * 1024
+_SPLIT_THRESHOLD = 64 * 1024 * 1024
+_HLL_PRECISION = 14
+
+def _line_aligned_ranges(path, parts, threshold=_SPLIT_THRESHOLD):
+    """Split a file into up to `parts` (start, end) byte ranges that end on newlines"""
+    size = os.path.getsize(path)
+    if parts <= 1 or size < threshold:
+        return [(0, size)]
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, parts):
+            f.seek(max(size * i // parts, bounds[-1]))
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+def _read_range(path, start, end):
+    """Yield chunks of a byte range (end None: to the end of a possibly COMPACT'ed file)"""
+    with _open_binary(path) if end is None else open(path, 'rb') as f:
+        if start:
+            f.seek(start)
+        remaining = float('inf') if end is None else end - start
+        while remaining > 0:
+            chunk = f.read(min(_ANALYTICS_CHUNK, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def _range_lines(path, start, end):
+    """Yield the lines (bytes, without newline) of a line-aligned byte range"""
+    rest = b""
+    for chunk in _read_range(path, start, end):
+        lines = (rest + chunk).split(b'\n')
+        rest = lines.pop()
+        yield from lines
+    if rest:
+        yield rest
+
+def _run_ranges(worker, path, *args):
+    """Run worker(path, start, end, *args) over line-aligned ranges, in parallel when large"""
+    if _is_compacted(path):
+        return [worker(path, 0, None, *args)]  # compressed offsets can't be split: expand in one pass
+    ranges = _line_aligned_ranges(path, os.cpu_count() or 1)
+    if len(ranges) == 1:
+        return [worker(path, ranges[0][0], ranges[0][1], *args)]
+    with ProcessPoolExecutor(max_workers=len(ranges), mp_context=_process_context()) as pool:
+        futures = [pool.submit(worker, path, start, end, *args) for start, end in ranges]
+        return [future.result() for future in futures]
+
+def _wc_range(path, start, end):
+    lines = words = size = 0
+    in_word = False
+    for chunk in _read_range(path, start, end):
+        lines += chunk.count(b'\n')
+        words += len(chunk.split())
+        if in_word and not chunk[:1].isspace():
+            words -= 1  # a word split across two chunks was counted twice
+        in_word = not chunk[-1:].isspace()
+        size += len(chunk)
+    return lines, words, size
+
+def _field_of(line, field, delimiter):
+    if not field:
+        return line
+    parts = line.split(delimiter) if delimiter else line.split()
+    return parts[field - 1] if field <= len(parts) else b""
+
+def _heavy_hitters(items, capacity, counts=None, floor=0):
+    """Approximate counts of frequent items in bounded memory.
+
+    Keeps at most 2 x capacity counters; when full, the smallest are evicted and
+    later newcomers start at the largest evicted count (the error bound), as in
+    the Space-Saving algorithm. Returns (counts, error bound).
+    """
+    counts = {} if counts is None else counts
+    get = counts.get
+    for item in items:
+        value = get(item)
+        if value is not None:
+            counts[item] = value + 1
+            continue
+        if len(counts) >= 2 * capacity:
+            keep = heapq.nlargest(capacity, counts.items(), key=operator.itemgetter(1))
+            floor = max(floor, keep[-1][1])  # no evicted counter exceeded this
+            counts = dict(keep)
+            get = counts.get
+        counts[item] = floor + 1
+    return counts, floor
+
+def _topk_range(path, start, end, field, delimiter, capacity):
+    return _heavy_hitters((_field_of(line, field, delimiter) for line in _range_lines(path, start, end)),
+                          capacity)
+
+def _hll_range(path, start, end, field, delimiter, precision):
+    registers = bytearray(1 << precision)
+    shift = 64 - precision
+    low_mask = (1 << shift) - 1
+    blake2b, from_bytes = hashlib.blake2b, int.from_bytes
+    for line in _range_lines(path, start, end):
+        # hash() is salted per process, and the ranges are counted in separate worker processes
+        h = from_bytes(blake2b(_field_of(line, field, delimiter), digest_size=8).digest(), 'little')
+        index = h >> shift
+        rank = shift - (h & low_mask).bit_length() + 1
+        if rank > registers[index]:
+            registers[index] = rank
+    return bytes(registers)
+
+def _hll_estimate(registers):
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / sum(2.0 ** -r for r in registers)
+    zeros = registers.count(0)
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)  # small-range correction
+    return int(round(estimate))
+
+def _parse_field_options(tokens):
+    """Common -f N / -d delim / -k N options of the analytics commands"""
+    options = {'field': 0, 'delimiter': None, 'k': 10, 'files': []}
+    tokens = list(tokens)
+    while tokens:
+        token = tokens.pop(0)
+        if token in ('-f', '-d', '-k') and tokens:
+            value = tokens.pop(0)
+            if token == '-d':
+                options['delimiter'] = value.encode().decode('unicode_escape').encode()
+            else:
+                options['field' if token == '-f' else 'k'] = int(value)
+        else:
+            options['files'].append(token)
+    return options
+
+def cmd_wc(args=""):
+    """Count lines, words and bytes in files"""
+    tokens = _split_args(args)
+    flags = {t for t in tokens if t in ('-l', '-w', '-c')}
+    files = [t for t in tokens if t not in flags]
+    if not files:
+        print("WC [-l] [-w] [-c] file [...]")
         return
+    show = flags or {'-l', '-w', '-c'}
+    totals = [0, 0, 0]
 
-    print(f"Folder PATH listing for volume.")
-    print(f"Volume serial number is XXXX-XXXX.")
-    print(path)
+    def report(counts, name):
+        columns = [f"{value:>12,}" for flag, value in zip(('-l', '-w', '-c'), counts) if flag in show]
+        print(f"{' '.join(columns)} {name}")
 
-    def print_tree(directory, prefix=""):
+    for name in files:
         try:
-            items = sorted(os.listdir(directory))
-            dirs = [item for item in items if os.path.isdir(os.path.join(directory, item))]
-            files = [item for item in items if os.path.isfile(os.path.join(directory, item))]
-
-            # Print directories first
-            for i, dirname in enumerate(dirs):
-                is_last_dir = (i == len(dirs) - 1) and len(files) == 0
-                current_prefix = "└───" if is_last_dir else "├───"
-                print(f"{prefix}{current_prefix}{dirname}")
-
-                next_prefix = prefix + ("    " if is_last_dir else "│   ")
-                print_tree(os.path.join(directory, dirname), next_prefix)
+            counts = [sum(values) for values in zip(*_run_ranges(_wc_range, name))]
+        except OSError as e:
+            print(f"{COLOR_CODES['red']}WC: {name}: {e.strerror}{COLOR_CODES['default']}")
+            continue
+        totals = [a + b for a, b in zip(totals, counts)]
+        report(counts, name)
+    if len(files) > 1:
+        report(totals, "total")
 
-            # Then print files
-            for i, filename in enumerate(files):
-                is_last = i == len(files) - 1
-                current_prefix = "└───" if is_last else "├───"
-                print(f"{prefix}{current_prefix}{filename}")
+def cmd_uniq(args=""):
+    """Collapse adjacent duplicate lines, optionally counting them"""
+    try:
+        encoding, args = _encoding_switch(args)
+    except LookupError as e:
+        print(f"Error: {e}")
+        return
+    tokens = _split_args(args)
+    flags = {t for t in tokens if t in ('-c', '-d', '-u', '-i')}
+    files = [t for t in tokens if t not in flags]
+    if len(files) != 1:
+        print("UNIQ [-c] [-d] [-u] [-i] [/E:encoding] file")
+        print("  -c  Prefix lines with their number of occurrences.")
+        print("  -d  Only print duplicated lines.  -u  Only print unique lines.")
+        print("  -i  Ignore case when comparing.")
+        return
 
-        except PermissionError:
-            print(f"{prefix}[Access Denied]")
+    def emit(line, count):
+        if ('-d' in flags and count < 2) or ('-u' in flags and count > 1):
+            return
+        print(f"{count:>7} {line}" if '-c' in flags else line)
 
-    print_tree(path)
+    try:
+        with _open_text(files[0], encoding) as f:
+            previous, previous_key, count = None, None, 0
+            for line in f:
+                _check_cancelled()
+                line = line.rstrip('\r\n')
+                key = line.lower() if '-i' in flags else line
+                if key == previous_key:
+                    count += 1
+                    continue
+                if previous is not None:
+                    emit(previous, count)
+                previous, previous_key, count = line, key, 1
+            if previous is not None:
+                emit(previous, count)
+    except FileNotFoundError:
+        print("The system cannot find the file specified.")
+    except Exception as e:
+        print(f"Error: {e}")
 
-def cmd_attrib(args=""):
-    """Display or change file attributes (equivalent to Windows ATTRIB command)"""
-    if not args:
-        # Display all files in current directory with attributes
+def cmd_topk(args=""):
+    """Most frequent values of a line or field, in bounded memory"""
+    try:
+        options = _parse_field_options(_split_args(args))
+    except ValueError:
+        options = {'files': []}
+    if len(options['files']) != 1:
+        print("TOPK [-k N] [-f field] [-d delimiter] file")
+        print("  Prints the N most frequent lines (or fields) with approximate counts.")
+        return
+    capacity = max(options['k'] * 10, 1000)
+    try:
+        results = _run_ranges(_topk_range, options['files'][0], options['field'], options['delimiter'], capacity)
+    except OSError as e:
+        print(f"{COLOR_CODES['red']}TOPK: {e}{COLOR_CODES['default']}")
+        return
+    merged = collections.Counter()
+    error = 0
+    for counts, floor in results:
+        merged.update(counts)
+        error += floor
+    for value, count in merged.most_common(options['k']):
+        print(f"{count:>12,}  {value.decode(errors='replace')}")
+    if error:
+        print(f"{COLOR_CODES['yellow']}Counts may be overestimated by up to {error:,}.{COLOR_CODES['default']}")
+
+def cmd_distinct(args=""):
+    """Estimate the number of distinct lines or fields with HyperLogLog"""
+    try:
+        options = _parse_field_options(_split_args(args))
+    except ValueError:
+        options = {'files': []}
+    if not options['files']:
+        print("DISTINCT [-f field] [-d delimiter] file [...]")
+        print(f"  Approximate distinct count (HyperLogLog, ~{104 / math.sqrt(1 << _HLL_PRECISION):.1f}% error).")
+        return
+    registers = bytearray(1 << _HLL_PRECISION)
+    try:
+        for name in options['files']:
+            for partial in _run_ranges(_hll_range, name, options['field'], options['delimiter'], _HLL_PRECISION):
+                registers = bytearray(map(max, registers, partial))
+    except OSError as e:
+        print(f"{COLOR_CODES['red']}DISTINCT: {e}{COLOR_CODES['default']}")
+        return
+    print(f"~{_hll_estimate(registers):,} distinct value(s)")
+
+# ========== HEX VIEWER ==========
+
+# HEXDUMP maps the file read-only, so opening is O(1) whatever its size and
+# only the pages actually displayed or searched are faulted in by the OS.
+# COMPACT'ed files are refused rather than expanded just to be viewed.
+_HEX_DEFAULT_LENGTH = 256
+_HEX_PRINTABLE = bytes(b if 32 <= b < 127 else ord('.') for b in range(256))
+
+def _parse_offset(value, size):
+    """Parse a decimal/0x-hex offset; negative values count back from the end"""
+    offset = int(value, 0)
+    if offset < 0:
+        offset += size
+    return min(max(offset, 0), size)
+
+@contextlib.contextmanager
+def _mapped(filename):
+    """Read-only mmap of a file's stored bytes (an empty bytes object for empty files).
+
+    COMPACT'ed files are mapped compressed: the gzip stream has no random
+    access, so callers that need the content must refuse them.
+    """
+    import mmap
+    with open(filename, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            yield b""
+            return
+        view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
         try:
-            for item in os.listdir(CURRENT_DIR):
-                item_path = os.path.join(CURRENT_DIR, item)
-                attrs = ""
-
-                if os.path.isdir(item_path):
-                    attrs += "D"
-                if os.access(item_path, os.R_OK):
-                    attrs += "R" if not os.access(item_path, os.W_OK) else ""
-                if item.startswith('.'):
-                    attrs += "H"
+            yield view
+        finally:
+            view.close()
+
+def _hex_lines(data, start, end, width):
+    """Yield formatted hexdump rows for data[start:end]"""
+    digits = max(8, len(f"{end:x}"))
+    for row in range(start, end, width):
+        chunk = data[row:min(row + width, end)]
+        hex_part = chunk.hex(' ')
+        yield f"{row:0{digits}x}  {hex_part:<{width * 3 - 1}}  |{chunk.translate(_HEX_PRINTABLE).decode('ascii')}|"
+
+def _parse_struct_spec(spec):
+    """Parse "<I:magic,H:version,16s:name" into (struct.Struct, field sizes, format codes, field names)"""
+    order = spec[0] if spec[:1] in ('<', '>', '!', '=', '@') else '<'
+    spec = spec[1:] if spec[:1] in ('<', '>', '!', '=', '@') else spec
+    codes, names = [], []
+    for i, field in enumerate(f for f in re.split(r'[,\s]+', spec) if f):
+        code, _, name = field.partition(':')
+        codes.append(code)
+        names.append(name or f"field{i}")
+    return struct.Struct(order + ''.join(codes)), [struct.calcsize(order + c) for c in codes], codes, names
+
+def _search_mapping(data, pattern, start, limit):
+    """Yield offsets of pattern in data from start, using mmap.find's fast search"""
+    found = 0
+    position = data.find(pattern, start)
+    while position != -1 and found < limit:
+        _check_cancelled()
+        yield position
+        found += 1
+        position = data.find(pattern, position + 1)
+
+def cmd_hexdump(args=""):
+    """Hex viewer, pattern search and struct decoder for files of any size"""
+    switches, positional = _parse_switches(args)
+    if len(positional) != 1 or '?' in switches:
+        print("HEXDUMP [/O:offset] [/L:length] [/W:width] [/P] file")
+        print("HEXDUMP /F:text | /X:hexbytes [/O:offset] [/N:count] file")
+        print("HEXDUMP /S:format [/O:offset] [/C:count] file")
+        print("  /O  Start offset (decimal or 0x hex; negative counts from the end).")
+        print(f"  /L  Number of bytes to show (default {_HEX_DEFAULT_LENGTH}; /L:0 to end of file).")
+        print("  /W  Bytes per row (default 16).   /P  Page through the file.")
+        print("  /F  Search for text.   /X  Search for hex bytes.   /N  Maximum matches.")
+        print("  /S  Decode struct fields, e.g. /S:<I:magic,H:version,16s:name")
+        print("  /C  Number of consecutive records to decode with /S.")
+        print("COMPACT'ed files are not supported (offsets would need the whole file expanded);")
+        print("run COMPACT /U on them first.")
+        return
+    filename = positional[0]
+    if _is_compacted(filename):
+        print(f"{COLOR_CODES['red']}HEXDUMP: {filename} is COMPACT'ed; expand it with COMPACT /U first."
+              f"{COLOR_CODES['default']}")
+        _STATUS.code = 1
+        return
+    try:
+        width = int(switches.get('W', 16))
+        if not 1 <= width <= 64:
+            raise ValueError
+        with _mapped(filename) as data:
+            size = len(data)
+            offset = _parse_offset(str(switches.get('O', 0)), size)
+            if 'F' in switches or 'X' in switches:
+                pattern = (bytes.fromhex(switches['X']) if 'X' in switches
+                           else str(switches['F']).encode('utf-8'))
+                if not pattern:
+                    raise ValueError
+                count = 0
+                for position in _search_mapping(data, pattern, offset, int(switches.get('N', 100))):
+                    row = position - position % width
+                    print(f"{COLOR_CODES['cyan']}match at 0x{position:x} ({position:,}){COLOR_CODES['default']}")
+                    print(next(_hex_lines(data, row, min(row + width, size), width)))
+                    count += 1
+                print(f"{count} match(es) found.")
+            elif 'S' in switches:
+                layout, sizes, codes, names = _parse_struct_spec(str(switches['S']))
+                for record in range(int(switches.get('C', 1))):
+                    base = offset + record * layout.size
+                    if base + layout.size > size:
+                        print(f"{COLOR_CODES['yellow']}Record at 0x{base:x} runs past end of file.{COLOR_CODES['default']}")
+                        break
+                    values = layout.unpack_from(data, base)
+                    position = base
+                    for name, code, field_size, value in zip(names, codes, sizes, values):
+                        if isinstance(value, bytes):
+                            value = value.rstrip(b'\0').decode('utf-8', errors='replace')
+                        print(f"0x{position:08x}  {code:<5} {name:<20} {value!r}")
+                        position += field_size
+                    if record + 1 < int(switches.get('C', 1)):
+                        print()
+            else:
+                length = int(switches.get('L', _HEX_DEFAULT_LENGTH if 'P' not in switches else 0))
+                end = size if length <= 0 else min(size, offset + length)
+                rows_per_page = max(shutil.get_terminal_size((80, 24)).lines - 2, 1)
+                for i, line in enumerate(_hex_lines(data, offset, end, width), 1):
+                    _check_cancelled()
+                    print(line)
+                    if 'P' in switches and i % rows_per_page == 0:
+                        if input(f"{COLOR_CODES['yellow']}-- More -- (Q to quit){COLOR_CODES['default']}").strip().lower() == 'q':
+                            break
+    except FileNotFoundError:
+        print(f"{COLOR_CODES['red']}The system cannot find the file specified.{COLOR_CODES['default']}")
+    except (ValueError, struct.error):
+        print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
+    except Exception as e:
+        print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
 
-                attrs = attrs.ljust(10)
-                print(f"{attrs} {item_path}")
+# ========== SPLIT AND JOIN ==========
+
+# Part files are named <prefix>.001, <prefix>.002, ... Data is moved between
+# file descriptors with copy_file_range (in-kernel, reflinks where supported)
+# or sendfile, falling back to a large reusable buffer, and never becomes a
+# Python string. Each part is an independent (src offset, dst offset, length)
+# copy, so parts are written concurrently.
+_SPLIT_BUFFER = 8 * 1024 * 1024
+_PART_SUFFIX = re.compile(r'\.\d{3,}$')
+
+def _parse_size(text):
+    """Parse 4096, 64K, 100MB, 1.5G into a byte count"""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([KMGT]?)B?', str(text).strip(), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"invalid size: {text}")
+    return int(float(match.group(1)) * 1024 ** ('_KMGT'.index(match.group(2).upper() or '_')))
+
+def _copy_range(src_fd, dst_fd, offset, count, dst_offset):
+    """Copy count bytes from src_fd@offset to dst_fd@dst_offset without Python-level buffers when possible"""
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while count > 0:
+                copied = os.copy_file_range(src_fd, dst_fd, count, offset, dst_offset)
+                if copied == 0:
+                    return
+                offset, dst_offset, count = offset + copied, dst_offset + copied, count - copied
+            return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF):
+                raise
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        try:
+            os.lseek(dst_fd, dst_offset, os.SEEK_SET)
+            while count > 0:
+                sent = os.sendfile(dst_fd, src_fd, offset, count)
+                if sent == 0:
+                    return
+                offset, dst_offset, count = offset + sent, dst_offset + sent, count - sent
+            return
+        except OSError as e:
+            if e.errno not in (errno.ENOSYS, errno.EINVAL):
+                raise
+    buffer = bytearray(min(_SPLIT_BUFFER, count))
+    view = memoryview(buffer)
+    with open(src_fd, 'rb', buffering=0, closefd=False) as src, \
+            open(dst_fd, 'r+b', buffering=0, closefd=False) as dst:
+        src.seek(offset)
+        dst.seek(dst_offset)
+        while count > 0:
+            read = src.readinto(view[:min(len(buffer), count)])
+            if not read:
+                return
+            dst.write(view[:read])
+            count -= read
+
+def _line_count_ranges(path, lines_per_part):
+    """Byte ranges holding lines_per_part lines each, found by counting newlines chunk by chunk"""
+    ranges, start, position, remaining = [], 0, 0, lines_per_part
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_SPLIT_BUFFER), b""):
+            _check_cancelled()
+            newlines = chunk.count(b'\n')
+            index = 0
+            while newlines >= remaining:
+                for _ in range(remaining):
+                    index = chunk.index(b'\n', index) + 1
+                newlines -= remaining
+                ranges.append((start, position + index))
+                start, remaining = position + index, lines_per_part
+            remaining -= newlines
+            position += len(chunk)
+    if position > start:
+        ranges.append((start, position))
+    return ranges
+
+def _write_part(source, target, start, end):
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        _copy_range(src.fileno(), dst.fileno(), start, end - start, 0)
+    return end - start
+
+def cmd_split(args=""):
+    """Split a file into parts by size, line count or number of parts"""
+    switches, positional = _parse_switches(args)
+    modes = [key for key in ('B', 'L', 'N') if key in switches]
+    if len(positional) != 1 or len(modes) != 1 or '?' in switches:
+        print("SPLIT /B:size | /L:lines | /N:parts [/P:prefix] [/V] file")
+        print("  /B  Bytes per part (e.g. 100M, 1.5G).")
+        print("  /L  Lines per part.")
+        print("  /N  Number of parts, cut on line boundaries.")
+        print("  /P  Output prefix; parts are named <prefix>.001, <prefix>.002, ...")
+        print("  /V  Also write <prefix>.sha256 so JOIN /V can verify the result.")
+        return
+    source = positional[0]
+    prefix = switches.get('P') if isinstance(switches.get('P'), str) else source
+    try:
+        size = os.path.getsize(source)
+        if 'B' in switches:
+            step = _parse_size(switches['B'])
+            if step <= 0:
+                raise ValueError
+            ranges = [(start, min(start + step, size)) for start in range(0, size, step)]
+        elif 'L' in switches:
+            count = int(switches['L'])
+            if count <= 0:
+                raise ValueError
+            ranges = _line_count_ranges(source, count)
+        else:
+            count = int(switches['N'])
+            if count <= 0:
+                raise ValueError
+            ranges = _line_aligned_ranges(source, count, threshold=0)
+    except FileNotFoundError:
+        print(f"{COLOR_CODES['red']}The system cannot find the file specified.{COLOR_CODES['default']}")
+        return
+    except ValueError:
+        print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
+        return
+    digits = max(3, len(str(len(ranges))))
+    parts = [(f"{prefix}.{i:0{digits}d}", start, end) for i, (start, end) in enumerate(ranges, 1)]
+    progress = _Progress("Splitting")
+    written = errors = completed = 0
+    for (target, start, end), copied, error in _bounded_map(lambda part: _write_part(source, *part), parts,
+                                                             workers=min(len(parts), 8) or 1):
+        if error:
+            errors += 1
+            print(f"{COLOR_CODES['red']}{target}: {error}{COLOR_CODES['default']}")
+            continue
+        written += copied
+        completed += 1
+        progress.update(completed, written)
+    progress.done()
+    if 'V' in switches and not errors:
+        with open(f"{prefix}.sha256", 'w', encoding='utf-8') as f:
+            f.write(f"{_file_digest(source)}  {os.path.basename(source)}\n")
+    color = 'red' if errors else 'green'
+    print(f"{COLOR_CODES[color]}{len(parts) - errors:,} part(s) written, "
+          f"{_format_bytes(written)} in {progress.elapsed:.2f}s.{COLOR_CODES['default']}")
+
+def cmd_join(args=""):
+    """Concatenate part files into one file, optionally verifying a checksum"""
+    switches, positional = _parse_switches(args)
+    if not positional or '?' in switches:
+        print("JOIN [/V] destination [part ...]")
+        print("  Without parts, joins destination.001, destination.002, ... in order.")
+        print("  /V  Verify against <prefix>.sha256 written by SPLIT /V (or print the SHA-256).")
+        return
+    destination, sources = positional[0], []
+    for pattern in positional[1:] or [destination + '.[0-9][0-9][0-9]*']:
+        matches = sorted(glob.glob(pattern))
+        sources.extend(matches or [pattern])
+    missing = [path for path in sources if not os.path.isfile(path)]
+    if not sources or missing:
+        print(f"{COLOR_CODES['red']}The system cannot find the file specified: "
+              f"{missing[0] if missing else destination + '.001'}{COLOR_CODES['default']}")
+        return
+    layout, offset = [], 0
+    for path in sources:
+        layout.append((path, offset))
+        offset += os.path.getsize(path)
+    progress = _Progress("Joining")
+
+    def copy_part(part):
+        # Each part gets its own descriptor: sendfile and the buffered fallback seek it
+        path, dst_offset = part
+        with open(path, 'rb') as src, open(destination, 'r+b') as dst:
+            length = os.fstat(src.fileno()).st_size
+            _copy_range(src.fileno(), dst.fileno(), 0, length, dst_offset)
+        return length
 
-        except Exception as e:
-            print(f"Error: {e}")
-    else:
-        filename = args.strip()
-        if os.path.exists(filename):
-            print(f"     {filename}")
+    try:
+        try:
+            with open(destination, 'wb') as out:
+                out.truncate(offset)  # preallocate so every part can be copied to its own offset concurrently
+            written = completed = 0
+            for (path, _), copied, error in _bounded_map(copy_part, layout, workers=min(len(layout), 8)):
+                if error:
+                    raise OSError(f"{path}: {error}")
+                written += copied
+                completed += 1
+                progress.update(completed, written)
+        finally:
+            progress.done()  # end the progress line before any error is printed
+    except OSError as e:
+        print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+        _STATUS.code = 1
+        return
+    print(f"{COLOR_CODES['green']}{len(sources):,} part(s) joined into {destination}, "
+          f"{_format_bytes(offset)} in {progress.elapsed:.2f}s.{COLOR_CODES['default']}")
+    if 'V' in switches:
+        digest = _file_digest(destination)
+        checksum_file = _PART_SUFFIX.sub('', sources[0]) + '.sha256'
+        if not os.path.isfile(checksum_file):
+            print(f"SHA256: {digest}")
+            return
+        with open(checksum_file, encoding='utf-8') as f:
+            expected = f.read().split()[:1]
+        if expected and expected[0].lower() == digest:
+            print(f"{COLOR_CODES['green']}Checksum verified ({checksum_file}).{COLOR_CODES['default']}")
         else:
-            print("File not Found")
+            print(f"{COLOR_CODES['red']}Checksum mismatch against {checksum_file}.{COLOR_CODES['default']}")
+            _STATUS.code = 1
+
+# ========== TEXT ENCODINGS ==========
+
+def cmd_chcp(args=""):
+    """Display or set the code page used to read text files"""
+    session = _session()
+    value = args.strip()
+    if value:
+        if value.lower() in ('auto', '0'):
+            session.code_page = None
+        else:
+            try:
+                session.code_page = _codec_name(value)
+            except LookupError:
+                print(f"{COLOR_CODES['red']}Invalid code page{COLOR_CODES['default']}")
+                return
+    code_page = session.code_page
+    print(f"Active code page: {_code_page_number(code_page) if code_page else 'auto-detect'}")
+
+def _transcode(src, dst, source_encoding, target_encoding, errors='strict', bom=False):
+    """Stream src to dst through incremental codecs in fixed-size chunks. Returns bytes written."""
+    decoder = codecs.getincrementaldecoder(source_encoding)(errors)
+    target = codecs.lookup(target_encoding).name
+    if bom and target == 'utf-8':
+        target = 'utf-8-sig'
+    encoder = codecs.getincrementalencoder(target)(errors)
+    written = 0
+    if bom and target in ('utf-16-le', 'utf-16-be', 'utf-32-le', 'utf-32-be'):
+        written += dst.write('\ufeff'.encode(target))
+    for chunk in iter(lambda: src.read(_COMPACT_CHUNK), b""):
+        _check_cancelled()
+        written += dst.write(encoder.encode(decoder.decode(chunk)))
+    written += dst.write(encoder.encode(decoder.decode(b"", final=True), final=True))
+    return written
+
+def cmd_iconv(args=""):
+    """Convert text files between encodings, or report detected encodings"""
+    switches, positional = _parse_switches(args)
+    if not positional or '?' in switches or ('T' not in switches and 'D' not in switches):
+        print("ICONV [/F:from] /T:to [/O:output] [/BOM] [/R] file")
+        print("ICONV /D file [...]")
+        print("  /F    Source encoding or code page (default: /E-style detection).")
+        print("  /T    Target encoding or code page, e.g. /T:utf-8 or /T:1252.")
+        print("  /O    Write to a new file instead of converting in place.")
+        print("  /BOM  Write a byte order mark.   /R  Replace unconvertible characters.")
+        print("  /D    Only report the detected encoding of each file.")
+        return
+    if 'D' in switches:
+        for pattern in positional:
+            for path in sorted(glob.glob(pattern)) or [pattern]:
+                try:
+                    with _open_binary(path) as f:
+                        encoding = _detect_encoding(f.peek(_DETECT_SAMPLE)[:_DETECT_SAMPLE])
+                    print(f"{encoding or 'binary':<12} {path}")
+                except OSError as e:
+                    print(f"{COLOR_CODES['red']}{path}: {e.strerror}{COLOR_CODES['default']}")
+        return
+    source = positional[0]
+    errors = 'replace' if 'R' in switches else 'strict'
+    try:
+        target = _codec_name(switches['T'])
+        with _open_binary(source) as f:
+            source_encoding = _codec_name(switches['F']) if 'F' in switches else _sniff(f, source)
 
-def cmd_diskpart():
-    """Disk partitioning utility simulation"""
-    print(f"{COLOR_CODES['yellow']}Microsoft DiskPart version X.1{COLOR_CODES['default']}")
-    print()
-    print("Copyright (C) Microsoft Corporation.")
-    print("On computer: " + HOST_NAME)
-    print()
-    print(f"{COLOR_CODES['red']}WARNING: DiskPart functionality is limited in TerminalX.{COLOR_CODES['default']}")
-    print("Type 'help' for DiskPart commands or 'exit' to return to TerminalX.")
+        def convert(dst):
+            with _open_binary(source) as src:
+                return _transcode(src, dst, source_encoding, target, errors, 'BOM' in switches)
 
+        if isinstance(switches.get('O'), str):
+            with open(switches['O'], 'wb') as dst:
+                size = convert(dst)
+        else:
+            size = _rewrite_atomically(source, lambda _src, dst: convert(dst))
+    except FileNotFoundError:
+        print(f"{COLOR_CODES['red']}The system cannot find the file specified.{COLOR_CODES['default']}")
+        return
+    except LookupError as e:
+        print(f"{COLOR_CODES['red']}ICONV: {e}{COLOR_CODES['default']}")
+        return
+    except (UnicodeError, BinaryFileError) as e:
+        print(f"{COLOR_CODES['red']}ICONV: {e} (use /R to replace){COLOR_CODES['default']}")
+        return
+    print(f"{COLOR_CODES['green']}Converted {source} from {source_encoding} to {target} "
+          f"({_format_bytes(size)}).{COLOR_CODES['default']}")
+
+# ========== HTTP CLIENT ==========
+
+# CURL and WGET share one keep-alive pool of http.client connections per
+# (scheme, host, port). Bodies stream to disk through a reusable buffer.
+# Large downloads from servers that honour Range are split into parts that
+# are fetched concurrently into a preallocated <file>.part, with per-range
+# progress kept in <file>.part.json so an interrupted download resumes.
+# The state file is written before the .part is preallocated, so a .part
+# without one was always written sequentially and its size is an offset.
+_HTTP_BUFFER = 256 * 1024
+_HTTP_TIMEOUT = 30
+_HTTP_IDLE_SECONDS = 30
+_HTTP_REDIRECTS = 5
+_RANGE_THRESHOLD = 8 * 1024 * 1024
+
+class HTTPError(Exception):
+    """Raised for unexpected HTTP status codes"""
+
+class _ConnectionPool:
+    """Thread-safe keep-alive pool of http.client connections per host"""
+
+    def __init__(self, max_idle=8):
+        self.max_idle = max_idle
+        self._idle = collections.defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _connect(self, key):
+        import http.client
+        scheme, host, port, verify = key
+        if scheme == 'https':
+            import ssl
+            context = ssl.create_default_context()
+            if not verify:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            return http.client.HTTPSConnection(host, port, timeout=_HTTP_TIMEOUT, context=context)
+        return http.client.HTTPConnection(host, port, timeout=_HTTP_TIMEOUT)
+
+    def _checkout(self, key):
+        with self._lock:
+            idle = self._idle[key]
+            while idle:
+                connection, since = idle.pop()
+                if time.monotonic() - since < _HTTP_IDLE_SECONDS:
+                    return connection, True
+                connection.close()
+        return self._connect(key), False
+
+    def request(self, method, url, headers=None, verify=True):
+        """Send a request. Returns (key, connection, response); release() them when done."""
+        import http.client
+        from urllib.parse import urlsplit
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"unsupported URL: {url}")
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80), verify)
+        target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        headers = {'User-Agent': 'TerminalX/1.0', 'Accept-Encoding': 'identity', **(headers or {})}
+        while True:
+            connection, reused = self._checkout(key)
+            try:
+                connection.request(method, target, headers=headers)
+                return key, connection, connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if not reused:
+                    raise
+                # The server closed an idle keep-alive connection; retry on a fresh one
+
+    def release(self, key, connection, response):
+        """Keep a connection for reuse if its response was fully read and it stays open"""
+        if response.isclosed() and not response.will_close and connection.sock is not None:
+            with self._lock:
+                if len(self._idle[key]) < self.max_idle:
+                    self._idle[key].append((connection, time.monotonic()))
+                    return
+        connection.close()
+
+_HTTP_POOL = _ConnectionPool()
+
+def _http_open(url, headers=None, options=None, method='GET'):
+    """Request url, following redirects when asked. Returns (final url, key, connection, response)."""
+    from urllib.parse import urljoin
+    options = options or {}
+    for _ in range(_HTTP_REDIRECTS + 1):
+        key, connection, response = _HTTP_POOL.request(method, url, headers, not options.get('insecure'))
+        if response.status not in (301, 302, 303, 307, 308) or not options.get('follow', True):
+            return url, key, connection, response
+        response.read()
+        _HTTP_POOL.release(key, connection, response)
+        url = urljoin(url, response.getheader('Location', url))
+    raise HTTPError(f"too many redirects for {url}")
+
+def _stream_body(response, out, received):
+    """Copy a response body to a binary file object in fixed-size chunks"""
+    buffer = bytearray(_HTTP_BUFFER)
+    view = memoryview(buffer)
+    total = 0
     while True:
-        command = input("DISKPART> ").strip().lower()
+        _check_cancelled()
+        count = response.readinto(view)
+        if not count:
+            if response.length:  # http.client reports a truncated body as a normal EOF
+                raise HTTPError(f"connection closed with {response.length:,} byte(s) outstanding")
+            return total
+        out.write(view[:count])
+        total += count
+        received(count)
+
+def _content_range(response):
+    """(first byte, total size or None) from a 206 response's Content-Range, or None"""
+    match = re.match(r'bytes\s+(\d+)-\d+/(\d+|\*)', response.getheader('Content-Range') or '')
+    if not match:
+        return None
+    return int(match.group(1)), None if match.group(2) == '*' else int(match.group(2))
+
+class _TransferMeter:
+    """Thread-safe byte counter driving a _Progress line"""
+
+    def __init__(self, label, quiet=False):
+        self.progress = None if quiet else _Progress(label)
+        self.started = time.monotonic()
+        self.files = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        with self._lock:
+            self.bytes += count
+            if self.progress:
+                self.progress.update(self.files, self.bytes)
+
+    def finished_file(self):
+        with self._lock:
+            self.files += 1
+
+    def message(self, text):
+        """Print a line without mangling the progress line"""
+        with self._lock:
+            if self.progress and self.progress._shown:
+                print()
+                self.progress._shown = False
+            print(text)
+
+    def done(self):
+        if self.progress:
+            self.progress.done()
+
+def _fetch_ranges(url, part_path, state_path, state, options, meter):
+    """Fetch the unfinished byte ranges recorded in state concurrently into part_path"""
+    lock = threading.Lock()
+    last_saved = [0.0]
+
+    def save(force=False):
+        with lock:
+            if force or time.monotonic() - last_saved[0] >= 1:
+                last_saved[0] = time.monotonic()
+                with open(state_path, 'w', encoding='utf-8') as f:
+                    json.dump(state, f)
+
+    def fetch(byte_range):
+        start, end = byte_range[0] + byte_range[2], byte_range[1]
+        if start > end:
+            return 0
+        _, key, connection, response = _http_open(url, {**options['headers'], 'Range': f"bytes={start}-{end}"},
+                                                  options)
+        try:
+            if response.status != 206:
+                raise HTTPError(f"{response.status} {response.reason} (range request)")
+            content_range = _content_range(response)
+            if not content_range or content_range[0] != start:
+                raise HTTPError(f"range request for byte {start:,} answered with "
+                                f"{response.getheader('Content-Range') or 'no Content-Range'}")
+            with open(part_path, 'r+b') as out:
+                out.seek(start)
+
+                def received(count):
+                    byte_range[2] += count
+                    meter.add(count)
+                    save()
+                return _stream_body(response, out, received)
+        finally:
+            _HTTP_POOL.release(key, connection, response)
+
+    if not os.path.exists(part_path) or os.path.getsize(part_path) < state['size']:
+        for byte_range in state['ranges']:  # nothing fetched survives without a full-size .part
+            byte_range[2] = 0
+    save(force=True)
+    with open(part_path, 'ab') as out:
+        if out.tell() < state['size']:
+            out.truncate(state['size'])
+    try:
+        for _, _, error in _bounded_map(fetch, state['ranges'], workers=len(state['ranges'])):
+            if error:
+                raise error
+    finally:
+        if any(start + done <= end for start, end, done in state['ranges']):
+            save(force=True)
+
+def _http_download(url, output, options, meter):
+    """Download url to output (resuming, and in parallel ranges when possible). Returns its size."""
+    part_path, state_path = output + '.part', output + '.part.json'
+    state = None
+    if options['resume'] and os.path.exists(state_path):
+        try:
+            with open(state_path, encoding='utf-8') as f:
+                state = json.load(f)
+        except ValueError:
+            state = {}
+        if state.get('url') != url or 'source' not in state:
+            # A ranged .part of some other download: preallocated, so its size means nothing
+            state = None
+            os.remove(state_path)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    if state is None:
+        offset = os.path.getsize(part_path) if options['resume'] and os.path.exists(part_path) else 0
+        headers = dict(options['headers'], **({'Range': f"bytes={offset}-"} if offset else {}))
+        url_final, key, connection, response = _http_open(url, headers, options)
+        if response.status == 416 and offset:
+            # The .part is no shorter than the file, but nothing proves it holds it: start over
+            response.read()
+            _HTTP_POOL.release(key, connection, response)
+            offset = 0
+            url_final, key, connection, response = _http_open(url, options['headers'], options)
+        try:
+            content_range = _content_range(response) if response.status == 206 else None
+            if response.status not in (200, 206):
+                response.read()
+                raise HTTPError(f"{response.status} {response.reason}")
+            elif response.status == 206 and (not content_range or content_range[0] != offset):
+                raise HTTPError(f"resuming at byte {offset:,} answered with "
+                                f"{response.getheader('Content-Range') or 'no Content-Range'}")
+            else:
+                length = int(response.getheader('Content-Length') or 0)
+                ranged = (response.status == 200 and options['parts'] > 1 and length >= _RANGE_THRESHOLD
+                          and response.getheader('Accept-Ranges', '').lower() == 'bytes')
+                if ranged:
+                    # Abandon this stream and refetch the body as concurrent ranges
+                    connection.close()
+                    step = -(-length // options['parts'])
+                    state = {'url': url, 'source': url_final, 'size': length,
+                             'ranges': [[start, min(start + step, length) - 1, 0] for start in range(0, length, step)]}
+                else:
+                    if os.path.exists(state_path):
+                        os.remove(state_path)
+                    with open(part_path, 'ab' if response.status == 206 else 'wb') as out:
+                        _stream_body(response, out, meter.add)
+        finally:
+            _HTTP_POOL.release(key, connection, response)
+
+    if state is not None:
+        _fetch_ranges(state['source'], part_path, state_path, state, options, meter)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+    os.replace(part_path, output)
+    meter.finished_file()
+    return os.path.getsize(output)
+
+def _remote_name(url):
+    from urllib.parse import urlsplit, unquote
+    return unquote(os.path.basename(urlsplit(url).path)) or 'index.html'
+
+def _parse_http_options(args, wget):
+    """Options shared by CURL and WGET (the two differ only in defaults and -O/-o)"""
+    options = {'output': None, 'remote_name': wget, 'directory': None, 'quiet': False, 'head': False,
+               'resume': False, 'follow': wget, 'insecure': False, 'headers': {}, 'jobs': 4, 'parts': 4,
+               'urls': []}
+    tokens = _split_args(args)
+    while tokens:
+        token = tokens.pop(0)
+        if token in ('-o', '-P', '-H', '-j', '-x', '-i', '-C') or (token == '-O' and wget):
+            if not tokens:
+                raise ValueError(f"option {token} requires a value")
+            value = tokens.pop(0)
+            if token in ('-o', '-O'):
+                options['output'] = value
+            elif token == '-P':
+                options['directory'] = value
+            elif token == '-H':
+                name, _, header_value = value.partition(':')
+                options['headers'][name.strip()] = header_value.strip()
+            elif token in ('-j', '-x'):
+                options['jobs' if token == '-j' else 'parts'] = max(1, int(value))
+            elif token == '-i':
+                with open(value, encoding='utf-8') as f:
+                    options['urls'].extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+            else:
+                options['resume'] = True
+        elif token == '-O':
+            options['remote_name'] = True
+        elif token in ('-s', '-q'):
+            options['quiet'] = True
+        elif token in ('-I', '--head'):
+            options['head'] = True
+        elif token == '-L':
+            options['follow'] = True
+        elif token == '-c':
+            options['resume'] = True
+        elif token == '-k':
+            options['insecure'] = True
+        elif token.startswith('-'):
+            raise ValueError(f"unknown option {token}")
+        else:
+            options['urls'].append(token)
+    return options
 
-        if command == 'exit':
+def _http_command(args, wget):
+    name = 'WGET' if wget else 'CURL'
+    try:
+        options = _parse_http_options(args, wget)
+    except (ValueError, OSError) as e:
+        print(f"{COLOR_CODES['red']}{name}: {e}{COLOR_CODES['default']}")
+        return
+    if not options['urls']:
+        if wget:
+            print("WGET [-O file] [-P dir] [-c] [-q] [-i urlfile] [-j N] [-x N] [-k] url [...]")
+        else:
+            print("CURL [-o file | -O] [-L] [-I] [-s] [-C -] [-H header] [-j N] [-x N] [-k] url [...]")
+        print("  -j N  Download up to N URLs concurrently (default 4).")
+        print("  -x N  Split large files into N parallel range requests (default 4).")
+        print("  -c / -C -  Resume a partial download.")
+        return
+    urls = [url if '://' in url else f"http://{url}" for url in options['urls']]
+
+    if options['head']:
+        for url in urls:
+            try:
+                _, key, connection, response = _http_open(url, options['headers'], options, method='HEAD')
+                response.read()
+                _HTTP_POOL.release(key, connection, response)
+            except (OSError, ValueError, HTTPError) as e:
+                print(f"{COLOR_CODES['red']}{name}: {url}: {e}{COLOR_CODES['default']}")
+                _STATUS.code = 1
+                continue
+            print(f"HTTP/{response.version / 10:.1f} {response.status} {response.reason}")
+            for header, value in response.getheaders():
+                print(f"{header}: {value}")
+            print()
+        return
+
+    if not options['output'] and not options['remote_name']:
+        # CURL without -o/-O writes bodies to the console
+        for url in urls:
+            try:
+                _, key, connection, response = _http_open(url, options['headers'], options)
+                decoder = codecs.getincrementaldecoder('utf-8')('replace')
+                try:
+                    if response.status >= 400:
+                        _STATUS.code = 1
+                    for chunk in iter(lambda: response.read(_HTTP_BUFFER), b""):
+                        _check_cancelled()
+                        print(decoder.decode(chunk), end='')
+                    print(decoder.decode(b"", final=True), end='', flush=True)
+                finally:
+                    _HTTP_POOL.release(key, connection, response)
+            except (OSError, ValueError, HTTPError) as e:
+                print(f"{COLOR_CODES['red']}{name}: {url}: {e}{COLOR_CODES['default']}")
+                _STATUS.code = 1
+        return
+
+    if options['output'] and len(urls) > 1:
+        print(f"{COLOR_CODES['red']}{name}: an output file name can only be given for one URL{COLOR_CODES['default']}")
+        return
+    targets = [options['output'] or _remote_name(url) for url in urls]
+    if options['directory']:
+        os.makedirs(options['directory'], exist_ok=True)
+        targets = [os.path.join(options['directory'], target) for target in targets]
+    meter = _TransferMeter("Downloading", options['quiet'])
+    failures = 0
+    for (url, target), received, error in _bounded_map(lambda job: _http_download(job[0], job[1], options, meter),
+                                                        list(zip(urls, targets)), workers=options['jobs']):
+        if error:
+            failures += 1
+            meter.message(f"{COLOR_CODES['red']}{name}: {url}: {error}{COLOR_CODES['default']}")
+        elif not options['quiet'] and len(urls) > 1:
+            meter.message(f"Saved {target} ({_format_bytes(received)})")
+    meter.done()
+    if failures:
+        _STATUS.code = 1
+    if not options['quiet'] and failures < len(urls):
+        elapsed = max(time.monotonic() - meter.started, 1e-6)
+        color = 'red' if failures else 'green'
+        saved = targets[0] if len(targets) == 1 and not failures else f"{len(urls) - failures} file(s)"
+        print(f"{COLOR_CODES[color]}Saved {saved}: {_format_bytes(meter.bytes)} in {elapsed:.2f}s "
+              f"({_format_bytes(meter.bytes / elapsed)}/s){COLOR_CODES['default']}")
+
+def cmd_curl(args=""):
+    """Transfer URLs over HTTP(S); output goes to the console unless -o/-O is given"""
+    _http_command(args, wget=False)
+
+def cmd_wget(args=""):
+    """Download URLs over HTTP(S) to files"""
+    _http_command(args, wget=True)
+
+# ========== FILE SERVER ==========
+
+# SERVE runs an asyncio HTTP/1.1 server on its own event loop inside a
+# background job. File bodies go out with loop.sendfile (os.sendfile on
+# Unix), directory listings are cached by directory mtime, and clients beyond
+# the connection limit get an immediate 503 instead of queueing.
+_SERVE_KEEPALIVE = 15
+_SERVE_MAX_HEADER = 64 * 1024
+_SERVE_LISTING_CACHE = 256
+_SERVE_LISTING_TTL = 5
+_SERVE_BACKLOG = 1024
+
+def _parse_range(value, size):
+    """(start, end) for a single 'bytes=' range; None if unsatisfiable, False to ignore it"""
+    match = re.fullmatch(r'\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*', value)
+    if not match or not any(match.groups()):
+        return False  # malformed or multi-range: serve the whole file
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+def _raise_fd_limit(wanted):
+    """Raise the soft open-file limit towards wanted so many clients can connect"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+    if soft != resource.RLIM_INFINITY and soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError):
+            pass
+
+class _FileServer:
+    """Static HTTP/1.1 file server over one root directory"""
+
+    def __init__(self, root, max_connections=4096, verbose=False):
+        self.root = os.path.realpath(root)
+        self.max_connections = max_connections
+        self.verbose = verbose
+        self.active = 0
+        self.requests = 0
+        self.listings = collections.OrderedDict()
+        self._date = (0, "")
+
+    def http_date(self):
+        from email.utils import formatdate
+        now = int(time.time())
+        if self._date[0] != now:
+            self._date = (now, formatdate(now, usegmt=True))
+        return self._date[1]
+
+    def head(self, status, headers, keep_alive):
+        from http import HTTPStatus
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", f"Date: {self.http_date()}",
+                 "Server: TerminalX", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    def simple(self, writer, status, keep_alive, headers=None, body=b""):
+        writer.write(self.head(status, {**(headers or {}), 'Content-Length': len(body)}, keep_alive) + body)
+
+    async def handle(self, reader, writer):
+        import asyncio
+        if self.active >= self.max_connections:
+            self.simple(writer, 503, False, {'Retry-After': 1})
+            writer.close()
+            return
+        self.active += 1
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), _SERVE_KEEPALIVE)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                keep_alive = await self.respond(request, writer)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        except asyncio.CancelledError:
+            pass  # server shutting down; asyncio's stream callback mis-reports cancelled handlers
+        finally:
+            self.active -= 1
+            writer.close()
+
+    def not_modified(self, headers, etag, mtime):
+        if 'if-none-match' in headers:
+            tags = [tag.strip() for tag in headers['if-none-match'].split(',')]
+            return '*' in tags or etag in tags
+        if 'if-modified-since' in headers:
+            from email.utils import parsedate_to_datetime
+            try:
+                return int(mtime) <= parsedate_to_datetime(headers['if-modified-since']).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def respond(self, request, writer):
+        """Answer one request. Returns whether the connection stays open."""
+        from urllib.parse import unquote, urlsplit
+        self.requests += 1
+        lines = request.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            self.simple(writer, 400, False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            name, separator, value = line.partition(':')
+            if separator:
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+        if method not in ('GET', 'HEAD'):
+            self.simple(writer, 405, False, {'Allow': 'GET, HEAD'})
+            return False
+        try:
+            if int(headers.get('content-length', 0) or 0):
+                keep_alive = False  # we never read request bodies
+        except ValueError:
+            self.simple(writer, 400, False)
+            return False
+
+        url_path = unquote(urlsplit(target).path)
+        path = os.path.realpath(os.path.join(self.root, url_path.lstrip('/')))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            status = 404
+            self.simple(writer, status, keep_alive)
+        elif os.path.isdir(path):
+            if not url_path.endswith('/'):
+                status = 301
+                self.simple(writer, status, keep_alive, {'Location': url_path + '/'})
+            elif os.path.isfile(os.path.join(path, 'index.html')):
+                status = await self.send_file(writer, os.path.join(path, 'index.html'), method, headers, keep_alive)
+            else:
+                status = await self.send_listing(writer, path, url_path, method, headers, keep_alive)
+        elif os.path.isfile(path):
+            status = await self.send_file(writer, path, method, headers, keep_alive)
+        else:
+            status = 404
+            self.simple(writer, status, keep_alive)
+        if self.verbose:
+            peer = writer.get_extra_info('peername') or ('?',)
+            print(f"{peer[0]} \"{method} {target}\" {status}")
+        return keep_alive
+
+    async def send_file(self, writer, path, method, headers, keep_alive):
+        import asyncio
+        import mimetypes
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            size = st.st_size
+            etag = f'"{st.st_mtime_ns:x}-{size:x}"'
+            from email.utils import formatdate
+            common = {'ETag': etag, 'Last-Modified': formatdate(st.st_mtime, usegmt=True), 'Accept-Ranges': 'bytes'}
+            if self.not_modified(headers, etag, st.st_mtime):
+                writer.write(self.head(304, common, keep_alive))
+                return 304
+            status, start, end = 200, 0, size - 1
+            if 'range' in headers and headers.get('if-range', etag) == etag:
+                byte_range = _parse_range(headers['range'], size)
+                if byte_range is None:
+                    self.simple(writer, 416, keep_alive, {'Content-Range': f"bytes */{size}"})
+                    return 416
+                if byte_range:
+                    status, (start, end) = 206, byte_range
+                    common['Content-Range'] = f"bytes {start}-{end}/{size}"
+            length = max(end - start + 1, 0)
+            common['Content-Type'] = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            common['Content-Length'] = length
+            writer.write(self.head(status, common, keep_alive))
+            if method == 'GET' and length:
+                await writer.drain()
+                await asyncio.get_running_loop().sendfile(writer.transport, f, start, length)
+        return status
+
+    def render_listing(self, path, url_path):
+        import html
+        from urllib.parse import quote
+        entries = sorted(os.scandir(path), key=lambda e: (not e.is_dir(), e.name.lower()))
+        title = html.escape(url_path)
+        rows = [] if url_path == '/' else ['<li><a href="../">../</a></li>']
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+                size = '' if is_dir else f" ({_format_bytes(entry.stat().st_size)})"
+            except OSError:
+                continue
+            name = entry.name + ('/' if is_dir else '')
+            rows.append(f'<li><a href="{quote(name)}">{html.escape(name)}</a>{size}</li>')
+        return (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Index of {title}</title></head>"
+                f"<body><h1>Index of {title}</h1><ul>{''.join(rows)}</ul></body></html>").encode('utf-8')
+
+    async def send_listing(self, writer, path, url_path, method, headers, keep_alive):
+        import asyncio
+        st = os.stat(path)
+        cached = self.listings.get(path)
+        if cached is None or cached[0] != st.st_mtime_ns or time.monotonic() - cached[1] > _SERVE_LISTING_TTL:
+            # scandir of a large directory would stall every client, so it runs off the loop
+            body = await asyncio.get_running_loop().run_in_executor(None, self.render_listing, path, url_path)
+            etag = f'W/"{st.st_mtime_ns:x}-{zlib.crc32(body):x}"'
+            cached = self.listings[path] = (st.st_mtime_ns, time.monotonic(), etag, body)
+            while len(self.listings) > _SERVE_LISTING_CACHE:
+                self.listings.popitem(last=False)
+        self.listings.move_to_end(path)
+        _, _, etag, body = cached
+        from email.utils import formatdate
+        common = {'ETag': etag, 'Last-Modified': formatdate(st.st_mtime, usegmt=True), 'Cache-Control': 'no-cache'}
+        if self.not_modified(headers, etag, st.st_mtime):
+            writer.write(self.head(304, common, keep_alive))
+            return 304
+        common.update({'Content-Type': 'text/html; charset=utf-8', 'Content-Length': len(body)})
+        writer.write(self.head(200, common, keep_alive) + (body if method == 'GET' else b""))
+        return 200
+
+    async def serve(self, sock):
+        import asyncio
+        server = await asyncio.start_server(self.handle, sock=sock, limit=_SERVE_MAX_HEADER, backlog=_SERVE_BACKLOG)
+        job = _current_job()
+        async with server:
+            await server.start_serving()
+            while job is None or not job.cancel_event.is_set():
+                await asyncio.sleep(0.25)
+
+def _run_file_server(server, sock):
+    import asyncio
+    try:
+        asyncio.run(server.serve(sock))
+    except KeyboardInterrupt:
+        print("^C")
+    finally:
+        sock.close()
+    print(f"Server stopped after {server.requests:,} request(s).")
+
+def cmd_serve(args=""):
+    """Serve a directory over HTTP from a background job"""
+    switches, positional = _parse_switches(args)
+    if '?' in switches or len(positional) > 1:
+        print("SERVE [/P:port] [/A:address] [/C:connections] [/V] [/F] [directory]")
+        print("  /P  Port (default 8000; 0 picks a free port).")
+        print("  /A  Address to bind (default 127.0.0.1).")
+        print("  /C  Maximum concurrent connections (default 4096); extra clients get 503.")
+        print("  /V  Log each request to the job output.")
+        print("  /F  Run in the foreground instead of as a background job.")
+        return
+    root = os.path.abspath(positional[0]) if positional else os.getcwd()
+    if not os.path.isdir(root):
+        print(f"{COLOR_CODES['red']}The system cannot find the path specified.{COLOR_CODES['default']}")
+        return
+    try:
+        port = int(switches.get('P', 8000))
+        limit = int(switches.get('C', 4096))
+        address = switches['A'] if isinstance(switches.get('A'), str) else '127.0.0.1'
+        sock = socket.create_server((address, port), backlog=_SERVE_BACKLOG)
+    except ValueError:
+        print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
+        return
+    except OSError as e:
+        print(f"{COLOR_CODES['red']}SERVE: cannot listen on port {switches.get('P', 8000)}: {e.strerror}{COLOR_CODES['default']}")
+        return
+    _raise_fd_limit(limit + 64)
+    server = _FileServer(root, limit, 'V' in switches)
+    url = f"http://{address}:{sock.getsockname()[1]}/"
+    if 'F' in switches or _current_job() is not None:
+        print(f"Serving {root} at {url} (Ctrl+C to stop)")
+        _run_file_server(server, sock)
+    else:
+        job = start_job(f"serve {args}".strip(), target=lambda: _run_file_server(server, sock))
+        print(f"[{job.id}] Serving {root} at {url} (JOBS /K:{job.id} to stop)")
+
+# ========== BENCHMARKS ==========
+
+# WINSAT measures the disk under a target directory through a scratch file:
+# sequential throughput per block size, random IOPS with one thread per
+# outstanding request (os.pread/os.pwrite release the GIL), fsync latency,
+# and memory copy bandwidth. Buffered random writes end with an fdatasync
+# inside the timed run, so their rate includes reaching the disk. Buffers come from anonymous mmap so they are
+# page aligned, as O_DIRECT requires.
+_BENCH_DEFAULT_SIZE = 256 * 1024 * 1024
+_BENCH_DEFAULT_BLOCKS = (4096, 64 * 1024, 1024 * 1024)
+_BENCH_FSYNC_SAMPLES = 200
+_BENCH_MEMORY_BUFFER = 64 * 1024 * 1024
+
+def _percentiles(samples, points=(50, 95, 99)):
+    """Nearest-rank percentiles of a list of numbers"""
+    if not samples:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(samples)
+    return {f"p{p}": ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+            for p in points}
+
+def _aligned_buffer(size):
+    """Page-aligned, non-compressible buffer suitable for O_DIRECT"""
+    import mmap
+    buffer = mmap.mmap(-1, size)
+    buffer.write(os.urandom(min(size, 1024 * 1024)) * (size // min(size, 1024 * 1024)))
+    return buffer
+
+def _bench_open(path, write, direct):
+    """Open the scratch file, returning (fd, using O_DIRECT)"""
+    flags = (os.O_RDWR | os.O_CREAT) if write else os.O_RDONLY
+    if direct and hasattr(os, 'O_DIRECT'):
+        try:
+            return os.open(path, flags | os.O_DIRECT, 0o600), True
+        except OSError as e:
+            if e.errno != errno.EINVAL:
+                raise
+    return os.open(path, flags, 0o600), False
+
+def _drop_cache(fd):
+    """Ask the kernel to evict a file's cached pages so reads hit the device"""
+    if hasattr(os, 'posix_fadvise'):
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+def _bench_sequential(path, size, block, direct):
+    buffer = _aligned_buffer(block)
+    blocks = size // block
+    fd, used_direct = _bench_open(path, True, direct)
+    try:
+        started = time.perf_counter()
+        for i in range(blocks):
+            if i % 64 == 0:
+                _check_cancelled()
+            os.pwrite(fd, buffer, i * block)
+        os.fsync(fd)
+        write_seconds = time.perf_counter() - started
+        _drop_cache(fd)
+    finally:
+        os.close(fd)
+    fd, _ = _bench_open(path, False, direct)
+    try:
+        started = time.perf_counter()
+        for i in range(blocks):
+            if i % 64 == 0:
+                _check_cancelled()
+            os.preadv(fd, [buffer], i * block)
+        read_seconds = time.perf_counter() - started
+    finally:
+        os.close(fd)
+        buffer.close()
+    nbytes = blocks * block
+    return {'block': block, 'write_mb_s': round(nbytes / write_seconds / 2**20, 1),
+            'read_mb_s': round(nbytes / read_seconds / 2**20, 1)}, used_direct
+
+def _physical_memory():
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def _bench_random(path, size, block, depth, seconds, write, direct):
+    """Random block I/O from `depth` threads for `seconds`. Returns IOPS, MB/s and latency (us)."""
+    blocks = size // block
+    deadline = time.perf_counter() + seconds
+    latencies = []
+    lock = threading.Lock()
+    job = _current_job()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        buffer = _aligned_buffer(block)
+        fd, _ = _bench_open(path, write, direct)
+        local = []
+        try:
+            while time.perf_counter() < deadline and not (job and job.cancel_event.is_set()):
+                offset = rng.randrange(blocks) * block
+                started = time.perf_counter()
+                if write:
+                    os.pwrite(fd, buffer, offset)
+                else:
+                    os.preadv(fd, [buffer], offset)
+                local.append(time.perf_counter() - started)
+        finally:
+            os.close(fd)
+            buffer.close()
+        with lock:
+            latencies.extend(local)
+
+    if not write:
+        # Start from a cold cache; the sequential tests just read the whole file
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            _drop_cache(fd)
+        finally:
+            os.close(fd)
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(depth)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if write and not direct:
+        # Buffered writes have only reached the page cache: time writing them back too
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            getattr(os, 'fdatasync', os.fsync)(fd)
+        finally:
+            os.close(fd)
+    _check_cancelled()
+    elapsed = time.perf_counter() - started
+    latency = {key: round(value * 1e6, 1) for key, value in _percentiles(latencies).items() if value is not None}
+    return {'iops': round(len(latencies) / elapsed), 'mb_s': round(len(latencies) * block / elapsed / 2**20, 1),
+            'latency_us': latency}
+
+def _bench_fsync(directory, samples):
+    """Latency (ms) of a 4 KiB write followed by fsync, as a journal or database would issue"""
+    fd, path = tempfile.mkstemp(dir=directory, prefix='.winsat-fsync-')
+    buffer = _aligned_buffer(4096)
+    latencies = []
+    try:
+        for i in range(samples):
+            _check_cancelled()
+            started = time.perf_counter()
+            os.pwrite(fd, buffer, (i % 256) * 4096)
+            os.fsync(fd)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        os.close(fd)
+        os.remove(path)
+        buffer.close()
+    result = {key: round(value * 1e3, 3) for key, value in _percentiles(latencies).items()}
+    result['max'] = round(max(latencies) * 1e3, 3)
+    return result
+
+def _bench_memory(size=_BENCH_MEMORY_BUFFER, seconds=1.0):
+    """Memory copy bandwidth in MB/s using memoryview slice assignment (a plain memcpy)"""
+    source = _aligned_buffer(size)
+    target = bytearray(size)
+    view, source_view = memoryview(target), memoryview(source)
+    copies = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        _check_cancelled()
+        view[:] = source_view
+        copies += 1
+    elapsed = time.perf_counter() - started
+    source_view.release()
+    source.close()
+    return {'copy_mb_s': round(copies * size / elapsed / 2**20, 1), 'buffer': size}
+
+def cmd_winsat(args=""):
+    """Benchmark disk and memory throughput"""
+    switches, positional = _parse_switches(args)
+    tests = {p.lower() for p in positional} or {'all'}
+    if '?' in switches or not tests <= {'all', 'disk', 'mem', 'memory'}:
+        print("WINSAT [disk | mem | all] [/D:dir] [/S:size] [/B:sizes] [/R:size] [/Q:depth] [/T:seconds]")
+        print("       [/DIRECT] [/JSON[:file]]")
+        print("  /D       Directory to test (default: current directory).")
+        print("  /S       Scratch file size (default 256M).")
+        print("  /B       Sequential block sizes, comma separated (default 4K,64K,1M).")
+        print("  /R       Random I/O block size (default 4K).")
+        print("  /Q       Queue depth: concurrent random I/O threads (default 4).")
+        print("  /T       Seconds per random I/O test (default 5).")
+        print("  /DIRECT  Bypass the page cache with O_DIRECT where supported. Without it, random")
+        print("           writes are flushed to disk within the timed run, and random reads of a")
+        print("           file smaller than RAM are partly cached and marked as such.")
+        print("  /JSON    Print results as JSON, or write them to a file.")
+        return
+    try:
+        directory = switches['D'] if isinstance(switches.get('D'), str) else os.getcwd()
+        size = _parse_size(switches.get('S', _BENCH_DEFAULT_SIZE))
+        blocks = ([_parse_size(b) for b in str(switches['B']).split(',')] if 'B' in switches
+                  else list(_BENCH_DEFAULT_BLOCKS))
+        random_block = _parse_size(switches.get('R', 4096))
+        depth = max(1, int(switches.get('Q', 4)))
+        seconds = float(switches.get('T', 5))
+        if min(blocks + [random_block]) <= 0 or size < max(blocks + [random_block]):
+            raise ValueError
+    except ValueError:
+        print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
+        return
+    direct = 'DIRECT' in switches
+    quiet = switches.get('JSON') is True
+    say = (lambda *a, **k: None) if quiet else print
+    results = {'host': HOST_NAME, 'platform': f"{platform.system()} {platform.release()}",
+               'timestamp': datetime.now().isoformat(timespec='seconds'), 'cpus': os.cpu_count()}
+
+    if tests & {'all', 'disk'}:
+        if not os.path.isdir(directory):
+            print(f"{COLOR_CODES['red']}The system cannot find the path specified.{COLOR_CODES['default']}")
+            return
+        if shutil.disk_usage(directory).free < size * 1.1:
+            print(f"{COLOR_CODES['red']}Not enough free space in {directory} for a {_format_bytes(size)} "
+                  f"test file (use /S).{COLOR_CODES['default']}")
+            return
+        if direct and not hasattr(os, 'O_DIRECT'):
+            say(f"{COLOR_CODES['yellow']}O_DIRECT is not available here; using buffered I/O.{COLOR_CODES['default']}")
+        path = os.path.join(directory, f".winsat-{os.getpid()}.tmp")
+        disk = {'path': os.path.abspath(directory), 'file_size': size, 'direct': direct, 'sequential': []}
+        try:
+            say(f"{COLOR_CODES['cyan']}Disk: {disk['path']} ({_format_bytes(size)} test file){COLOR_CODES['default']}")
+            for block in blocks:
+                say(f"  Sequential {_format_bytes(block):>10} blocks ... ", end='', flush=True)
+                result, used_direct = _bench_sequential(path, size, block, direct)
+                disk['direct'] = disk['direct'] and used_direct
+                disk['sequential'].append(result)
+                say(f"write {result['write_mb_s']:>9,.1f} MB/s   read {result['read_mb_s']:>9,.1f} MB/s")
+            if direct and not disk['direct']:
+                say(f"{COLOR_CODES['yellow']}  The filesystem rejected O_DIRECT; results include the page cache."
+                    f"{COLOR_CODES['default']}")
+            for mode in ('read', 'write'):
+                say(f"  Random {mode:<5} {_format_bytes(random_block)}, QD{depth} ... ", end='', flush=True)
+                result = _bench_random(path, size, random_block, depth, seconds, mode == 'write', disk['direct'])
+                cached = mode == 'read' and not disk['direct'] and size < (_physical_memory() or 0)
+                disk[f"random_{mode}"] = dict(result, block=random_block, queue_depth=depth, cached=cached)
+                latency = result['latency_us']
+                say(f"{result['iops']:>9,} IOPS {result['mb_s']:>9,.1f} MB/s   "
+                    f"p50 {latency.get('p50', 0):,.0f}us  p99 {latency.get('p99', 0):,.0f}us")
+                if cached:
+                    say(f"{COLOR_CODES['yellow']}  The test file fits in RAM, so buffered random reads are served "
+                        f"more and more from the page cache as the test runs. Use /DIRECT, or /S larger than "
+                        f"{_format_bytes(_physical_memory())}, to measure the device.{COLOR_CODES['default']}")
+            say("  fsync latency ... ", end='', flush=True)
+            disk['fsync_ms'] = _bench_fsync(directory, _BENCH_FSYNC_SAMPLES)
+            say("p50 {p50:.3f}ms  p95 {p95:.3f}ms  p99 {p99:.3f}ms  max {max:.3f}ms".format(**disk['fsync_ms']))
+        except OSError as e:
+            print(f"\n{COLOR_CODES['red']}WINSAT: {e}{COLOR_CODES['default']}")
+            return
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+        results['disk'] = disk
+
+    if tests & {'all', 'mem', 'memory'}:
+        say(f"{COLOR_CODES['cyan']}Memory{COLOR_CODES['default']}")
+        results['memory'] = _bench_memory()
+        say(f"  Copy bandwidth {results['memory']['copy_mb_s']:>12,.1f} MB/s")
+
+    if 'JSON' in switches:
+        if quiet:
+            print(json.dumps(results, indent=2))
+        else:
+            with open(switches['JSON'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"{COLOR_CODES['green']}Results written to {switches['JSON']}{COLOR_CODES['default']}")
+
+# ========== NETWORK PERFORMANCE ==========
+
+# NETPERF speaks a one-line header protocol over TCP to its own server:
+#   "TCP\n"     bulk data follows until EOF; the server replies with the byte count
+#   "RR <n>\n"  n-byte requests, each echoed back, until EOF
+#   "UDP\n"     the server answers with a UDP port, counts datagrams sent to it
+#               until "DONE\n", then replies with a JSON line of statistics
+# Each UDP datagram starts with a (sequence, send time ns) header.
+# RR messages are capped at _NETPERF_RR_MAX so a client cannot make the
+# server buffer arbitrary amounts; larger sizes get "ERR <reason>\n".
+_NETPERF_PORT = 5201
+_NETPERF_RR_MAX = 1024 * 1024
+_NETPERF_TCP_LENGTH = 128 * 1024
+_NETPERF_UDP_LENGTH = 1400
+_NETPERF_UDP_HEADER = struct.Struct('!QQ')
+_NETPERF_COUNT = struct.Struct('!Q')
+
+def _format_rate(bits_per_second):
+    for unit, scale in (('Gbit/s', 1e9), ('Mbit/s', 1e6), ('Kbit/s', 1e3)):
+        if bits_per_second >= scale:
+            return f"{bits_per_second / scale:,.2f} {unit}"
+    return f"{bits_per_second:,.0f} bit/s"
+
+def _parse_rate(text):
+    """Parse 100M, 1.5G, 500Kbps into bits per second; network rates use decimal (SI) units"""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([KMGT]?)(?:bps|bit/s|b)?', str(text).strip(), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"invalid rate: {text}")
+    return int(float(match.group(1)) * 1000 ** ('_KMGT'.index(match.group(2).upper() or '_')))
+
+def _netperf_udp_sink(udp, stop, stats):
+    """Count datagrams until stop is set, tracking loss, reordering and RFC 3550 jitter"""
+    buffer = bytearray(65536)
+    last_transit = None
+    udp.settimeout(0.2)
+    while not stop.is_set():
+        try:
+            count = udp.recv_into(buffer)
+        except socket.timeout:
+            continue
+        except OSError:
+            break
+        if count < _NETPERF_UDP_HEADER.size:
+            continue
+        sequence, sent_ns = _NETPERF_UDP_HEADER.unpack_from(buffer)
+        stats['received'] += 1
+        stats['bytes'] += count
+        if sequence < stats['max_seq']:
+            stats['out_of_order'] += 1
+        stats['max_seq'] = max(stats['max_seq'], sequence)
+        transit = time.time_ns() - sent_ns
+        if last_transit is not None:
+            stats['jitter_ms'] += (abs(transit - last_transit) / 1e6 - stats['jitter_ms']) / 16
+        last_transit = transit
+
+def _netperf_handle(rfile, wfile, connection, peer):
+    """Serve one NETPERF test connection"""
+    header = rfile.readline(64).decode('ascii', 'replace').split()
+    if not header:
+        return
+    started = time.monotonic()
+    if header[0] == 'TCP':
+        view = memoryview(bytearray(_NETPERF_TCP_LENGTH))
+        total = 0
+        while True:
+            count = rfile.readinto(view)
+            if not count:
+                break
+            total += count
+        wfile.write(_NETPERF_COUNT.pack(total))
+        elapsed = max(time.monotonic() - started, 1e-9)
+        print(f"TCP  {peer[0]}:{peer[1]}  {_format_bytes(total)} in {elapsed:.1f}s  {_format_rate(total * 8 / elapsed)}")
+    elif header[0] == 'RR' and len(header) == 2 and header[1].isdigit():
+        size = int(header[1])
+        if not 0 < size <= _NETPERF_RR_MAX:
+            wfile.write(f"ERR RR size must be 1 to {_NETPERF_RR_MAX} bytes\n".encode('ascii'))
+            print(f"RR   {peer[0]}:{peer[1]}  rejected {size:,}-byte messages")
+            return
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        transactions = 0
+        while True:
+            request = rfile.read(size)
+            if len(request) < size:
+                break
+            wfile.write(request)
+            transactions += 1
+        print(f"RR   {peer[0]}:{peer[1]}  {transactions:,} transaction(s)")
+    elif header[0] == 'UDP':
+        udp = socket.socket(connection.family, socket.SOCK_DGRAM)
+        try:
+            udp.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+            udp.bind((connection.getsockname()[0], 0))
+            stats = {'received': 0, 'bytes': 0, 'max_seq': 0, 'out_of_order': 0, 'jitter_ms': 0.0}
+            stop = threading.Event()
+            sink = threading.Thread(target=_netperf_udp_sink, args=(udp, stop, stats), daemon=True)
+            sink.start()
+            wfile.write(f"{udp.getsockname()[1]}\n".encode('ascii'))
+            rfile.readline(64)  # DONE (or EOF if the client went away)
+            stop.set()
+            sink.join()
+        finally:
+            udp.close()
+        wfile.write((json.dumps(stats) + '\n').encode('ascii'))
+        print(f"UDP  {peer[0]}:{peer[1]}  {stats['received']:,} datagram(s), {_format_bytes(stats['bytes'])}")
+
+def _run_netperf_server(server):
+    """Serve until the current job is cancelled (or Ctrl+C in the foreground)"""
+    # Handler threads log to wherever this (job) thread's output goes
+    server.output = sys.stdout.current if _stdout_redirected() else None
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.25}, daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            _sleep(0.25)
+    except (CommandCancelled, KeyboardInterrupt):
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("NETPERF server stopped.")
+
+def _netperf_server(switches, args):
+
+    class NetperfHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            if self.server.output is not None:
+                sys.stdout.redirect(self.server.output)
+            try:
+                _netperf_handle(self.rfile, self.wfile, self.connection, self.client_address)
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                if self.server.output is not None:
+                    sys.stdout.reset()
+
+    class NetperfServer(socketserver.ThreadingTCPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+        output = None
+
+    address = switches['A'] if isinstance(switches.get('A'), str) else '127.0.0.1'
+    port = int(switches.get('P', _NETPERF_PORT))
+    try:
+        server = NetperfServer((address, port), NetperfHandler)
+    except OSError as e:
+        print(f"{COLOR_CODES['red']}NETPERF: cannot listen on port {port}: {e.strerror}{COLOR_CODES['default']}")
+        return
+    port = server.server_address[1]
+    if 'F' in switches or _current_job() is not None:
+        print(f"NETPERF server listening on {address}:{port} (Ctrl+C to stop)")
+        _run_netperf_server(server)
+    else:
+        job = start_job(f"netperf {args}".strip(), target=lambda: _run_netperf_server(server))
+        print(f"[{job.id}] NETPERF server listening on {address}:{port} (JOBS /K:{job.id} to stop)")
+
+class _IntervalReporter:
+    """Prints per-interval deltas of a counter function from a background thread"""
+
+    def __init__(self, interval, sample, describe, quiet=False):
+        self.interval = interval
+        self.sample = sample
+        self.describe = describe
+        self.quiet = quiet
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=_bind_session(self._run), daemon=True)
+
+    def _run(self):
+        started = time.monotonic()
+        previous_time, previous = started, self.sample()
+        while not self.stop.wait(self.interval):
+            now, current = time.monotonic(), self.sample()
+            if not self.quiet:
+                print(f"[{previous_time - started:6.1f}-{now - started:6.1f} s]  "
+                      f"{self.describe(current, previous, now - previous_time)}")
+            previous_time, previous = now, current
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+
+def _netperf_connect(host, port, window=None):
+    sock = socket.create_connection((host, port), timeout=10)
+    if window:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, window)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, window)
+    return sock
+
+def _netperf_tcp(host, port, options):
+    """Bulk TCP throughput over parallel streams; returns a results dict"""
+    length, streams, seconds = options['length'], options['streams'], options['seconds']
+    sent = [0] * streams
+    received = [0] * streams
+    payload = os.urandom(length)
+    source = None
+    if options['zerocopy']:
+        # socket.sendfile() hands pages straight from the page cache to the socket (os.sendfile)
+        source = tempfile.TemporaryFile()
+        source.write(payload)
+        source.flush()
+    deadline = time.monotonic() + seconds
+    job = _current_job()
+
+    def stream(index):
+        sock = _netperf_connect(host, port, options['window'])
+        try:
+            sock.sendall(b"TCP\n")
+            view = memoryview(payload)
+            while time.monotonic() < deadline and not (job and job.cancel_event.is_set()):
+                if source is not None:
+                    sent[index] += sock.sendfile(source, 0, length)
+                else:
+                    sock.sendall(view)
+                    sent[index] += length
+            sock.shutdown(socket.SHUT_WR)
+            sock.settimeout(max(30, seconds))
+            reply = b""
+            while len(reply) < _NETPERF_COUNT.size:
+                chunk = sock.recv(_NETPERF_COUNT.size - len(reply))
+                if not chunk:
+                    raise ConnectionError("server closed the connection before reporting")
+                reply += chunk
+            received[index] = _NETPERF_COUNT.unpack(reply)[0]
+        finally:
+            sock.close()
+
+    describe = lambda now, before, dt: f"{_format_bytes(now - before):>10}  {_format_rate((now - before) * 8 / dt):>16}"
+    started = time.monotonic()
+    try:
+        with _IntervalReporter(options['interval'], lambda: sum(sent), describe, options['json']):
+            for _, _, error in _bounded_map(stream, range(streams), workers=streams):
+                if error:
+                    raise error
+    finally:
+        if source is not None:
+            source.close()
+    _check_cancelled()
+    elapsed = time.monotonic() - started
+    return {'test': 'tcp', 'streams': streams, 'length': length, 'zerocopy': options['zerocopy'],
+            'seconds': round(elapsed, 3), 'sent_bytes': sum(sent), 'received_bytes': sum(received),
+            'sender_bps': round(sum(sent) * 8 / elapsed), 'receiver_bps': round(sum(received) * 8 / elapsed)}
+
+def _netperf_udp(host, port, options):
+    """Paced UDP stream at a target bit rate; returns sent/received/loss statistics"""
+    length = max(options['length'], _NETPERF_UDP_HEADER.size)
+    control = _netperf_connect(host, port)
+    try:
+        control.sendall(b"UDP\n")
+        reader = control.makefile('rb')
+        udp_port = int(reader.readline(64))
+        udp = socket.socket(control.family, socket.SOCK_DGRAM)
+        udp.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * 1024 * 1024)
+        udp.connect((control.getpeername()[0], udp_port))
+        packets_per_second = options['rate'] / (length * 8)
+        payload = bytearray(length)
+        counters = {'sent': 0, 'send_errors': 0}
+        describe = lambda now, before, dt: f"{now - before:>10,} datagrams  {_format_rate((now - before) * length * 8 / dt):>16}"
+        started = time.monotonic()
+        deadline = started + options['seconds']
+        with _IntervalReporter(options['interval'], lambda: counters['sent'], describe, options['json']):
+            while True:
+                _check_cancelled()
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                due = int((now - started) * packets_per_second)
+                while counters['sent'] + counters['send_errors'] < due:
+                    _NETPERF_UDP_HEADER.pack_into(payload, 0, counters['sent'] + counters['send_errors'],
+                                                  time.time_ns())
+                    try:
+                        udp.send(payload)
+                        counters['sent'] += 1
+                    except OSError as e:
+                        if e.errno not in (errno.ENOBUFS, errno.EAGAIN, errno.ECONNREFUSED):
+                            raise
+                        counters['send_errors'] += 1
+                time.sleep(0.0005)
+        elapsed = time.monotonic() - started
+        udp.close()
+        time.sleep(0.25)  # let datagrams still in flight arrive
+        control.sendall(b"DONE\n")
+        stats = json.loads(reader.readline())
+    finally:
+        control.close()
+    attempted = counters['sent'] + counters['send_errors']
+    lost = max(attempted - stats['received'], 0)
+    return {'test': 'udp', 'length': length, 'target_bps': options['rate'], 'seconds': round(elapsed, 3),
+            'sent': counters['sent'], 'send_errors': counters['send_errors'], 'received': stats['received'],
+            'lost': lost, 'loss_percent': round(100 * lost / attempted, 3) if attempted else 0.0,
+            'out_of_order': stats['out_of_order'], 'jitter_ms': round(stats['jitter_ms'], 3),
+            'receiver_bps': round(stats['bytes'] * 8 / elapsed)}
+
+def _netperf_rr(host, port, options):
+    """Request/response round trips on one connection; returns rate and latency percentiles"""
+    size = options['rr']
+    sock = _netperf_connect(host, port)
+    latencies = []
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.sendall(f"RR {size}\n".encode('ascii'))
+        request = os.urandom(size)
+        response = memoryview(bytearray(size))
+        describe = lambda now, before, dt: f"{(now - before) / dt:>12,.0f} trans/s"
+        deadline = time.monotonic() + options['seconds']
+        with _IntervalReporter(options['interval'], lambda: len(latencies), describe, options['json']):
+            while time.monotonic() < deadline:
+                _check_cancelled()
+                started = time.perf_counter()
+                sock.sendall(request)
+                got = 0
+                while got < size:
+                    count = sock.recv_into(response[got:])
+                    if not count:
+                        raise ConnectionError("server closed the connection")
+                    got += count
+                latencies.append(time.perf_counter() - started)
+    finally:
+        sock.close()
+    total = sum(latencies)
+    result = {'test': 'rr', 'size': size, 'transactions': len(latencies),
+              'transactions_per_second': round(len(latencies) / total) if total else 0}
+    result['latency_us'] = {key: round(value * 1e6, 1) for key, value in _percentiles(latencies, (50, 90, 99)).items()
+                            if value is not None}
+    return result
+
+def _netperf_summary(result):
+    print(f"{COLOR_CODES['cyan']}{'-' * 60}{COLOR_CODES['default']}")
+    if result['test'] == 'tcp':
+        mode = 'sendfile' if result['zerocopy'] else 'send'
+        print(f"TCP  {result['streams']} stream(s), {_format_bytes(result['length'])} {mode} buffers, {result['seconds']:.1f}s")
+        print(f"  Sender    {_format_bytes(result['sent_bytes']):>12}  {_format_rate(result['sender_bps']):>16}")
+        print(f"  Receiver  {_format_bytes(result['received_bytes']):>12}  {_format_rate(result['receiver_bps']):>16}")
+    elif result['test'] == 'udp':
+        print(f"UDP  {result['length']}-byte datagrams at {_format_rate(result['target_bps'])}, {result['seconds']:.1f}s")
+        print(f"  Sent {result['sent']:,}  received {result['received']:,}  lost {result['lost']:,} "
+              f"({result['loss_percent']}%)  out of order {result['out_of_order']:,}")
+        print(f"  Receiver {_format_rate(result['receiver_bps'])}  jitter {result['jitter_ms']:.3f} ms")
+    else:
+        latency = result['latency_us']
+        print(f"RR   {result['size']}-byte request/response: {result['transactions_per_second']:,} trans/s")
+        print(f"  Latency p50 {latency.get('p50', 0):,.1f}us  p90 {latency.get('p90', 0):,.1f}us  "
+              f"p99 {latency.get('p99', 0):,.1f}us")
+
+def cmd_netperf(args=""):
+    """Measure network throughput, loss and latency against a NETPERF server"""
+    switches, positional = _parse_switches(args)
+    if '?' in switches or positional or ('S' not in switches and not isinstance(switches.get('C'), str)):
+        print("NETPERF /S [/P:port] [/A:address] [/F]")
+        print("NETPERF /C:host [/P:port] [/T:seconds] [/I:interval] [/L:length] [/N:streams] [/W:window] [/Z]")
+        print("NETPERF /C:host /U [/B:bits_per_second] [/L:length] ...")
+        print("NETPERF /C:host /RR[:size] ...")
+        print("  /S   Run a server (as a background job unless /F). It listens on 127.0.0.1;")
+        print("       use /A:0.0.0.0 (or an interface address) to accept other hosts.")
+        print("  /C   Run a test against the server on host.")
+        print("  /N   Parallel TCP streams.   /W  Socket buffer size.   /Z  Zero-copy sendfile.")
+        print("  /U   UDP test at /B bits per second (default 100M, K/M/G = 10^3/10^6/10^9);")
+        print("       reports loss and jitter.")
+        print(f"  /RR  Request/response latency test with size-byte messages (default 1, at most {_NETPERF_RR_MAX:,}).")
+        print("  /JSON Print the final result as JSON instead of per-interval lines.")
+        return
+    if 'S' in switches:
+        _netperf_server(switches, args)
+        return
+    try:
+        udp = 'U' in switches
+        options = {
+            'seconds': float(switches.get('T', 10)),
+            'interval': float(switches.get('I', 1)),
+            'length': _parse_size(switches.get('L', _NETPERF_UDP_LENGTH if udp else _NETPERF_TCP_LENGTH)),
+            'streams': max(1, int(switches.get('N', 1))),
+            'window': _parse_size(switches['W']) if 'W' in switches else None,
+            'zerocopy': 'Z' in switches,
+            'rate': _parse_rate(switches.get('B', '100M')),
+            'rr': int(switches['RR']) if isinstance(switches.get('RR'), str) else 1,
+            'json': 'JSON' in switches,
+        }
+        port = int(switches.get('P', _NETPERF_PORT))
+        if options['seconds'] <= 0 or options['interval'] <= 0 or options['length'] <= 0 \
+                or not 0 < options['rr'] <= _NETPERF_RR_MAX:
+            raise ValueError
+    except ValueError:
+        print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
+        return
+    host = switches['C']
+    test = _netperf_rr if 'RR' in switches else _netperf_udp if udp else _netperf_tcp
+    if not options['json']:
+        print(f"Connecting to {host}:{port} ...")
+    try:
+        result = test(host, port, options)
+    except (OSError, ValueError) as e:
+        print(f"{COLOR_CODES['red']}NETPERF: {e}{COLOR_CODES['default']}")
+        _STATUS.code = 1
+        return
+    result.update(host=host, port=port)
+    if options['json']:
+        print(json.dumps(result, indent=2))
+    else:
+        _netperf_summary(result)
+
+# ========== SCHEDULER ==========
+
+# Scheduled tasks live in one heap ordered by next fire time, serviced by a
+# single timer thread that sleeps until the earliest entry is due, so hundreds
+# of tasks cost one idle thread. Due tasks run on a small worker pool through
+# capture_command, in-process (no interpreter start-up per run). Rescheduling
+# or deleting a task bumps its generation; stale heap entries are skipped.
+_SCHEDULER_WORKERS = 4
+_TASK_OUTPUT_LINES = 20
+_TASK_POLL = 2.0   # seconds between checks for other processes' changes
+_OVERLAP_POLICIES = ('skip', 'queue', 'parallel')
+_CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+_INTERVAL = re.compile(r'(\d+(?:\.\d+)?)\s*(s|sec|m|min|h|hr|d|day)s?', re.IGNORECASE)
+
+def _parse_cron_field(field, low, high):
+    values = set()
+    for part in field.split(','):
+        part, slash, step = part.partition('/')
+        step = int(step) if slash else 1
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(v) for v in part.split('-', 1))
+        else:
+            start = int(part)
+            end = high if slash else start
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"cron field out of range: {field}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+class _CronSchedule:
+    """Five-field cron expression (minute hour day-of-month month day-of-week)"""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("a cron expression needs 5 fields: minute hour day month weekday")
+        self.expression = ' '.join(fields)
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_cron_field(field, low, high) for field, (low, high) in zip(fields, _CRON_FIELDS))
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        self.any_day, self.any_weekday = fields[2] == '*', fields[4] == '*'
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok  # cron ORs the two day fields when both are restricted
+
+    def next_after(self, timestamp):
+        moment = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=5 * 366)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError(f"cron expression never matches: {self.expression}")
+
+def _next_clock_time(text, after=None):
+    """Timestamp of the next HH:MM[:SS] local time after `after`"""
+    parts = [int(p) for p in text.split(':')]
+    if not 2 <= len(parts) <= 3 or not (0 <= parts[0] < 24 and 0 <= parts[1] < 60):
+        raise ValueError(f"invalid time: {text}")
+    now = datetime.fromtimestamp(after or time.time())
+    moment = now.replace(hour=parts[0], minute=parts[1], second=parts[2] if len(parts) == 3 else 0, microsecond=0)
+    if moment <= now:
+        moment += timedelta(days=1)
+    return moment.timestamp()
+
+def _parse_schedule(switches):
+    """Build a schedule dict from /SC, /MO and /ST"""
+    kind = str(switches.get('SC', '')).strip()
+    modifier = int(switches.get('MO', 1))
+    start = switches.get('ST') if isinstance(switches.get('ST'), str) else None
+    units = {'MINUTE': 60, 'HOURLY': 3600, 'DAILY': 86400, 'WEEKLY': 7 * 86400}
+    if kind.upper() in units:
+        return {'type': 'every', 'seconds': units[kind.upper()] * modifier,
+                'anchor': _next_clock_time(start) if start else time.time()}
+    if kind.upper() == 'ONCE':
+        return {'type': 'once', 'at': _next_clock_time(start or datetime.now().strftime('%H:%M'))}
+    match = _INTERVAL.fullmatch(kind)
+    if match:
+        scale = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[match.group(2)[0].lower()]
+        return {'type': 'every', 'seconds': float(match.group(1)) * scale, 'anchor': time.time()}
+    _CronSchedule(kind)  # validate
+    return {'type': 'cron', 'expr': kind}
+
+def _describe_schedule(schedule):
+    if schedule['type'] == 'every':
+        seconds = schedule['seconds']
+        for unit, scale in (('d', 86400), ('h', 3600), ('m', 60)):
+            if seconds >= scale and seconds % scale == 0:
+                return f"every {seconds // scale:g}{unit}"
+        return f"every {seconds:g}s"
+    if schedule['type'] == 'once':
+        return f"once at {datetime.fromtimestamp(schedule['at']):%Y-%m-%d %H:%M:%S}"
+    return f"cron {schedule['expr']}"
+
+def _flock(f, blocking=True):
+    """Take an exclusive advisory lock on an open file. Returns False if another process holds it.
+
+    Without fcntl (Windows) this always succeeds, so every process runs tasks.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+    except BlockingIOError:
+        return False
+    return True
+
+class ScheduledTask:
+    """A persisted command line plus its schedule, the directory and environment it runs in, and run statistics"""
+
+    def __init__(self, name, command, schedule, jitter=0.0, overlap='skip', enabled=True,
+                 cwd=None, env=None, code_page=None):
+        self.name = name
+        self.command = command
+        self.schedule = schedule
+        self.jitter = jitter
+        self.overlap = overlap
+        self.enabled = enabled
+        self.cwd = cwd
+        self.env = env or {}
+        self.code_page = code_page
+        self.generation = 0
+        self.next_run = None
+        self.running = 0
+        self.pending = False
+        self.runs = self.failures = self.skipped = 0
+        self.last_run = self.last_status = self.last_duration = None
+        self.last_output = collections.deque(maxlen=_TASK_OUTPUT_LINES)
+        self._cron = _CronSchedule(schedule['expr']) if schedule['type'] == 'cron' else None
+
+    @classmethod
+    def for_session(cls, name, command, schedule, jitter=0.0, overlap='skip'):
+        """A task that runs in the calling session's directory, environment and code page.
+
+        Only the variables that differ from the process environment are
+        stored (None for ones the session unset), keeping tasks.json small.
+        """
+        session_env = _session().env
+        env = {key: value for key, value in session_env.items() if os.environ.get(key) != value}
+        env.update((key, None) for key in os.environ if key not in session_env)
+        return cls(name, command, schedule, jitter, overlap, cwd=os.getcwd(), env=env,
+                   code_page=_session().code_page)
+
+    def session(self):
+        """A fresh Session with the task's saved state"""
+        env = dict(os.environ)
+        for key, value in self.env.items():
+            if value is None:
+                env.pop(key, None)
+            else:
+                env[key] = value
+        return Session(self.cwd or os.path.expanduser('~'), env, self.code_page)
+
+    def to_dict(self):
+        return {'name': self.name, 'command': self.command, 'schedule': self.schedule,
+                'jitter': self.jitter, 'overlap': self.overlap, 'enabled': self.enabled,
+                'cwd': self.cwd, 'env': self.env, 'code_page': self.code_page}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data['command'], data['schedule'], data.get('jitter', 0.0),
+                   data.get('overlap', 'skip'), data.get('enabled', True),
+                   data.get('cwd'), data.get('env'), data.get('code_page'))
+
+    def status_dict(self):
+        return {'runs': self.runs, 'failures': self.failures, 'skipped': self.skipped,
+                'last_run': self.last_run, 'last_status': self.last_status,
+                'last_duration': self.last_duration, 'last_output': list(self.last_output)}
+
+    def next_after(self, now):
+        """Next fire time after now (without jitter), or None when a one-shot task is spent"""
+        schedule = self.schedule
+        if schedule['type'] == 'once':
+            return schedule['at'] if schedule['at'] > now - 1 and not self.runs else None
+        if schedule['type'] == 'every':
+            # Stay on the anchor's grid so runs don't drift, and skip missed slots instead of bursting
+            anchor, period = schedule['anchor'], schedule['seconds']
+            if anchor > now:
+                return anchor
+            return anchor + (math.floor((now - anchor) / period) + 1) * period
+        return self._cron.next_after(now)
+
+class _Scheduler:
+    """Timer thread over a heap of due times, dispatching to a bounded worker pool.
+
+    Every TerminalX process shares tasks.json: changes are made under an
+    exclusive lock on tasks.lock by re-reading the file, applying the one
+    change and writing it back, and each process picks up the others'
+    changes when the file's stamp moves. Only the process holding
+    scheduler.lock runs tasks; the others take over when it exits.
+    Run statistics are merged into tasks.status.json the same way.
+    """
+
+    def __init__(self):
+        self.tasks = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._pool = None
+        self._loaded = False
+        self._stamp = None
+        self._status_stamp = None
+        self._owner = None
+
+    def _path(self, name='tasks.json'):
+        return _data_path(name)
+
+    @property
+    def owner(self):
+        return self._owner is not None
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        with open(self._path('tasks.lock'), 'a') as f:
+            _flock(f)
+            yield
+
+    def _try_own(self):
+        """Become the process that runs tasks if no other process is"""
+        if self._owner is not None:
+            return True
+        f = open(self._path('scheduler.lock'), 'a+')
+        if not _flock(f, blocking=False):
+            f.close()
+            return False
+        f.truncate(0)
+        f.write(f"{os.getpid()}\n")
+        f.flush()
+        self._owner = f
+        return True
+
+    @staticmethod
+    def _file_stamp(path):
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size, st.st_ino
+        except OSError:
+            return None
+
+    def _read(self, name='tasks.json', key='tasks'):
+        try:
+            with open(self._path(name), encoding='utf-8') as f:
+                return json.load(f).get(key, {} if key == 'status' else [])
+        except FileNotFoundError:
+            return {} if key == 'status' else []
+        except (OSError, ValueError) as e:
+            print(f"{COLOR_CODES['red']}SCHTASKS: cannot read {self._path(name)}: {e}{COLOR_CODES['default']}")
+            return {} if key == 'status' else []
+
+    def _write(self, name, data):
+        path = self._path(name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def load(self):
+        """Load persisted tasks once and start the timer thread"""
+        with self._condition:
+            if self._loaded:
+                return
+            self._loaded = True
+        self._try_own()
+        self.sync()
+        with self._condition:
+            self._start()
+
+    def sync(self):
+        """Pick up task changes other processes made, and their run statistics unless we run the tasks"""
+        stamp = self._file_stamp(self._path())
+        if stamp != self._stamp:
+            self._stamp = stamp
+            self._reconcile(self._read())
+        stamp = self._file_stamp(self._path('tasks.status.json'))
+        if not self.owner and stamp != self._status_stamp:
+            self._status_stamp = stamp
+            status = self._read('tasks.status.json', 'status')
+            with self._condition:
+                for key, task in self.tasks.items():
+                    values = status.get(key)
+                    if values:
+                        output = values.pop('last_output', [])
+                        task.__dict__.update(values)
+                        task.last_output.clear()
+                        task.last_output.extend(output)
+
+    def _reconcile(self, definitions):
+        """Make the in-memory tasks match definitions, keeping unchanged tasks and their statistics"""
+        with self._condition:
+            seen = set()
+            for data in definitions:
+                try:
+                    task = ScheduledTask.from_dict(data)
+                except (KeyError, ValueError):
+                    continue
+                key = task.name.lower()
+                seen.add(key)
+                current = self.tasks.get(key)
+                if current is not None and current.to_dict() == task.to_dict():
+                    continue
+                if current is not None:
+                    current.generation += 1
+                self.tasks[key] = task
+                self._schedule(task)
+            for key in set(self.tasks) - seen:
+                self.tasks.pop(key).generation += 1
+
+    def _update(self, change):
+        """Apply change to the on-disk {name: definition} map under the file lock. Returns its result."""
+        with self._file_lock():
+            definitions = {data['name'].lower(): data for data in self._read() if 'name' in data}
+            result = change(definitions)
+            self._write('tasks.json', {'tasks': list(definitions.values())})
+        self._stamp = None
+        self.sync()
+        return result
+
+    def _record(self, task):
+        """Merge one task's run statistics into tasks.status.json"""
+        with self._condition:
+            values = task.status_dict()
+        with self._file_lock():
+            status = {key: value for key, value in self._read('tasks.status.json', 'status').items()
+                      if key in self.tasks}
+            status[task.name.lower()] = values
+            self._write('tasks.status.json', {'status': status})
+
+    def _start(self):
+        if self._thread is None:
+            self._pool = ThreadPoolExecutor(max_workers=_SCHEDULER_WORKERS, thread_name_prefix='terminalx-task')
+            self._thread = threading.Thread(target=self._loop, name='terminalx-scheduler', daemon=True)
+            self._thread.start()
+
+    def _schedule(self, task, now=None):
+        """(Re)compute a task's next run and push it; the caller holds the condition"""
+        task.generation += 1
+        task.next_run = None
+        if not task.enabled:
+            return
+        due = task.next_after(now or time.time())
+        if due is None:
+            return
+        task.next_run = due + (random.uniform(0, task.jitter) if task.jitter else 0)
+        heapq.heappush(self._heap, (task.next_run, next(self._sequence), task.generation, task))
+        self._condition.notify()
+
+    def add(self, task, replace=False):
+        key = task.name.lower()
+
+        def change(definitions):
+            if key in definitions and not replace:
+                return False
+            definitions[key] = task.to_dict()
+            return True
+
+        if not self._update(change):
+            return False
+        with self._condition:
+            if self.tasks.get(key) is not task:
+                old = self.tasks.get(key)
+                if old is not None:
+                    old.generation += 1
+                self.tasks[key] = task
+                self._schedule(task)
+        return True
+
+    def remove(self, name):
+        task = self.tasks.get(name.lower())
+        self._update(lambda definitions: definitions.pop(name.lower(), None))
+        return task
+
+    def set_enabled(self, task, enabled):
+        def change(definitions):
+            if task.name.lower() in definitions:
+                definitions[task.name.lower()]['enabled'] = enabled
+        self._update(change)
+
+    def run_now(self, task):
+        with self._condition:
+            self._start()
+            self._dispatch(task)
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                timeout = _TASK_POLL
+                if self.owner and self._heap:
+                    timeout = min(timeout, self._heap[0][0] - time.time())
+                if timeout > 0:
+                    self._condition.wait(timeout)
+            try:
+                self._try_own()
+                self.sync()
+            except OSError:
+                pass
+            with self._condition:
+                while self.owner and self._heap and self._heap[0][0] <= time.time():
+                    due, _, generation, task = heapq.heappop(self._heap)
+                    if generation != task.generation or self.tasks.get(task.name.lower()) is not task:
+                        continue  # rescheduled or deleted since this entry was pushed
+                    self._dispatch(task)
+                    if task.schedule['type'] == 'once':
+                        task.generation += 1
+                        task.next_run = None
+                    else:
+                        self._schedule(task, now=max(time.time(), due))
+
+    def _dispatch(self, task):
+        """Apply the overlap policy and submit a run; the caller holds the condition"""
+        if task.running and task.overlap == 'skip':
+            task.skipped += 1
+            return
+        if task.running and task.overlap == 'queue':
+            task.pending = True
+            return
+        task.running += 1
+        self._pool.submit(self._execute, task)
+
+    def _execute(self, task):
+        started = time.time()
+        try:
+            if task.cwd and not os.path.isdir(task.cwd):
+                raise FileNotFoundError(f"The task's directory {task.cwd} no longer exists.")
+            with activate_session(task.session()):
+                output, status = capture_command(task.command)
+        except Exception as e:
+            output, status = f"Error: {e}\n", 1
+        duration = time.time() - started
+        with self._condition:
+            task.running -= 1
+            task.runs += 1
+            task.failures += bool(status)
+            task.last_run, task.last_status, task.last_duration = started, status, duration
+            task.last_output.clear()
+            task.last_output.extend(output.splitlines()[-_TASK_OUTPUT_LINES:])
+            if task.pending:
+                task.pending = False
+                task.running += 1
+                self._pool.submit(self._execute, task)
+            spent = task.schedule['type'] == 'once' and not task.running
+        try:
+            self._record(task)
+            with open(_data_path('tasks.log'), 'a', encoding='utf-8') as log:
+                log.write(f"{datetime.fromtimestamp(started):%Y-%m-%d %H:%M:%S}\t{task.name}\t"
+                          f"{status}\t{duration:.3f}s\n")
+        except OSError:
+            pass
+        if spent and self.tasks.get(task.name.lower()) is task:
+            self.remove(task.name)
+
+_SCHEDULER = _Scheduler()
+
+def start_scheduler():
+    """Load persisted scheduled tasks (called at start-up by the terminal and the server)"""
+    _SCHEDULER.load()
+    _SCHEDULER.sync()
+
+def _task_row(task):
+    next_run = f"{datetime.fromtimestamp(task.next_run):%Y-%m-%d %H:%M:%S}" if task.next_run else (
+        'Disabled' if not task.enabled else 'N/A')
+    if task.running:
+        status = 'Running'
+    elif task.last_status is None:
+        status = 'Ready'
+    else:
+        status = 'OK' if task.last_status == 0 else f"Failed ({task.last_status})"
+    return f"{task.name:<20} {next_run:<20} {status:<12} {_describe_schedule(task.schedule)}"
+
+def cmd_schtasks(args=""):
+    """Create, list, run and delete scheduled TerminalX commands"""
+    switches, positional = _parse_switches(args)
+    start_scheduler()
+    name = switches.get('TN') if isinstance(switches.get('TN'), str) else None
+    if '?' in switches:
+        print("SCHTASKS /CREATE /TN:name /SC:schedule /TR:command [/MO:n] [/ST:HH:MM] [/J:seconds] [/O:policy] [/F]")
+        print("SCHTASKS [/QUERY] [/TN:name] [/V]")
+        print("SCHTASKS /RUN /TN:name | /DELETE /TN:name | /CHANGE /TN:name /ENABLE|/DISABLE")
+        print()
+        print("  /SC  MINUTE, HOURLY, DAILY, WEEKLY (every /MO units, from /ST), ONCE (at /ST),")
+        print("       an interval such as 30s or 5m, or a cron expression such as \"*/5 * * * *\".")
+        print("  /J   Random delay of up to this many seconds added to each run.")
+        print("  /O   Overlap policy when a run is still going: SKIP (default), QUEUE or PARALLEL.")
+        print("  /F   Replace an existing task with the same name.")
+        print()
+        print("Tasks run in the directory, environment and code page they were created from.")
+        print("All TerminalX processes share the task list; one of them at a time runs the tasks.")
+        return
+
+    if 'CREATE' in switches:
+        command = switches.get('TR') if isinstance(switches.get('TR'), str) else None
+        overlap = str(switches.get('O', 'skip')).lower()
+        if not name or not command or 'SC' not in switches or overlap not in _OVERLAP_POLICIES:
+            print(f"{COLOR_CODES['red']}ERROR: /CREATE needs /TN, /SC and /TR. Type \"SCHTASKS /?\" for usage."
+                  f"{COLOR_CODES['default']}")
+            return
+        try:
+            task = ScheduledTask.for_session(name, command, _parse_schedule(switches), float(switches.get('J', 0)),
+                                             overlap)
+        except ValueError as e:
+            print(f"{COLOR_CODES['red']}ERROR: {e}{COLOR_CODES['default']}")
+            return
+        if not _SCHEDULER.add(task, replace='F' in switches):
+            print(f"{COLOR_CODES['red']}ERROR: A task named \"{name}\" already exists (use /F to replace it)."
+                  f"{COLOR_CODES['default']}")
+            return
+        print(f"{COLOR_CODES['green']}SUCCESS: The scheduled task \"{name}\" has successfully been created."
+              f"{COLOR_CODES['default']}")
+        return
+
+    task = _SCHEDULER.tasks.get(name.lower()) if name else None
+    if any(key in switches for key in ('RUN', 'DELETE', 'CHANGE')):
+        if task is None:
+            print(f"{COLOR_CODES['red']}ERROR: The system cannot find the task specified.{COLOR_CODES['default']}")
+            return
+        if 'RUN' in switches:
+            _SCHEDULER.run_now(task)
+            print(f"SUCCESS: Attempted to run the scheduled task \"{task.name}\".")
+        elif 'DELETE' in switches:
+            _SCHEDULER.remove(task.name)
+            print(f"SUCCESS: The scheduled task \"{task.name}\" was successfully deleted.")
+        elif 'ENABLE' in switches or 'DISABLE' in switches:
+            _SCHEDULER.set_enabled(task, 'ENABLE' in switches)
+            print(f"SUCCESS: The parameters of scheduled task \"{task.name}\" have been changed.")
+        else:
+            print(f"{COLOR_CODES['red']}ERROR: /CHANGE needs /ENABLE or /DISABLE.{COLOR_CODES['default']}")
+        return
+
+    tasks = [task] if name else sorted(_SCHEDULER.tasks.values(), key=lambda t: (t.next_run or float('inf'), t.name))
+    if name and task is None:
+        print(f"{COLOR_CODES['red']}ERROR: The system cannot find the task specified.{COLOR_CODES['default']}")
+        return
+    if not tasks:
+        print("INFO: There are no scheduled tasks.")
+        return
+    print(f"{COLOR_CODES['cyan']}{'TaskName':<20} {'Next Run Time':<20} {'Status':<12} Schedule{COLOR_CODES['default']}")
+    print(f"{'=' * 20} {'=' * 20} {'=' * 12} {'=' * 20}")
+    for task in tasks:
+        print(_task_row(task))
+        if 'V' in switches:
+            last = f"{datetime.fromtimestamp(task.last_run):%Y-%m-%d %H:%M:%S} ({task.last_duration:.2f}s)" \
+                if task.last_run else 'never'
+            print(f"    Command: {task.command}")
+            print(f"    Start in: {task.cwd or '~'}")
+            print(f"    Runs: {task.runs:,}  Failures: {task.failures:,}  Skipped: {task.skipped:,}  "
+                  f"Last run: {last}  Overlap: {task.overlap}  Jitter: {task.jitter:g}s")
+            for line in task.last_output:
+                print(f"    | {line}")
+
+def cmd_at(args=""):
+    """Run a command once at a given time (equivalent to Windows AT command)"""
+    switches, positional = _parse_switches(args)
+    if not positional:
+        cmd_schtasks("/QUERY")
+        return
+    if '?' in switches or len(positional) < 2 or not re.fullmatch(r'\d{1,2}:\d{2}(?::\d{2})?', positional[0]):
+        print("AT [HH:MM[:SS] command]")
+        print()
+        print("  Runs a TerminalX command once at the given time. Without arguments,")
+        print("  lists scheduled tasks (see SCHTASKS).")
+        return
+    start_scheduler()
+    number = 1
+    while f"at{number}" in _SCHEDULER.tasks:
+        number += 1
+    try:
+        schedule = {'type': 'once', 'at': _next_clock_time(positional[0])}
+    except ValueError as e:
+        print(f"{COLOR_CODES['red']}{e}{COLOR_CODES['default']}")
+        return
+    _SCHEDULER.add(ScheduledTask.for_session(f"AT{number}", ' '.join(positional[1:]), schedule))
+    print(f"Added a new job with job ID = AT{number} ({_describe_schedule(schedule)})")
+
+# ========== SYSTEM UTILITIES ==========
+
+def cmd_tree(args=""):
+    """Display directory tree structure (equivalent to Windows TREE command)"""
+    path = args.strip() if args else os.getcwd()
+
+    if not os.path.exists(path):
+        print("Invalid path - No such file or directory.")
+        return
+
+    print(f"Folder PATH listing for volume.")
+    print(f"Volume serial number is XXXX-XXXX.")
+    print(path)
+
+    def print_tree(directory, prefix=""):
+        _check_cancelled()
+        try:
+            items = sorted(os.listdir(directory))
+            dirs = [item for item in items if os.path.isdir(os.path.join(directory, item))]
+            files = [item for item in items if os.path.isfile(os.path.join(directory, item))]
+
+            # Print directories first
+            for i, dirname in enumerate(dirs):
+                is_last_dir = (i == len(dirs) - 1) and len(files) == 0
+                current_prefix = "└───" if is_last_dir else "├───"
+                print(f"{prefix}{current_prefix}{dirname}")
+
+                next_prefix = prefix + ("    " if is_last_dir else "│   ")
+                print_tree(os.path.join(directory, dirname), next_prefix)
+
+            # Then print files
+            for i, filename in enumerate(files):
+                is_last = i == len(files) - 1
+                current_prefix = "└───" if is_last else "├───"
+                print(f"{prefix}{current_prefix}{filename}")
+
+        except PermissionError:
+            print(f"{prefix}[Access Denied]")
+
+    print_tree(path)
+
+_ATTRIB_XATTR = 'user.terminalx.attrib'
+
+def _attrib_entries(root, pattern, recursive, directories):
+    """Stream (DirEntry, depth) pairs under root whose name matches pattern (dotfiles included)"""
+    stack = [(root, 0)]
+    while stack:
+        directory, depth = stack.pop()
+        _check_cancelled()
+        try:
+            # Read the whole listing first so +H/-H renames can't be seen twice
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            continue
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir and recursive:
+                stack.append((entry.path, depth + 1))
+            if (directories or not is_dir) and fnmatch.fnmatch(entry.name, pattern):
+                yield entry, depth
+
+def _stored_attrib(path):
+    """S/A flags kept in the extended attribute (empty where xattrs are unavailable)"""
+    if not hasattr(os, 'getxattr'):
+        return ''
+    try:
+        return os.getxattr(path, _ATTRIB_XATTR, follow_symlinks=False).decode('ascii', 'ignore')
+    except OSError:
+        return ''
+
+def _attrib_flags(name, mode, stored):
+    return ''.join(flag if present else ' ' for flag, present in (
+        ('A', 'A' in stored), ('S', 'S' in stored), ('H', name.startswith('.')),
+        ('R', not mode & stat.S_IWUSR)))
+
+def _format_attrib(flags, path):
+    return f"{flags[0]}    {flags[1:]}        {path}"
+
+def _apply_attrib(entry, changes, defer_directories):
+    """Apply +/- changes to one entry. Returns (flags, path, pending rename) or None if unchanged.
+
+    Symbolic links are changed themselves, never their targets, as on Windows.
+    """
+    path, name = entry.path, entry.name
+    is_link = entry.is_symlink()
+    st = entry.stat(follow_symlinks=False)
+    mode = stat.S_IMODE(st.st_mode)
+    changed = False
+    if 'R' in changes:
+        new_mode = mode & ~0o222 if changes['R'] else mode | stat.S_IWUSR
+        if new_mode != mode:
+            if not is_link:
+                os.chmod(path, new_mode)
+            elif os.chmod in os.supports_follow_symlinks:
+                os.chmod(path, new_mode, follow_symlinks=False)
+            else:
+                raise OSError(errno.ENOTSUP, "symbolic links have no read-only attribute here")
+            mode, changed = new_mode, True
+    stored = _stored_attrib(path) if 'S' in changes or 'A' in changes else None
+    wanted = None if stored is None else ''.join(flag for flag in 'SA' if changes.get(flag, flag in stored))
+    if stored is not None and set(wanted) != set(stored):
+        if not hasattr(os, 'setxattr'):
+            raise OSError(errno.ENOTSUP, "extended attributes are not supported on this platform")
+        if wanted:
+            os.setxattr(path, _ATTRIB_XATTR, wanted.encode('ascii'), follow_symlinks=False)
+        else:
+            with contextlib.suppress(OSError):
+                os.removexattr(path, _ATTRIB_XATTR, follow_symlinks=False)
+        stored, changed = wanted, True
+    rename = None
+    if 'H' in changes and changes['H'] != name.startswith('.'):
+        new_name = '.' + name if changes['H'] else name.lstrip('.')
+        if not new_name:
+            raise OSError(errno.EINVAL, "name would be empty")
+        target = os.path.join(os.path.dirname(path), new_name)
+        if os.path.lexists(target):
+            raise FileExistsError(errno.EEXIST, f"{new_name} already exists")
+        rename = (path, target)
+        if not (defer_directories and entry.is_dir(follow_symlinks=False)):
+            os.rename(path, target)
+            path, rename = target, None
+        name, changed = new_name, True
+    if not changed:
+        return None
+    if stored is None:
+        stored = _stored_attrib(rename[0] if rename else path)
+    return _attrib_flags(name, mode, stored), path, rename
+
+def cmd_attrib(args=""):
+    """Display or change file attributes (equivalent to Windows ATTRIB command)"""
+    switches, positional = _parse_switches(args)
+    changes = {}
+    targets = []
+    for token in positional:
+        if re.fullmatch(r'[+-][RHSA]', token, re.IGNORECASE):
+            changes[token[1].upper()] = token[0] == '+'
+        else:
+            targets.append(token)
+    if '?' in switches:
+        print("ATTRIB [+R | -R] [+A | -A] [+S | -S] [+H | -H] [path ...] [/S [/D]]")
+        print()
+        print("  +R/-R  Read-only: clears or restores write permission (chmod).")
+        print("  +H/-H  Hidden: renames to or from a dotfile.")
+        print("  +A/-A  Archive and +S/-S System: stored in the user.terminalx.attrib xattr.")
+        print("  /S     Process matching files in all subdirectories.")
+        print("  /D     Process directories as well.")
+        return
+
+    recursive, directories = 'S' in switches, 'D' in switches
+    roots = []
+    for target in targets or ['*']:
+        path = os.path.join(os.getcwd(), os.path.expanduser(target))
+        if not glob.has_magic(path) and os.path.isdir(path) and recursive:
+            roots.append((path, '*'))
+        elif not glob.has_magic(path) and os.path.lexists(path) and not recursive:
+            roots.append((os.path.dirname(path) or '.', os.path.basename(path)))
+            directories = directories or os.path.isdir(path)
+        else:
+            roots.append((os.path.dirname(path) or '.', os.path.basename(path) or '*'))
+
+    def entries():
+        for root, pattern in roots:
+            yield from _attrib_entries(root, pattern, recursive, directories)
+
+    def show(item):
+        entry, _ = item
+        st = entry.stat(follow_symlinks=False)
+        return _attrib_flags(entry.name, st.st_mode, _stored_attrib(entry.path)), entry.path
+
+    def change(item):
+        return _apply_attrib(item[0], changes, recursive)
+
+    started = time.monotonic()
+    matched = changed = failed = 0
+    deferred = []
+    # stat, chmod and xattr calls are independent per entry, so spread them across threads
+    for (entry, depth), result, error in _bounded_map(change if changes else show, entries()):
+        matched += 1
+        if error is not None:
+            failed += 1
+            print(f"{COLOR_CODES['red']}{entry.path}: {getattr(error, 'strerror', None) or error}"
+                  f"{COLOR_CODES['default']}")
+        elif changes and result is not None:
+            flags, path, rename = result
+            if rename:
+                deferred.append((depth, rename, flags))
+            else:
+                changed += 1
+                print(_format_attrib(flags, path))
+        elif not changes:
+            print(_format_attrib(*result))
+
+    # Directories are renamed (for +H/-H) after the walk, deepest first, so parent paths stay valid
+    for depth, (source, target), flags in sorted(deferred, key=lambda item: -item[0]):
+        try:
+            os.rename(source, target)
+            changed += 1
+            print(_format_attrib(flags, target))
+        except OSError as e:
+            failed += 1
+            print(f"{COLOR_CODES['red']}{source}: {e.strerror}{COLOR_CODES['default']}")
+
+    if not matched:
+        print(f"{COLOR_CODES['red']}File not found - {' '.join(targets) or '*'}{COLOR_CODES['default']}")
+        _STATUS.code = 1
+    elif failed:
+        _STATUS.code = 1
+    if changes and matched:
+        print(f"{changed:,} of {matched:,} entries changed in {time.monotonic() - started:.2f}s"
+              + (f", {failed:,} failed" if failed else ""))
+
+def cmd_diskpart(args=""):
+    """Disk partitioning utility simulation"""
+    print(f"{COLOR_CODES['yellow']}Microsoft DiskPart version X.1{COLOR_CODES['default']}")
+    print()
+    print("Copyright (C) Microsoft Corporation.")
+    print("On computer: " + HOST_NAME)
+    print()
+    print(f"{COLOR_CODES['red']}WARNING: DiskPart functionality is limited in TerminalX.{COLOR_CODES['default']}")
+    print("Type 'help' for DiskPart commands or 'exit' to return to TerminalX.")
+
+    while True:
+        command = input("DISKPART> ").strip().lower()
+
+        if command == 'exit':
             break
         elif command == 'help':
             print("Available commands: list disk, list volume, exit")
@@ -785,6 +4468,704 @@ def cmd_diskpart():
         else:
             print(f"Unknown command: {command}")
 
+# ========== FILE NAME INDEX ==========
+
+# LOCATE keeps its index in ~/.terminalx:
+#   locate.db     newline separated paths, grouped by directory in sorted
+#                 order; queries memory-map it and never load it whole
+#   locate.blocks uint64 start offsets of the db's line-aligned blocks
+#   locate.tri    trigram segment (the INDEX format) mapping case-folded
+#                 trigrams to the blocks containing them, so a query only
+#                 scans blocks that can match
+#   locate.state  marshal'd {'roots': [...], 'dirs': {dir: (mtime_ns, offset, length)}}
+#                 so a refresh only rescans directories whose mtime changed and
+#                 copies the others' lines straight from the previous db
+_LOCATE_PRUNE = {'/proc', '/sys', '/dev', '/run'}
+_LOCATE_BLOCK = 16384
+
+def _scan_directory(path, cached_mtime):
+    """Return (mtime_ns, names, subdirs) for one directory; names is None if unchanged"""
+    mtime = os.lstat(path).st_mtime_ns
+    if mtime == cached_mtime:
+        return mtime, None, None
+    files = []
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                (subdirs if entry.is_dir(follow_symlinks=False) else files).append(entry.name)
+            except OSError:
+                files.append(entry.name)
+    return mtime, sorted(files + subdirs), subdirs
+
+def _crawl(roots, previous_dirs, workers=None):
+    """Walk roots in parallel, one directory per task. Returns ({dir: (mtime_ns, names)}, rescanned)."""
+    children = collections.defaultdict(list)
+    for directory in previous_dirs:
+        children[os.path.dirname(directory)].append(directory)
+    dirs = {}
+    rescanned = 0
+    progress = _Progress("Indexing")
+
+    def cached_mtime(path):
+        cached = previous_dirs.get(path)
+        return cached[0] if cached else None
+
+    with ThreadPoolExecutor(max_workers=workers or _default_workers()) as pool:
+        pending = {}
+        for root in roots:
+            pending[pool.submit(_scan_directory, root, cached_mtime(root))] = root
+        while pending:
+            _check_cancelled()
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    mtime, names, subdirs = future.result()
+                except OSError:
+                    continue
+                dirs[path] = (mtime, names)
+                if names is None:
+                    # Unchanged: the subdirectories are the ones recorded last time
+                    subpaths = children.get(path, ())
+                else:
+                    rescanned += 1
+                    subpaths = [os.path.join(path, name) for name in subdirs]
+                for child in subpaths:
+                    if child not in _LOCATE_PRUNE:
+                        pending[pool.submit(_scan_directory, child, cached_mtime(child))] = child
+            progress.update(len(dirs), 0)
+    progress.done()
+    return dirs, rescanned
+
+def _load_locate_state():
+    import marshal
+    try:
+        with open(_data_path('locate.state'), 'rb') as f:
+            state = marshal.load(f)
+        if all(len(value) == 3 and isinstance(value[1], int) for value in state['dirs'].values()):
+            return state
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        pass
+    return {'roots': [], 'dirs': {}}
+
+def _block_trigrams(data):
+    """Case-folded trigrams of a block as uint32 values"""
+    data = data.lower()
+    return {(a << 16) | (b << 8) | c for a, b, c in set(zip(data, data[1:], data[2:]))}
+
+def _write_locate_blocks(db_path):
+    """Cut the db into line-aligned blocks and write their offsets and trigram segment"""
+    import array
+    import mmap
+    starts = array.array('Q')
+    postings = collections.defaultdict(lambda: array.array('I'))
+    size = os.path.getsize(db_path)
+    if size:
+        with open(db_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = 0
+            while start < size:
+                _check_cancelled()
+                end = data.find(b'\n', min(start + _LOCATE_BLOCK, size - 1)) + 1 or size
+                block_id = len(starts)
+                starts.append(start)
+                for trigram in _block_trigrams(data[start:end]):
+                    postings[trigram].append(block_id)
+                start = end
+    starts.append(size)
+    with open(_data_path('locate.blocks.tmp'), 'wb') as f:
+        starts.tofile(f)
+    _write_segment(_data_path('locate.tri'), postings)
+    os.replace(_data_path('locate.blocks.tmp'), _data_path('locate.blocks'))
+
+def _update_locate_index(roots):
+    """Refresh the filename index. Returns (paths, directories, rescanned)."""
+    import marshal
+    import mmap
+    state = _load_locate_state()
+    roots = [os.path.abspath(r) for r in roots] or state['roots'] or [os.path.expanduser('~')]
+    dirs, rescanned = _crawl(roots, state['dirs'])
+
+    db_path = _data_path('locate.db')
+    old = None
+    if any(names is None for _, names in dirs.values()):
+        with open(db_path, 'rb') as f:
+            old = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+    count = 0
+    offset = 0
+    recorded = {}
+    try:
+        with open(db_path + '.tmp', 'wb', buffering=1024 * 1024) as db:
+            for directory in sorted(dirs):
+                mtime, names = dirs[directory]
+                if names is None:
+                    _, start, length = state['dirs'][directory]
+                    lines = old[start:start + length]
+                else:
+                    encoded = os.fsencode(directory)
+                    lines = b"".join(os.path.join(encoded, os.fsencode(name)) + b'\n' for name in names
+                                     if '\n' not in name)
+                db.write(lines)
+                count += lines.count(b'\n')
+                recorded[directory] = (mtime, offset, len(lines))
+                offset += len(lines)
+    finally:
+        if old is not None and not isinstance(old, bytes):
+            old.close()
+    os.replace(db_path + '.tmp', db_path)
+    _write_locate_blocks(db_path)
+    with open(_data_path('locate.state.tmp'), 'wb') as f:
+        marshal.dump({'roots': roots, 'dirs': recorded}, f)
+    os.replace(_data_path('locate.state.tmp'), _data_path('locate.state'))
+    return count, len(dirs), rescanned
+
+def _glob_to_regex(pattern):
+    """Translate a wildcard into a bytes regex matching whole index lines.
+
+    Patterns without a path separator are matched against the file name only;
+    relative patterns with one may begin at any path component.
+    """
+    whole_path = '/' in pattern or os.sep in pattern
+    star = '[^\n]*' if whole_path else '[^\n/]*'
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '*':
+            out.append(star)
+        elif c == '?':
+            out.append('[^\n/]')
+        elif c == '[' and ']' in pattern[i + 1:]:
+            end = pattern.index(']', i + 1)
+            body = pattern[i + 1:end].replace('\\', '\\\\')
+            out.append('[' + ('^' + body[1:] if body.startswith('!') else body) + ']')
+            i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    if not whole_path:
+        prefix = '^[^\n]*/'
+    elif pattern.startswith(('/', os.sep)):
+        prefix = '^'
+    else:
+        prefix = '^(?:[^\n]*/)?'   # relative patterns may start at any path component
+    return (prefix + ''.join(out) + '$').encode()
+
+def _locate_lines(data, pattern, regex=False, ignore_case=False):
+    """Yield matching lines from the mapped index without splitting it"""
+    if not regex and not ignore_case and not any(c in pattern for c in '*?['):
+        needle = os.fsencode(pattern)
+        position = data.find(needle)
+        while position != -1:
+            start = data.rfind(b'\n', 0, position) + 1
+            end = data.find(b'\n', position)
+            end = len(data) if end == -1 else end
+            yield data[start:end]
+            position = data.find(needle, end)
+        return
+
+    if regex:
+        expression = os.fsencode(pattern)
+    elif any(c in pattern for c in '*?['):
+        expression = _glob_to_regex(pattern)
+    else:
+        expression = re.escape(os.fsencode(pattern))
+    compiled = re.compile(expression, re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+    last_end = -1
+    for match in compiled.finditer(data):
+        start = data.rfind(b'\n', 0, match.start()) + 1
+        if start <= last_end:
+            continue
+        end = data.find(b'\n', match.start())
+        last_end = len(data) if end == -1 else end
+        yield data[start:last_end]
+
+def _regex_literals(pattern):
+    """Literal runs every match of a regular expression must contain ([] if unknown)"""
+    if '|' in pattern or '(?' in pattern:
+        return []   # alternation or inline flags (?x) defeat a simple literal scan
+    runs = []
+    run = ''
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        literal = None
+        if c == '\\' and i + 1 < len(pattern):
+            i += 1
+            if not pattern[i].isalnum():
+                literal = pattern[i]
+        elif c == '[':
+            start = i + 2 if pattern[i + 1:i + 2] == '^' else i + 1
+            end = pattern.find(']', start + 1)
+            i = len(pattern) if end == -1 else end
+        elif c == '(':
+            depth = 0
+            while i < len(pattern):
+                if pattern[i] == '\\':
+                    i += 1
+                elif pattern[i] == '(':
+                    depth += 1
+                elif pattern[i] == ')':
+                    depth -= 1
+                    if not depth:
+                        break
+                i += 1
+        elif c in '?*{':
+            run = run[:-1]   # the previous character is optional
+            if c == '{':
+                end = pattern.find('}', i)
+                i = len(pattern) if end == -1 else end
+        elif c not in '.^$+)':
+            literal = c
+        if literal is None:
+            runs.append(run)
+            run = ''
+        else:
+            run += literal
+        i += 1
+    runs.append(run)
+    return [r for r in runs if len(r) >= 3]
+
+def _locate_literals(pattern, regex=False):
+    """Literal strings a matching path must contain, for the trigram filter"""
+    if regex:
+        return _regex_literals(pattern)
+    return [r for r in re.split(r'[*?]|\[[^]]*\]', pattern) if len(r) >= 3]
+
+def _locate_ranges(db_size, literals):
+    """Byte ranges of the db that can contain all literals, or None to scan it whole"""
+    import array
+    if not literals:
+        return None
+    try:
+        starts = array.array('Q')
+        with open(_data_path('locate.blocks'), 'rb') as f:
+            starts.frombytes(f.read())
+        if not starts or starts[-1] != db_size:
+            return None   # built for an older db
+        segment = _Segment(_data_path('locate.tri'))
+    except (OSError, ValueError):
+        return None
+    try:
+        blocks = None
+        for literal in literals:
+            for trigram in _block_trigrams(os.fsencode(literal)):
+                found = segment.lookup(trigram)
+                blocks = found if blocks is None else blocks & found
+                if not blocks:
+                    return []
+    finally:
+        segment.close()
+    ranges = []
+    for block in sorted(blocks):
+        if ranges and ranges[-1][1] == starts[block]:
+            ranges[-1][1] = starts[block + 1]
+        else:
+            ranges.append([starts[block], starts[block + 1]])
+    return ranges
+
+def cmd_locate(args=""):
+    """Find files by name using the on-disk filename index"""
+    import mmap
+    switches, positional = _parse_switches(args)
+    if '?' in switches or (not positional and not switches):
+        print("LOCATE [/I] [/R] [/C] [/E] [/N:limit] pattern")
+        print("LOCATE /U [root ...]")
+        print()
+        print("  pattern  Substring of the path, or a wildcard (*.log) matched against the")
+        print("           file name, or against the whole path when it contains a /.")
+        print("  /I       Case-insensitive match.")
+        print("  /R       Treat pattern as a regular expression.")
+        print("  /C       Only print the number of matches.")
+        print("  /E       Only print paths that still exist.")
+        print("  /N       Stop after this many matches.")
+        print("  /U       Build or refresh the index (default roots: the previous ones,")
+        print("           else your home directory). Unchanged directories are reused.")
+        return
+
+    if 'U' in switches:
+        started = time.monotonic()
+        try:
+            count, directories, rescanned = _update_locate_index(positional)
+        except CommandCancelled:
+            print(f"{COLOR_CODES['yellow']}Index update cancelled; previous index kept.{COLOR_CODES['default']}")
+            raise
+        print(f"{COLOR_CODES['green']}Indexed {count:,} paths in {directories:,} directories "
+              f"({rescanned:,} rescanned) in {time.monotonic() - started:.1f}s.{COLOR_CODES['default']}")
+        return
+
+    db_path = _data_path('locate.db')
+    if not os.path.exists(db_path) or os.path.getsize(db_path) == 0:
+        print("The filename index is empty. Run LOCATE /U [root] to build it.")
+        return
+    try:
+        limit = int(switches['N']) if 'N' in switches else None
+    except ValueError:
+        print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
+        return
+
+    pattern = " ".join(positional)
+    count = 0
+    with open(db_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        ranges = _locate_ranges(len(data), _locate_literals(pattern, 'R' in switches))
+        if ranges is None:
+            ranges = [(0, len(data))]
+        try:
+            for start, end in ranges:
+                chunk = data if (start, end) == (0, len(data)) else data[start:end]
+                for line in _locate_lines(chunk, pattern, 'R' in switches, 'I' in switches):
+                    path = os.fsdecode(line)
+                    if 'E' in switches and not os.path.lexists(path):
+                        continue
+                    count += 1
+                    if 'C' not in switches:
+                        print(path)
+                    if limit is not None and count >= limit:
+                        break
+                else:
+                    continue
+                break
+        except re.error as e:
+            print(f"{COLOR_CODES['red']}Invalid regular expression: {e}{COLOR_CODES['default']}")
+            return
+    if 'C' in switches:
+        print(count)
+    elif not count:
+        _STATUS.code = 1
+
+# ========== FULL-TEXT INDEX ==========
+
+# INDEX builds a trigram inverted index per directory tree under
+# ~/.terminalx/index/<hash of root>/:
+#   manifest.json  root, files [[relative path, mtime_ns, size, live, encoding]], segments
+#   seg-N.bin      header (magic, trigram count, posting count), sorted trigram
+#                  column (uint32), posting offsets (uint64), posting file ids (uint32)
+# Segments are memory-mapped and binary-searched. A refresh appends one segment
+# for new and changed files and marks replaced entries dead; the index is
+# rebuilt from scratch once dead entries or segments pile up.
+_INDEX_MAGIC = b'TXTRI001'
+_INDEX_HEADER = struct.Struct('<8sQQ')
+_INDEX_CHUNK = 8 * 1024 * 1024
+_INDEX_MAX_SEGMENTS = 8
+
+def _index_dir(root):
+    key = hashlib.sha1(os.fsencode(os.path.abspath(root))).hexdigest()[:16]
+    return _data_path('index', key)
+
+def _file_trigrams(path):
+    """Return (encoding, trigrams) for a file; trigrams are sorted uint32 values packed as bytes.
+
+    The text is read the way FINDSTR reads it (COMPACT'ed files expanded,
+    encoding detected) and trigrams are taken from the UTF-8 form of each
+    lower-cased line, so they match _query_trigrams in any encoding. Binary
+    files are reported as 'binary' with no trigrams.
+    """
+    import array
+    grams = set()
+    with _open_binary(path) as f:
+        encoding = _detect_encoding(f.peek(_DETECT_SAMPLE)[:_DETECT_SAMPLE])
+        if encoding is None:
+            return 'binary', b""
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        pending = ""
+        for chunk in iter(lambda: f.read(_INDEX_CHUNK), b""):
+            text = pending + decoder.decode(chunk)
+            cut = text.rfind('\n') + 1
+            pending = text[cut:]
+            data = text[:cut].lower().encode('utf-8')
+            grams.update(zip(data, data[1:], data[2:]))
+        data = (pending + decoder.decode(b"", final=True)).lower().encode('utf-8')
+        grams.update(zip(data, data[1:], data[2:]))
+    packed = array.array('I', sorted((a << 16) | (b << 8) | c for a, b, c in grams)).tobytes()
+    return codecs.lookup(encoding).name, packed
+
+def _query_trigrams(text):
+    data = text.lower().encode('utf-8')
+    return sorted({(data[i] << 16) | (data[i + 1] << 8) | data[i + 2] for i in range(len(data) - 2)})
+
+def _write_segment(path, postings):
+    """Write {trigram: array of file ids} as a segment file"""
+    import array
+    trigrams = array.array('I', sorted(postings))
+    offsets = array.array('Q', [0])
+    total = 0
+    for trigram in trigrams:
+        total += len(postings[trigram])
+        offsets.append(total)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, len(trigrams), total))
+        trigrams.tofile(f)
+        if len(trigrams) % 2:
+            f.write(b'\0' * 4)  # keep the offset column 8-byte aligned
+        offsets.tofile(f)
+        for trigram in trigrams:
+            postings[trigram].tofile(f)
+    os.replace(path + '.tmp', path)
+
+class _Segment:
+    """A memory-mapped index segment"""
+
+    def __init__(self, path):
+        import mmap
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, total = _INDEX_HEADER.unpack_from(self.map, 0)
+        if magic != _INDEX_MAGIC:
+            raise ValueError(f"{path} is not an index segment")
+        view = memoryview(self.map)
+        start = _INDEX_HEADER.size
+        self.trigrams = view[start:start + count * 4].cast('I')
+        start += count * 4 + (count % 2) * 4
+        self.offsets = view[start:start + (count + 1) * 8].cast('Q')
+        start += (count + 1) * 8
+        self.postings = view[start:start + total * 4].cast('I')
+
+    def lookup(self, trigram):
+        i = bisect.bisect_left(self.trigrams, trigram)
+        if i == len(self.trigrams) or self.trigrams[i] != trigram:
+            return set()
+        return set(self.postings[self.offsets[i]:self.offsets[i + 1]])
+
+    def close(self):
+        for view in (self.trigrams, self.offsets, self.postings):
+            view.release()
+        try:
+            self.map.close()
+        except BufferError:
+            pass
+
+def _load_manifest(directory):
+    try:
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _save_manifest(directory, manifest):
+    path = os.path.join(directory, 'manifest.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(path + '.tmp', path)
+
+def _scan_tree(root):
+    """{relative path: (mtime_ns, size)} for every regular file under root"""
+    found = {}
+    for entry in _walk_files(root, '*', recursive=True):
+        try:
+            stat = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        found[os.path.relpath(entry.path, root)] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+def build_text_index(root, rebuild=False):
+    """Create or refresh the index for root. Returns (indexed, changed, removed, bytes read)."""
+    import array
+    root = os.path.abspath(root)
+    directory = _index_dir(root)
+    os.makedirs(directory, exist_ok=True)
+    manifest = _load_manifest(directory)
+    current = _scan_tree(root)
+
+    if manifest is not None and not rebuild:
+        live = {f[0]: (i, f) for i, f in enumerate(manifest['files']) if f[3]}
+        dead = sum(1 for f in manifest['files'] if not f[3])
+        if len(manifest['segments']) >= _INDEX_MAX_SEGMENTS or dead > len(live):
+            manifest = None  # too fragmented: start over
+        elif any(len(f) < 5 for f in manifest['files']):
+            manifest = None  # built before encodings were recorded
+    if manifest is None or rebuild:
+        for name in os.listdir(directory):
+            if name.startswith('seg-'):
+                os.remove(os.path.join(directory, name))
+        manifest = {'root': root, 'files': [], 'segments': [], 'next_segment': 1}
+        live = {}
+
+    removed = 0
+    for relpath, (file_id, entry) in live.items():
+        if tuple(entry[1:3]) != current.get(relpath):
+            manifest['files'][file_id][3] = 0
+            removed += relpath not in current
+    changed = [relpath for relpath, stat in current.items()
+               if relpath not in live or tuple(live[relpath][1][1:3]) != stat]
+
+    postings = collections.defaultdict(lambda: array.array('I'))
+    bytes_read = 0
+    if changed:
+        progress = _Progress("Indexing")
+        paths = [os.path.join(root, relpath) for relpath in changed]
+        with ProcessPoolExecutor(mp_context=_process_context()) as pool:
+            for count, (relpath, (encoding, packed)) in enumerate(
+                    zip(changed, pool.map(_safe_trigrams, paths, chunksize=16)), 1):
+                _check_cancelled()
+                mtime, size = current[relpath]
+                file_id = len(manifest['files'])
+                manifest['files'].append([relpath, mtime, size, 1, encoding])
+                bytes_read += size
+                grams = array.array('I')
+                grams.frombytes(packed)
+                for trigram in grams:
+                    postings[trigram].append(file_id)
+                progress.update(count, bytes_read)
+        progress.done()
+        segment = f"seg-{manifest['next_segment']:04d}.bin"
+        manifest['next_segment'] += 1
+        _write_segment(os.path.join(directory, segment), postings)
+        manifest['segments'].append(segment)
+    _save_manifest(directory, manifest)
+    return len(current), len(changed), removed, bytes_read
+
+def _safe_trigrams(path):
+    try:
+        return _file_trigrams(path)
+    except (OSError, LookupError):
+        return None, b""  # unreadable now: FINDSTR always reads it
+
+def _find_text_index(path):
+    """Return (root, directory) of an index covering path, or None"""
+    path = os.path.abspath(path)
+    while True:
+        directory = _index_dir(path)
+        if os.path.exists(os.path.join(directory, 'manifest.json')):
+            return path, directory
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+def _narrow_with_index(root, entries, search_string, encoding=None):
+    """Filter a stream of DirEntry objects down to files that may contain search_string.
+
+    Files the index has not seen, changed since it was built, could not
+    read, or decoded differently from the encoding this search forces (/E
+    or CHCP) are always kept, so results match an unindexed search. Binary
+    files are dropped unless an encoding is forced, as FINDSTR skips them.
+    """
+    trigrams = _query_trigrams(search_string)
+    found = _find_text_index(root) if trigrams else None
+    if found is None:
+        return entries
+    index_root, directory = found
+    manifest = _load_manifest(directory)
+    if manifest is None:
+        return entries
+    forced = encoding or _session().code_page
+
+    candidates = set()
+    for name in manifest['segments']:
+        segment = _Segment(os.path.join(directory, name))
+        try:
+            ids = None
+            for trigram in trigrams:
+                ids = segment.lookup(trigram) if ids is None else ids & segment.lookup(trigram)
+                if not ids:
+                    break
+            candidates |= ids or set()
+        finally:
+            segment.close()
+    indexed = {}
+    for i, f in enumerate(manifest['files']):
+        if not f[3] or len(f) < 5 or not f[4]:
+            continue  # unreadable, or recorded without its encoding
+        if forced and f[4] not in (forced, 'binary'):
+            continue
+        indexed[f[0]] = (i, f[1], f[2], f[4])
+
+    def narrowed():
+        for entry in entries:
+            known = indexed.get(os.path.relpath(os.path.abspath(entry.path), index_root))
+            if known is None:
+                yield entry
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if (stat.st_mtime_ns, stat.st_size) != known[1:3]:
+                yield entry
+            elif known[3] == 'binary':
+                # Binary files have no trigrams. FINDSTR skips them when detecting
+                # encodings, but a forced code page decodes and searches them.
+                if forced:
+                    yield entry
+            elif known[0] in candidates:
+                yield entry
+
+    return narrowed()
+
+def _verify_text_index(root, search_string):
+    """Run FINDSTR /S under root with and without the index. Returns (indexed, unindexed) output lines."""
+    _install_stream_proxies()
+    results = []
+    for extra in ('', '/NOINDEX '):
+        buffer = io.StringIO()
+        previous = getattr(sys.stdout._local, 'stream', None)
+        status = last_status()
+        sys.stdout.redirect(buffer)
+        try:
+            cmd_findstr(f'/S {extra}"{search_string}" "{root}"')
+        finally:
+            sys.stdout.redirect(previous)
+            _STATUS.code = status
+        results.append(sorted(buffer.getvalue().splitlines()))
+    return results
+
+def cmd_index(args=""):
+    """Build or refresh a full-text index that FINDSTR uses automatically"""
+    switches, positional = _parse_switches(args)
+    if '?' in switches:
+        print("INDEX [/R] [/D] [dir]")
+        print("INDEX /L")
+        print("INDEX /V:string [dir]")
+        print()
+        print("  dir  Directory tree to index (default: current directory).")
+        print("  /R   Rebuild from scratch instead of updating changed files.")
+        print("  /D   Delete the index for dir.")
+        print("  /L   List existing indexes.")
+        print("  /V   Check that FINDSTR /S finds the same lines with and without the index.")
+        print()
+        print("FINDSTR /S searches under an indexed directory only read files that can match.")
+        return
+
+    if 'L' in switches:
+        base = _data_path('index')
+        for key in sorted(os.listdir(base)):
+            manifest = _load_manifest(os.path.join(base, key))
+            if manifest:
+                live = sum(1 for f in manifest['files'] if f[3])
+                print(f"{manifest['root']}  ({live:,} files, {len(manifest['segments'])} segment(s))")
+        return
+
+    root = os.path.abspath(positional[0] if positional else os.getcwd())
+    if 'D' in switches:
+        shutil.rmtree(_index_dir(root), ignore_errors=True)
+        print(f"Index for {root} deleted.")
+        return
+    if not os.path.isdir(root):
+        print(f"{COLOR_CODES['red']}The system cannot find the path specified.{COLOR_CODES['default']}")
+        return
+    if 'V' in switches:
+        if switches['V'] is True or '"' in switches['V']:
+            print(f"{COLOR_CODES['red']}The syntax of the command is incorrect.{COLOR_CODES['default']}")
+            _STATUS.code = 1
+            return
+        indexed, unindexed = _verify_text_index(root, switches['V'])
+        if indexed == unindexed:
+            print(f"{COLOR_CODES['green']}OK: {len(indexed):,} line(s), identical with and without the index."
+                  f"{COLOR_CODES['default']}")
+            return
+        print(f"{COLOR_CODES['red']}Index results differ from an unindexed search:{COLOR_CODES['default']}")
+        for line in sorted(set(unindexed) - set(indexed)):
+            print(f"  missing: {line}")
+        for line in sorted(set(indexed) - set(unindexed)):
+            print(f"  extra:   {line}")
+        _STATUS.code = 1
+        return
+    started = time.monotonic()
+    total, changed, removed, size = build_text_index(root, rebuild='R' in switches)
+    print(f"{COLOR_CODES['green']}Indexed {root}: {total:,} files, {changed:,} (re)indexed "
+          f"({_format_bytes(size)}), {removed:,} removed, in {time.monotonic() - started:.1f}s.{COLOR_CODES['default']}")
+
 # ========== ENVIRONMENT AND REGISTRY ==========
 
 def cmd_set(args=""):
@@ -827,17 +5208,273 @@ def cmd_echo(args=""):
 
 # ========== ARCHIVE AND COMPRESSION ==========
 
+# COMPACT stores files as single gzip members, so gzip -dc and zcat read them
+# too. The gzip header's FEXTRA field carries a 'TX' subfield with the original
+# size, which marks the file as COMPACT'ed: TYPE/MORE/FINDSTR/WC and friends
+# read such files transparently, and /U never touches gzip data produced by
+# other tools.
+# ID1 ID2 CM, FLG, MTIME, XFL, OS, XLEN, subfield id, subfield length, original size
+_COMPACT_HEADER = struct.Struct('<3sBIBBH2sHQ')
+_COMPACT_GZIP = b'\x1f\x8b\x08'
+_COMPACT_FEXTRA = 0x04
+_COMPACT_SUBFIELD = b'TX'
+_COMPACT_CHUNK = 1024 * 1024
+_COMPACT_SAMPLE = 16 * 1024
+_COMPACT_MAX_ENTROPY = 7.5   # bits per byte; above this data is already compressed
+_COMPACT_MIN_SAVING = 0.10   # keep the original unless we save at least 10%
+
+def _compact_size(head):
+    """Original size from a COMPACT'ed file's leading bytes, or None if it was not COMPACT'ed"""
+    if len(head) >= _COMPACT_HEADER.size:
+        magic, flags, _, _, _, extra, subfield, length, size = _COMPACT_HEADER.unpack_from(head)
+        if (magic, flags, extra, subfield, length) == (_COMPACT_GZIP, _COMPACT_FEXTRA, 12, _COMPACT_SUBFIELD, 8):
+            return size
+    return None
+
+class _CompactReader(io.RawIOBase):
+    """Streaming decompressor over a compacted file positioned at its start"""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)  # zlib parses (and checks) the gzip framing
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            if self._inflater.eof:
+                return 0
+            chunk = self._raw.read(_COMPACT_CHUNK)
+            if not chunk:
+                self._buffer = self._inflater.flush()
+                if not self._buffer:
+                    return 0
+                break
+            self._buffer = self._inflater.decompress(chunk)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self):
+        self._raw.close()
+        super().close()
+
+def _is_compacted(path):
+    try:
+        with open(path, 'rb') as f:
+            return _compact_size(f.read(_COMPACT_HEADER.size)) is not None
+    except OSError:
+        return False
+
+def _open_for_writing():
+    """(st_dev, st_ino) of files open for writing by any process (ours included), read from /proc.
+
+    Only processes we may inspect are seen, and the set is empty where /proc
+    is unavailable; _rewrite_atomically's change check covers the rest.
+    """
+    found = set()
+    try:
+        pids = [pid for pid in os.listdir('/proc') if pid.isdigit()]
+    except OSError:
+        return found
+    for pid in pids:
+        try:
+            fds = os.listdir(f"/proc/{pid}/fd")
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                with open(f"/proc/{pid}/fdinfo/{fd}") as f:
+                    flags = next((int(line.split()[1], 8) for line in f if line.startswith('flags:')), 0)
+                if flags & (os.O_WRONLY | os.O_RDWR):
+                    st = os.stat(f"/proc/{pid}/fd/{fd}")
+                    found.add((st.st_dev, st.st_ino))
+            except (OSError, ValueError, IndexError):
+                continue
+    return found
+
+def _sample_entropy(path, size):
+    """Estimate Shannon entropy (bits/byte) from a few blocks spread across the file"""
+    counts = Counter()
+    total = 0
+    with open(path, 'rb') as f:
+        for offset in sorted({0, size // 4, size // 2, size * 3 // 4}):
+            f.seek(offset)
+            block = f.read(_COMPACT_SAMPLE)
+            counts.update(block)
+            total += len(block)
+    if not total:
+        return 0.0
+    return -sum(c / total * math.log2(c / total) for c in counts.values())
+
+def _rewrite_atomically(path, transform):
+    """Write transform(src, dst) to a temp file beside path, then rename it over path.
+
+    If transform returns False the temp file is discarded and None is returned,
+    otherwise the new size of path is returned. If path was modified or
+    replaced meanwhile, the rewrite is abandoned with EBUSY rather than
+    losing what was written.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with open(path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            before = os.fstat(src.fileno())
+            keep = transform(src, dst)
+            if keep is not False:
+                dst.flush()
+                os.fsync(dst.fileno())
+        if keep is False:
+            os.remove(tmp_path)
+            return None
+        after = os.stat(path)
+        if (after.st_ino, after.st_size, after.st_mtime_ns) != (before.st_ino, before.st_size, before.st_mtime_ns):
+            raise OSError(errno.EBUSY, "the file changed while it was being rewritten", path)
+        shutil.copystat(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return os.path.getsize(path)
+
+def _compact_file(path, compress=True, force=False, busy=frozenset()):
+    """Compress or expand one file in place.
+
+    Symbolic and hard links are skipped, since replacing the file would
+    break them, and files in busy (see _open_for_writing) are refused, since
+    whatever a writer appends after the rename would be lost.
+    Returns (uncompressed_size, stored_size, status) where status is 'OK' or 'SKIP'.
+    """
+    info = os.lstat(path)
+    size = info.st_size
+    if not stat.S_ISREG(info.st_mode) or info.st_nlink > 1:
+        return size, size, 'SKIP'
+    if (info.st_dev, info.st_ino) in busy:
+        raise OSError(errno.EBUSY, "the file is open for writing")
+    with open(path, 'rb') as f:
+        original = _compact_size(f.read(_COMPACT_HEADER.size))
+
+    if not compress:
+        if original is None:
+            return size, size, 'SKIP'
+
+        def expand(src, dst):
+            shutil.copyfileobj(_CompactReader(src), dst, _COMPACT_CHUNK)
+
+        return _rewrite_atomically(path, expand), size, 'OK'
+
+    if original is not None:
+        return original, size, 'SKIP'
+    if size == 0 or (not force and _sample_entropy(path, size) > _COMPACT_MAX_ENTROPY):
+        return size, size, 'SKIP'
+
+    def deflate(src, dst):
+        deflater = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        dst.write(_COMPACT_HEADER.pack(_COMPACT_GZIP, _COMPACT_FEXTRA, int(info.st_mtime) & 0xFFFFFFFF, 0, 255,
+                                       12, _COMPACT_SUBFIELD, 8, size))
+        crc = 0
+        for chunk in iter(lambda: src.read(_COMPACT_CHUNK), b""):
+            crc = zlib.crc32(chunk, crc)
+            dst.write(deflater.compress(chunk))
+        dst.write(deflater.flush())
+        dst.write(struct.pack('<II', crc, size & 0xFFFFFFFF))
+        return force or dst.tell() <= size * (1 - _COMPACT_MIN_SAVING)
+
+    stored = _rewrite_atomically(path, deflate)
+    if stored is None:
+        return size, size, 'SKIP'
+    return size, stored, 'OK'
+
 def cmd_compact(args=""):
-    """Display or alter file compression (simulation)"""
-    if not args:
-        print(f"Compression is not supported for: {CURRENT_DIR}")
-    else:
-        filename = args.strip()
-        if os.path.exists(filename):
-            print(f"Compressing: {filename}...")
-            print(f"1 files within 1 directories were processed.")
-        else:
-            print("File not found.")
+    """Display or alter file compression (equivalent to Windows COMPACT command)"""
+    switches, targets = _parse_switches(args)
+
+    if '?' in switches:
+        print("COMPACT [/C | /U] [/S[:dir]] [/F] [/Q] [filename [...]]")
+        print()
+        print("  /C        Compresses the specified files.")
+        print("  /U        Uncompresses the specified files.")
+        print("  /S        Performs the operation on files in the given directory")
+        print("            and all subdirectories. Default dir is the current one.")
+        print("  /F        Forces compression of files that look incompressible.")
+        print("  /Q        Reports only the most essential information.")
+        print()
+        print("Compressed files are gzip data (gzip -dc reads them) and keep their names.")
+        print("Links, and files open for writing (such as active logs), are left alone.")
+        return
+
+    recursive = 'S' in switches
+    root = switches['S'] if isinstance(switches.get('S'), str) else os.getcwd()
+    if not targets:
+        targets = ['*']
+
+    def matching_files():
+        for target in targets:
+            if recursive:
+                yield from (entry.path for entry in _walk_files(root, target, recursive=True))
+            elif os.path.isdir(target):
+                yield from (entry.path for entry in _walk_files(target))
+            else:
+                yield from (path for path in glob.iglob(target) if os.path.isfile(path))
+
+    if 'C' not in switches and 'U' not in switches:
+        # Display mode: list compression state only
+        count = compacted = 0
+        print(f" Listing {root if recursive else os.getcwd()}")
+        print()
+        for path in matching_files():
+            size = os.path.getsize(path)
+            flag = 'C' if _is_compacted(path) else ' '
+            compacted += flag == 'C'
+            count += 1
+            print(f"{flag} {size:>15,}  {os.path.relpath(path)}")
+        print()
+        print(f"Of {count} files listed, {compacted} are compressed and {count - compacted} are not compressed.")
+        return
+
+    compress = 'C' in switches
+    force = 'F' in switches
+    quiet = 'Q' in switches
+    verb = 'compressed' if compress else 'uncompressed'
+
+    print(f" {'Compressing' if compress else 'Uncompressing'} files in {root if recursive else os.getcwd()}")
+    print()
+
+    files = processed = 0
+    directories = set()
+    total_original = total_stored = 0
+
+    busy = _open_for_writing()
+    for path, result, error in _bounded_map(lambda p: _compact_file(p, compress, force, busy), matching_files()):
+        files += 1
+        name = os.path.relpath(path)
+        if error:
+            print(f"{COLOR_CODES['red']}{name} [ERR] {error}{COLOR_CODES['default']}")
+            continue
+        original, stored, status = result
+        processed += status == 'OK'
+        directories.add(os.path.dirname(path))
+        total_original += original
+        total_stored += stored
+        if not quiet:
+            ratio = (original / stored) if stored else 1.0
+            tag = '[OK]' if status == 'OK' else f"{COLOR_CODES['yellow']}[SKIPPED]{COLOR_CODES['default']}"
+            print(f"{name:<40} {original:>12,} : {stored:>12,} = {ratio:.1f} to 1 {tag}")
+
+    if not files:
+        print("File not found.")
+        return
+
+    print()
+    print(f"{processed} files within {len(directories)} directories were {verb}.")
+    if compress:
+        print(f"{total_original:,} total bytes of data are stored in {total_stored:,} bytes.")
+        ratio = (total_original / total_stored) if total_stored else 1.0
+        print(f"The compression ratio is {ratio:.1f} to 1.")
 
 # ========== SECURITY COMMANDS ==========
 
@@ -862,8 +5499,8 @@ def cmd_where(args=""):
     command = args.strip()
 
     # Check current directory first
-    if os.path.isfile(os.path.join(CURRENT_DIR, command)):
-        print(os.path.join(CURRENT_DIR, command))
+    if os.path.isfile(command):
+        print(os.path.abspath(command))
         return
 
     # Check PATH directories
@@ -890,7 +5527,7 @@ def cmd_timeout(args=""):
     try:
         timeout_value = int(args.strip())
         print(f"Waiting for {timeout_value} seconds, press a key to continue ...")
-        time.sleep(timeout_value)
+        _sleep(timeout_value)
         print()
     except ValueError:
         print("The syntax of the command is incorrect.")
@@ -942,17 +5579,32 @@ def cmd_help(args=""):
             'cd': 'Displays the name of or changes the current directory.',
             'copy': 'Copies one or more files to another location.',
             'del': 'Deletes one or more files.',
+            'split': 'Splits a file into parts by size (/B), line count (/L) or number of parts (/N).',
+            'join': 'Concatenates part files into one file; /V verifies the checksum written by SPLIT /V.',
+            'hexdump': 'Shows a file in hex at any offset, searches for byte patterns (/F, /X) or decodes struct fields (/S).',
             'md': 'Creates a directory.',
             'rd': 'Removes a directory.',
-            'type': 'Displays the contents of a text file.',
+            'type': 'Displays the contents of a text file. /E:encoding overrides detection.',
             'ping': 'Sends ICMP echo requests to network hosts.',
             'ipconfig': 'Displays network interface configuration.',
             'netstat': 'Displays network connections and statistics.',
+            'curl': 'Transfers URLs over HTTP(S) with pooled keep-alive connections; -O saves to files.',
+            'netperf': 'Runs a throughput test server (/S) or client (/C:host): TCP, UDP (/U) or latency (/RR).',
+            'serve': 'Serves a directory over HTTP as a background job (sendfile, ranges, cached listings).',
+            'wget': 'Downloads URLs concurrently, splitting large files into parallel ranges; -c resumes.',
             'tasklist': 'Displays currently running processes.',
             'taskkill': 'Terminates running processes.',
             'set': 'Displays, sets, or removes environment variables.',
             'echo': 'Displays messages or toggles command echoing.',
-            'findstr': 'Searches for strings in files.',
+            'findstr': 'Searches for strings in files. /E:encoding overrides detection.',
+            'index': 'Builds or refreshes a full-text index that FINDSTR uses automatically.',
+            'locate': 'Finds files by name using an on-disk filename index.',
+            'wc': 'Counts lines, words and bytes in files.',
+            'uniq': 'Collapses adjacent duplicate lines; -c prefixes counts.',
+            'topk': 'Prints the most frequent lines or fields using a bounded-memory sketch.',
+            'chcp': 'Displays or sets the code page used to read text files (AUTO detects per file).',
+            'iconv': 'Converts a text file between encodings in constant memory; /D reports detected encodings.',
+            'distinct': 'Estimates the number of distinct lines or fields (HyperLogLog).',
             'sort': 'Sorts input and writes results to output.',
             'tree': 'Displays directory structure graphically.',
             'attrib': 'Displays or changes file attributes.',
@@ -964,10 +5616,26 @@ def cmd_help(args=""):
             'date': 'Displays or sets the date.',
             'time': 'Displays or sets the system time.',
             'hostname': 'Displays the computer name.',
-            'whoami': 'Displays the current username.'
+            'whoami': 'Displays the current username.',
+            'perfmon': 'Live system monitor sampled from /proc. Use PERFMON /? for options.',
+            'winsat': 'Benchmarks disk (sequential, random IOPS, fsync latency) and memory bandwidth. Use WINSAT /? for options.',
+            'for': 'Runs a command for each item in a set, file or command output.',
+            'parallel': 'Runs the iterations of a FOR loop concurrently.',
+            'start': 'Runs a command as a background job.',
+            'jobs': 'Lists background jobs; JOBS /K:id cancels one.',
+            'fg': 'Shows a background job\'s output and follows it until it finishes.',
+            'wait': 'Waits for background jobs to finish.',
+            'schtasks': 'Creates, lists, runs and deletes scheduled commands (interval, daily or cron schedules).',
+            'at': 'Runs a command once at a given time, or lists scheduled tasks.',
+            'compact': 'Displays or alters the compression of files. Use COMPACT /? for options.'
         }
 
-        help_text = help_texts.get(command, f"No help available for: '{command}'")
+        help_text = help_texts.get(command)
+        if help_text is None:
+            # Commands without an entry here (e.g. plugins) fall back to their docstring
+            func = resolve_command(command)
+            doc = (func.__doc__ or "").strip() if func else ""
+            help_text = doc.splitlines()[0] if doc else f"No help available for: '{command}'"
         print(help_text)
         return
 
@@ -979,15 +5647,18 @@ def cmd_help(args=""):
   DIR [drive:][path][filename] - List directory contents
   CD [/D] [drive:][path]       - Change directory
   MD [drive:]path              - Create directory
-  RD [/S] [drive:]path         - Remove directory
+  RD [/S] [/Q] [/L] path       - Remove directory
   COPY source destination      - Copy files
-  MOVE source destination      - Move/rename files
-  DEL [/P] [/S] filename       - Delete files
+  MOVE [/V] source(s) dest     - Move/rename files
+  DEL [/S] [/Q] [/L] filename  - Delete files (/L = dry run)
   REN oldname newname          - Rename files
-  TYPE filename                - Display file contents
+  TYPE [/E:enc] filename       - Display file contents
   MORE filename                - Display file contents page by page
+  HEXDUMP [/O:n] [/F:text] file - Hex view, search or decode binary files
+  SPLIT /B:size|/L:n|/N:n file  - Split a file into parts
+  JOIN [/V] dest [parts]       - Reassemble parts into one file
   TREE [drive:][path] [/F]     - Display directory tree
-  ATTRIB [filename]            - Display/change file attributes
+  ATTRIB [+R|-R] [+H|-H] [/S]  - Display/change file attributes
 
 {COLOR_CODES['yellow']}System Information:{COLOR_CODES['default']}
   VER                          - Display version information
@@ -996,21 +5667,35 @@ def cmd_help(args=""):
   WHOAMI                       - Display current username
   DATE                         - Display current date
   TIME                         - Display current time
+  PERFMON [/I:sec] [/CSV:file] - Live CPU/memory/disk/network monitor
+  WINSAT [disk|mem] [/JSON]    - Benchmark disk and memory throughput
 
 {COLOR_CODES['yellow']}Network Commands:{COLOR_CODES['default']}
   PING [-t] [-n count] host    - Send ICMP echo requests
   IPCONFIG [/all]              - Display network configuration
   NETSTAT [-a] [-n] [-r]       - Display network statistics
   NSLOOKUP [hostname]          - DNS lookup utility
+  CURL [-o file|-O] [-L] url   - Transfer a URL (to the console by default)
+  WGET [-c] [-j N] url [...]   - Download URLs to files
+  SERVE [/P:port] [dir]        - Serve a directory over HTTP in the background
+  NETPERF /S | /C:host         - Network throughput, loss and latency tests
 
 {COLOR_CODES['yellow']}Process Management:{COLOR_CODES['default']}
   TASKLIST [/FI filter]        - Display running processes
   TASKKILL /PID pid | /IM name - Terminate processes
 
 {COLOR_CODES['yellow']}Text Processing:{COLOR_CODES['default']}
-  FINDSTR [/I] string filename - Search for strings in files
-  SORT filename                - Sort file contents
+  FINDSTR [/S] string target   - Search for strings in files or trees
+  INDEX [/R] [dir]             - Build a full-text index used by FINDSTR
+  SORT [/E:enc] filename       - Sort file contents
   FC file1 file2               - Compare files
+  WC [-l] [-w] [-c] files      - Count lines, words and bytes
+  UNIQ [-c] [-d] [-u] file     - Collapse adjacent duplicate lines
+  TOPK [-k N] [-f n] file      - Most frequent lines or fields
+  DISTINCT [-f n] file         - Approximate distinct count
+  CHCP [nnn|AUTO]              - Show or set the text code page
+  ICONV /T:enc [/F:enc] file   - Convert a file between encodings
+  LOCATE [/I] [/R] pattern     - Find files by name from the index (LOCATE /U builds it)
 
 {COLOR_CODES['yellow']}Environment:{COLOR_CODES['default']}
   SET [variable=[string]]      - Display/set environment variables
@@ -1025,22 +5710,52 @@ def cmd_help(args=""):
   CLS                          - Clear screen
 
 {COLOR_CODES['yellow']}Archives & Security:{COLOR_CODES['default']}
-  COMPACT [filename]           - Display/alter file compression
+  COMPACT [/C|/U] [/S] [file]  - Display/alter file compression
   CIPHER [/w]                  - Encryption utility
 
+{COLOR_CODES['yellow']}Object Pipelines:{COLOR_CODES['default']}
+  DIR [/S] | TASKLIST | NETSTAT  - Sources that emit records to later stages
+  | WHERE expr                   - Filter, e.g. where size -gt 10MB -and ext -eq '.log'
+  | SORT field [desc]            - Sort by one or more fields
+  | TOP N [by field] [asc]       - Largest N records using a bounded heap
+  | SELECT f1,f2 | FIRST N | GROUP field | COUNT
+
+{COLOR_CODES['yellow']}Loops:{COLOR_CODES['default']}
+  FOR [/F|/L|/D] %x IN (set) DO command  - Run a command for each item
+  PARALLEL [-j N] [-k] [-p] FOR ...      - Run FOR iterations concurrently
+
+{COLOR_CODES['yellow']}Background Jobs:{COLOR_CODES['default']}
+  START /B command             - Run a command as a background job
+  JOBS [/K:id]                 - List jobs or cancel one
+  FG [id]                      - Follow a job's output
+  WAIT [id ...]                - Wait for jobs to finish
+  SCHTASKS /CREATE /TN /SC /TR - Schedule a command (interval, daily or cron)
+  AT [HH:MM command]           - Run a command once at a given time
+
 {COLOR_CODES['yellow']}Additional Commands:{COLOR_CODES['default']}
   HELP [command]               - Display help information
   EXIT                         - Exit TerminalX
   QUIT                         - Exit TerminalX
 
-{COLOR_CODES['green']}Note: Most standard CMD commands are supported. For detailed help on any command,
+{_plugin_help()}{COLOR_CODES['green']}Note: Most standard CMD commands are supported. For detailed help on any command,
 type: HELP [command name]{COLOR_CODES['default']}
 """
     print(help_text)
 
-def cmd_clear():
+def _plugin_help():
+    """Help menu section listing plugin commands (names only, nothing is imported)"""
+    discover_plugins()
+    plugins = sorted(COMMAND_GROUPS.get('plugins', {}))
+    if not plugins:
+        return ""
+    return f"{COLOR_CODES['yellow']}Plugin Commands:{COLOR_CODES['default']}\n  {', '.join(p.upper() for p in plugins)}\n\n"
+
+def cmd_clear(args=""):
     """Clear the screen (equivalent to Windows CLS command)"""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    if _stdout_redirected():
+        print("\033[2J\033[H", end='')
+    else:
+        os.system('cls' if os.name == 'nt' else 'clear')
 
 def cmd_quit(args=""):
     """Exit TerminalX"""
@@ -1048,106 +5763,1309 @@ def cmd_quit(args=""):
     time.sleep(0.5)
     return True
 
-# ========== MAIN TERMINAL LOOP ==========
+# ========== OBJECT PIPELINE ==========
+
+# Built-ins that can emit typed records instead of text. Rows are namedtuples
+# (no per-row __dict__) and are produced lazily, so stages such as TOP only
+# ever hold a bounded heap of them.
+FileRecord = collections.namedtuple('FileRecord', 'name ext size modified dir path')
+ProcessRecord = collections.namedtuple('ProcessRecord', 'pid name memory threads')
+ConnectionRecord = collections.namedtuple('ConnectionRecord', 'proto local lport remote rport state')
+CountRecord = collections.namedtuple('CountRecord', 'value count')
+
+def _dir_records(args=""):
+    switches, paths = _parse_switches(args)
+    stack = [paths[0] if paths else os.getcwd()]
+    while stack:
+        _check_cancelled()
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir and 'S' in switches:
+                        stack.append(entry.path)
+                    yield FileRecord(entry.name, '' if is_dir else os.path.splitext(entry.name)[1].lower(),
+                                     0 if is_dir else stat.st_size, datetime.fromtimestamp(stat.st_mtime),
+                                     is_dir, entry.path)
+        except OSError:
+            continue
 
-def main():
-    """Main terminal loop"""
-    global COMMAND_HISTORY, CURRENT_DIR
-    cmd_clear()
-    show_banner()
+def _process_records(args=""):
+    try:
+        import psutil
+        for proc in psutil.process_iter(['pid', 'name', 'memory_info', 'num_threads']):
+            info = proc.info
+            memory = info['memory_info'].rss if info['memory_info'] else 0
+            yield ProcessRecord(info['pid'], info['name'] or '', memory, info['num_threads'] or 0)
+        return
+    except ImportError:
+        pass
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'rb') as f:
+                data = f.read()
+        except OSError:
+            continue
+        comm_end = data.rfind(b')')
+        fields = data[comm_end + 2:].split()
+        yield ProcessRecord(int(name), data[data.find(b'(') + 1:comm_end].decode(errors='replace'),
+                            int(fields[21]) * page_size, int(fields[17]))
+
+_TCP_STATES = {
+    '01': 'ESTABLISHED', '02': 'SYN_SENT', '03': 'SYN_RECV', '04': 'FIN_WAIT1',
+    '05': 'FIN_WAIT2', '06': 'TIME_WAIT', '07': 'CLOSE', '08': 'CLOSE_WAIT',
+    '09': 'LAST_ACK', '0A': 'LISTEN', '0B': 'CLOSING',
+}
 
-    # Command dictionary for faster lookup
-    commands = {
-        'dir': cmd_dir,
-        'cd': cmd_cd,
-        'md': cmd_md,
-        'mkdir': cmd_md,
-        'rd': cmd_rd,
-        'rmdir': cmd_rd,
-        'copy': cmd_copy,
-        'move': cmd_move,
-        'del': cmd_del,
-        'delete': cmd_del,
-        'ren': cmd_ren,
-        'rename': cmd_ren,
-        'type': cmd_type,
-        'more': cmd_more,
-        'ver': cmd_ver,
-        'version': cmd_ver,
-        'systeminfo': cmd_systeminfo,
-        'hostname': cmd_hostname,
-        'ipconfig': cmd_ipconfig,
-        'whoami': cmd_whoami,
-        'date': cmd_date,
-        'time': cmd_time,
-        'tasklist': cmd_tasklist,
-        'taskkill': cmd_taskkill,
-        'ping': cmd_ping,
-        'netstat': cmd_netstat,
-        'nslookup': cmd_nslookup,
-        'findstr': cmd_findstr,
-        'find': cmd_findstr,
-        'sort': cmd_sort,
-        'fc': cmd_fc,
-        'tree': cmd_tree,
-        'attrib': cmd_attrib,
-        'compact': cmd_compact,
-        'cipher': cmd_cipher,
-        'set': cmd_set,
-        'path': cmd_path,
-        'echo': cmd_echo,
-        'where': cmd_where,
-        'timeout': cmd_timeout,
-        'title': cmd_title,
-        'color': cmd_color,
-        'help': cmd_help,
-        'cls': cmd_clear,
-        'clear': cmd_clear,
-        'exit': cmd_quit,
-        'quit': cmd_quit,
-        'diskpart': cmd_diskpart
-    }
+def _decode_proc_address(text):
+    """Decode an address:port pair from /proc/net/{tcp,udp}[6]"""
+    address, port = text.split(':')
+    raw = bytes.fromhex(address)
+    if len(raw) == 4:
+        host = socket.inet_ntop(socket.AF_INET, raw[::-1])
+    else:
+        host = socket.inet_ntop(socket.AF_INET6, b"".join(raw[i:i + 4][::-1] for i in range(0, 16, 4)))
+    return host, int(port, 16)
 
-    while True:
+def _connection_records(args=""):
+    try:
+        import psutil
+        for conn in psutil.net_connections(kind='inet'):
+            proto = ('tcp' if conn.type == socket.SOCK_STREAM else 'udp') + ('6' if conn.family == socket.AF_INET6 else '')
+            local = conn.laddr or ('', 0)
+            remote = conn.raddr or ('', 0)
+            yield ConnectionRecord(proto, local[0], local[1], remote[0], remote[1], conn.status)
+        return
+    except ImportError:
+        pass
+    for proto in ['tcp', 'tcp6', 'udp', 'udp6']:
         try:
-            # Update current directory in case it changed
-            CURRENT_DIR = os.getcwd()
-
-            # Create CMD-style prompt
-            drive = os.path.splitdrive(CURRENT_DIR)[0]
-            if not drive:
-                drive = "~"
+            with open(f'/proc/net/{proto}') as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    local, lport = _decode_proc_address(fields[1])
+                    remote, rport = _decode_proc_address(fields[2])
+                    state = _TCP_STATES.get(fields[3], fields[3]) if proto.startswith('tcp') else ''
+                    yield ConnectionRecord(proto, local, lport, remote, rport, state)
+        except OSError:
+            continue
 
-            prompt = f"{CURRENT_COLOR}{drive}{CURRENT_DIR[len(drive):]}>{COLOR_CODES['default']}"
+RECORD_SOURCES = {
+    'dir': _dir_records,
+    'tasklist': _process_records,
+    'netstat': _connection_records,
+}
 
-            user_input = input(prompt).strip()
+_SIZE_LITERAL = re.compile(r'\b(\d+(?:\.\d+)?)(KB|MB|GB|TB)\b', re.IGNORECASE)
+_PS_OPERATORS = [
+    (r'\s-eq\s', ' == '), (r'\s-ne\s', ' != '), (r'\s-gt\s', ' > '), (r'\s-ge\s', ' >= '),
+    (r'\s-lt\s', ' < '), (r'\s-le\s', ' <= '), (r'\s-and\s', ' and '), (r'\s-or\s', ' or '),
+    (r'\s-not\s', ' not '),
+]
+_PREDICATE_BUILTINS = {
+    'len': len, 'abs': abs, 'min': min, 'max': max, 'str': str, 'int': int, 'float': float,
+    'round': round, 'datetime': datetime, 'True': True, 'False': False, 'None': None,
+    'like': lambda value, pattern: fnmatch.fnmatch(str(value).lower(), pattern.lower()),
+    'match': lambda value, pattern: re.search(pattern, str(value), re.IGNORECASE) is not None,
+    'days_ago': lambda days: datetime.fromtimestamp(time.time() - days * 86400),
+}
 
-            if not user_input:
-                continue
+class PipelineError(ValueError):
+    """A WHERE expression or field lookup failed on a record"""
 
-            # Add to history
-            COMMAND_HISTORY.append(user_input)
+def _guarded(func, stage):
+    """Wrap a per-record function so any error it raises is reported as a PipelineError"""
+    def call(*args):
+        try:
+            return func(*args)
+        except Exception as e:
+            raise PipelineError(f"{stage}: {type(e).__name__}: {e}") from e
+    return call
+
+def _compile_predicate(expression, fields):
+    """Compile a WHERE expression once into a function taking a record's fields positionally.
+
+    Accepts Python expressions plus PowerShell-style -eq/-gt/.../-like/-match
+    operators and size literals such as 10MB.
+    """
+    expression = _SIZE_LITERAL.sub(
+        lambda m: str(int(float(m.group(1)) * 1024 ** ('KMGT'.index(m.group(2)[0].upper()) + 1))), expression)
+    expression = re.sub(r'(\w+)\s+-(like|match)\s+(\'[^\']*\'|"[^"]*")', r'\2(\1, \3)', expression)
+    for pattern, replacement in _PS_OPERATORS:
+        expression = re.sub(pattern, replacement, ' ' + expression + ' ', flags=re.IGNORECASE).strip()
+    return eval(f"lambda {', '.join(fields)}: ({expression})", {'__builtins__': _PREDICATE_BUILTINS})
+
+def _field_key(record_type, names):
+    """Key function for one or more comma separated field names"""
+    fields = [name.strip().lower() for name in names.split(',') if name.strip()]
+    for field in fields:
+        if field not in record_type._fields:
+            raise ValueError(f"Unknown field '{field}'. Fields: {', '.join(record_type._fields)}")
+    return _guarded(operator.attrgetter(*fields), names)
+
+def _pipeline_stage(stage, args, records, record_type):
+    """Apply one stage to a lazy record stream. Returns (records, record_type)."""
+    tokens = args.split()
+    if stage in ('where', 'where-object', '?'):
+        predicate = _guarded(_compile_predicate(args, record_type._fields), args)
+        return (r for r in records if predicate(*r)), record_type
+
+    if stage in ('select', 'select-object'):
+        fields = [f.strip().lower() for f in args.replace(' ', ',').split(',') if f.strip()]
+        key = _field_key(record_type, ','.join(fields))
+        projected = collections.namedtuple('Selected', fields)
+        if len(fields) == 1:
+            return (projected(key(r)) for r in records), projected
+        return (projected(*key(r)) for r in records), projected
+
+    if stage in ('sort', 'sort-object'):
+        descending = bool(tokens) and tokens[-1].lower() in ('desc', '-descending', '/r')
+        fields = [t for t in tokens if t.lower() not in ('asc', 'desc', '-descending', '/r')]
+        key = _field_key(record_type, ','.join(fields) or record_type._fields[0])
+        return iter(sorted(records, key=key, reverse=descending)), record_type
+
+    if stage in ('top', 'bottom'):
+        # top N [by field] [asc]: a bounded heap, never a full sort
+        count = int(tokens[0]) if tokens else 10
+        rest = [t for t in tokens[1:] if t.lower() != 'by']
+        ascending = stage == 'bottom' or (rest and rest[-1].lower() == 'asc')
+        fields = [t for t in rest if t.lower() not in ('asc', 'desc')]
+        key = _field_key(record_type, ','.join(fields) or record_type._fields[0])
+        select = heapq.nsmallest if ascending else heapq.nlargest
+        return iter(select(count, records, key=key)), record_type
+
+    if stage in ('first', 'head', 'select-first'):
+        return itertools.islice(records, int(tokens[0]) if tokens else 10), record_type
+
+    if stage in ('group', 'group-object'):
+        key = _field_key(record_type, args or record_type._fields[0])
+        counts = Counter(key(r) for r in records)
+        return (CountRecord(value, count) for value, count in counts.most_common()), CountRecord
+
+    if stage in ('count', 'measure', 'measure-object'):
+        return iter([CountRecord('count', sum(1 for _ in records))]), CountRecord
+
+    raise ValueError(f"Unknown pipeline stage '{stage}'")
+
+PIPELINE_STAGES = {'where', 'where-object', '?', 'select', 'select-object', 'sort', 'sort-object',
+                   'top', 'bottom', 'first', 'head', 'select-first', 'group', 'group-object',
+                   'count', 'measure', 'measure-object'}
+
+def _split_pipeline(user_input):
+    """Split a command line on | characters that are outside quotes"""
+    return [part.strip() for part in re.findall(r'(?:"[^"]*"|\'[^\']*\'|[^|])+', user_input)]
+
+_GROUPED_FIELDS = {'size', 'memory', 'count'}
+
+def _format_record_value(value, field=''):
+    if isinstance(value, datetime):
+        return value.strftime("%m/%d/%Y  %I:%M %p")
+    if isinstance(value, bool):
+        return 'Yes' if value else ''
+    if isinstance(value, int):
+        return f"{value:,}" if field in _GROUPED_FIELDS else str(value)
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+def _print_records(records, record_type, sample_rows=50):
+    """Print records as a table; column widths come from the first rows so output streams"""
+    first = list(itertools.islice(records, sample_rows))
+    if not first:
+        print("No records.")
+        return
+    columns = record_type._fields
+    rows = [[_format_record_value(v, c) for v, c in zip(r, columns)] for r in first]
+    widths = [max(len(c), *(len(row[i]) for row in rows)) for i, c in enumerate(columns)]
+    numeric = [isinstance(v, (int, float)) and not isinstance(v, bool) for v in first[0]]
+
+    def line(values):
+        return "  ".join(v.rjust(w) if n else v.ljust(w) for v, w, n in zip(values, widths, numeric)).rstrip()
+
+    print(f"{COLOR_CODES['cyan']}{line([c.upper() for c in columns])}{COLOR_CODES['default']}")
+    print("  ".join('-' * w for w in widths))
+    for row in rows:
+        print(line(row))
+    count = len(rows)
+    for record in records:
+        print(line([_format_record_value(v, c) for v, c in zip(record, columns)]))
+        count += 1
+    print(f"{COLOR_CODES['green']}{count:,} record(s){COLOR_CODES['default']}")
+
+def run_pipeline(user_input):
+    """Run 'source | stage | stage ...' when it is an object pipeline. Returns False otherwise."""
+    parts = _split_pipeline(user_input)
+    if len(parts) < 2:
+        return False
+    source, _, source_args = parts[0].partition(' ')
+    source = ALIASES.get(source.lower(), source.lower())
+    stages = [part.partition(' ') for part in parts[1:]]
+    if source not in RECORD_SOURCES or any(stage.lower() not in PIPELINE_STAGES for stage, _, _ in stages):
+        return False
+
+    # "sort f desc | first N" only needs the top N: fuse it into a bounded heap
+    for i in range(len(stages) - 1):
+        (stage, _, args), (following, _, count) = stages[i], stages[i + 1]
+        if stage.lower() in ('sort', 'sort-object') and following.lower() in ('first', 'head', 'select-first'):
+            words = args.split()
+            order = 'asc' if not words or words[-1].lower() not in ('desc', '-descending', '/r') else 'desc'
+            fields = [w for w in words if w.lower() not in ('asc', 'desc', '-descending', '/r')]
+            stages[i:i + 2] = [('top', ' ', f"{count.strip() or 10} by {','.join(fields)} {order}".replace('by  ', ''))]
+            break
 
-            # Parse command and arguments
-            parts = user_input.split(' ', 1)
-            command = parts[0].lower()
-            args = parts[1] if len(parts) > 1 else ""
+    records = RECORD_SOURCES[source](source_args)
+    record_type = {'dir': FileRecord, 'tasklist': ProcessRecord, 'netstat': ConnectionRecord}[source]
+    try:
+        for stage, _, args in stages:
+            records, record_type = _pipeline_stage(stage.lower(), args.strip(), records, record_type)
+        _print_records(records, record_type)
+    except (SyntaxError, ValueError, NameError, TypeError) as e:
+        print(f"{COLOR_CODES['red']}Pipeline error: {e}{COLOR_CODES['default']}")
+        _STATUS.code = 1
+    return True
 
-            # Handle aliases
-            command = ALIASES.get(command, command)
+# ========== BACKGROUND JOBS ==========
+
+_JOB_WORKERS = 8            # jobs beyond this many wait in the queue
+_JOB_OUTPUT_LINES = 2000    # per-job ring buffer size
+_JOB_HISTORY = 50           # finished jobs kept for JOBS/FG
+_JOB_PARTIAL_LIMIT = 65536  # an unterminated output line is split beyond this many characters
+
+class CommandCancelled(Exception):
+    """Raised inside a built-in when its background job has been cancelled"""
+
+_JOB_LOCAL = threading.local()
+_JOB_LOCK = threading.Lock()
+_JOB_POOL = None
+
+def _current_job():
+    return getattr(_JOB_LOCAL, 'job', None)
+
+def _check_cancelled():
+    """Cooperative cancellation point for long-running built-ins"""
+    job = _current_job()
+    if job is not None and job.cancel_event.is_set():
+        raise CommandCancelled()
+
+def _sleep(seconds):
+    """time.sleep that wakes early when the current background job is cancelled"""
+    job = _current_job()
+    if job is None:
+        time.sleep(seconds)
+    elif job.cancel_event.wait(seconds):
+        raise CommandCancelled()
+
+class _RingBuffer:
+    """Write-only text stream keeping only the most recent max_lines lines"""
+
+    def __init__(self, max_lines=_JOB_OUTPUT_LINES):
+        self.lines = collections.deque(maxlen=max_lines)
+        self.partial = ""
+        self.total = 0   # lines ever written; lets followers find new output
+        self.changed = threading.Condition()
+
+    def write(self, text):
+        with self.changed:
+            parts = (self.partial + text).split('\n')
+            # A carriage return redraws the line (progress meters), so only its last state is kept
+            parts = [part.rsplit('\r', 1)[-1] if '\r' in part else part for part in parts]
+            partial = parts.pop()
+            while len(partial) > _JOB_PARTIAL_LIMIT:
+                parts.append(partial[:_JOB_PARTIAL_LIMIT])
+                partial = partial[_JOB_PARTIAL_LIMIT:]
+            self.partial = partial
+            self.lines.extend(parts)
+            self.total += len(parts)
+            self.changed.notify_all()
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+    def close(self):
+        with self.changed:
+            if self.partial:
+                self.lines.append(self.partial)
+                self.total += 1
+                self.partial = ""
+            self.changed.notify_all()
+
+    def since(self, seen):
+        """Return (lines written after the first `seen` that are still buffered, new total)"""
+        with self.changed:
+            first = self.total - len(self.lines)
+            return list(itertools.islice(self.lines, max(seen - first, 0), None)), self.total
+
+class Job:
+    """A command running on the background worker pool"""
+
+    def __init__(self, job_id, command, target, session):
+        self.id = job_id
+        self.command = command
+        self.target = target
+        self.session = session  # snapshot of the starting session's directory, environment and code page
+        self.output = _RingBuffer()
+        self.cancel_event = threading.Event()
+        self.finished_event = threading.Event()
+        self.state = 'Queued'
+        self.started = None
+        self.finished = None
+        self.reported = False
+        self.future = None
+
+    @property
+    def done(self):
+        return self.finished_event.is_set()
+
+    def run(self):
+        _JOB_LOCAL.job = self
+        sys.stdout.redirect(self.output)
+        sys.stdin.redirect(io.StringIO())
+        self.started = time.time()
+        self.state = 'Running'
+        try:
+            if not self.cancel_event.is_set():
+                with activate_session(self.session, lock_cwd=False):
+                    self.target()
+            self.state = 'Cancelled' if self.cancel_event.is_set() else 'Done'
+        except (CommandCancelled, KeyboardInterrupt):
+            self.state = 'Cancelled'
+        except Exception as e:
+            self.state = 'Failed'
+            print(f"Error: {e}")
+        finally:
+            self.output.close()
+            sys.stdout.reset()
+            sys.stdin.reset()
+            _JOB_LOCAL.job = None
+            self.finished = time.time()
+            self.finished_event.set()
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.future is not None and self.future.cancel():
+            self.state = 'Cancelled'
+            self.finished = time.time()
+            self.finished_event.set()
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+def start_job(command, target=None):
+    """Queue a command line (or a callable labelled by command) on the job pool.
+
+    The job runs in a snapshot of the calling session's directory, environment
+    and code page, and is listed in that session's job table only.
+    """
+    global _JOB_POOL
+    _install_stream_proxies()
+    if target is None:
+        target = lambda: run_command(command)
+    session = _session()
+    snapshot = Session(os.getcwd(), session.env, session.code_page)
+    jobs = session.jobs
+    with _JOB_LOCK:
+        if _JOB_POOL is None:
+            _JOB_POOL = ThreadPoolExecutor(max_workers=_JOB_WORKERS, thread_name_prefix='terminalx-job')
+        finished = [j for j in jobs.values() if j.done]
+        for old in finished[:max(0, len(finished) - _JOB_HISTORY)]:
+            del jobs[old.id]
+        job = Job(next(session.job_ids), command, target, snapshot)
+        jobs[job.id] = job
+        job.future = _JOB_POOL.submit(job.run)
+    return job
+
+def _find_job(spec):
+    """Look up a job by id ('3' or '%3'); the most recent job when spec is empty"""
+    jobs = _session().jobs
+    if not spec:
+        return jobs[max(jobs)] if jobs else None
+    try:
+        return jobs.get(int(str(spec).lstrip('%')))
+    except ValueError:
+        return None
+
+def report_finished_jobs():
+    """Announce background jobs that finished since the last prompt"""
+    for job in list(_session().jobs.values()):
+        if job.done and not job.reported:
+            job.reported = True
+            print(f"{COLOR_CODES['cyan']}[{job.id}] {job.state:<10} {job.command}{COLOR_CODES['default']}")
+
+def cmd_start(args=""):
+    """Run a command as a background job (equivalent to Windows START /B)"""
+    switches, _ = _parse_switches(args.split(' ', 1)[0] if args.strip().upper().startswith('/B') else "")
+    command = args.strip()[2:].strip() if 'B' in switches else args.strip()
+    if not command or command == '/?':
+        print("START [/B] command")
+        print()
+        print("  Runs command as a background job. Its output is kept in a bounded")
+        print("  buffer; use JOBS, FG and WAIT to follow it and JOBS /K to cancel.")
+        return
+    job = start_job(command)
+    print(f"[{job.id}] {job.command}")
+
+def cmd_jobs(args=""):
+    """List background jobs or cancel one with /K:id"""
+    switches, _ = _parse_switches(args)
+    if '?' in switches:
+        print("JOBS [/K:id]")
+        print()
+        print("  Lists background jobs. /K cancels the job with the given id.")
+        return
+    if 'K' in switches:
+        job = _find_job(switches['K'] if isinstance(switches['K'], str) else None)
+        if job is None:
+            print(f"{COLOR_CODES['red']}No such job.{COLOR_CODES['default']}")
+            return
+        job.cancel()
+        print(f"Cancelling job [{job.id}] {job.command}")
+        return
+    jobs = list(_session().jobs.values())
+    if not jobs:
+        print("No background jobs.")
+        return
+    print(f"{COLOR_CODES['cyan']}{'ID':>4}  {'State':<10} {'Elapsed':>9}  Command{COLOR_CODES['default']}")
+    for job in jobs:
+        print(f"{job.id:>4}  {job.state:<10} {job.elapsed():>8.1f}s  {job.command}")
+        if job.done:
+            job.reported = True
+
+def cmd_fg(args=""):
+    """Show a job's buffered output and follow it until it finishes"""
+    job = _find_job(args.strip())
+    if job is None:
+        print(f"{COLOR_CODES['red']}No such job.{COLOR_CODES['default']}")
+        return
+    print(f"{COLOR_CODES['cyan']}[{job.id}] {job.command}{COLOR_CODES['default']}")
+    seen = 0
+    try:
+        while True:
+            lines, seen = job.output.since(seen)
+            for line in lines:
+                print(line)
+            if job.done and job.output.since(seen)[1] == seen:
+                break
+            with job.output.changed:
+                job.output.changed.wait(0.5)
+    except KeyboardInterrupt:
+        job.cancel()
+        job.finished_event.wait()
+        print("^C")
+    job.reported = True
+    print(f"{COLOR_CODES['cyan']}[{job.id}] {job.state}{COLOR_CODES['default']}")
+
+def cmd_wait(args=""):
+    """Wait for background jobs to finish (all running jobs by default)"""
+    specs = args.split()
+    jobs = [_find_job(spec) for spec in specs] if specs else [j for j in list(_session().jobs.values()) if not j.done]
+    try:
+        for job in jobs:
+            if job is None:
+                print(f"{COLOR_CODES['red']}No such job.{COLOR_CODES['default']}")
+                continue
+            while not job.finished_event.wait(0.5):
+                pass
+            job.reported = True
+            print(f"[{job.id}] {job.state:<10} {job.command}")
+    except KeyboardInterrupt:
+        print("^C")
+
+# ========== LOOPS AND PARALLEL EXECUTION ==========
+
+_FOR_SYNTAX = re.compile(
+    r'^(?:/(?P<mode>[FLD])\s+(?:"(?P<options>[^"]*)"\s+)?)?%%?(?P<var>[A-Za-z])\s+'
+    r'IN\s*\((?P<set>.*)\)\s+DO\s+(?P<command>.+)$',
+    re.IGNORECASE | re.DOTALL)
+
+def _parse_for_options(options):
+    """Parse FOR /F options such as "tokens=1,3* delims=, skip=1 eol=#" """
+    parsed = {'tokens': [1], 'rest': False, 'delims': ' \t', 'skip': 0, 'eol': ';'}
+    match = re.search(r'delims=(.*?)(?=\s+(?:tokens|skip|eol|usebackq)\b|$)', options, re.IGNORECASE)
+    if match:
+        parsed['delims'] = match.group(1)
+        options = options[:match.start()] + options[match.end():]
+    for key, value in re.findall(r'(\w+)=(\S*)', options):
+        key = key.lower()
+        if key == 'tokens':
+            if value == '*':
+                parsed['tokens'], parsed['rest'] = [], True
+                continue
+            parsed['rest'] = value.endswith('*')
+            tokens = []
+            for part in value.rstrip('*').split(','):
+                if '-' in part:
+                    low, high = part.split('-')
+                    tokens.extend(range(int(low), int(high) + 1))
+                elif part:
+                    tokens.append(int(part))
+            parsed['tokens'] = tokens
+        elif key == 'skip':
+            parsed['skip'] = int(value)
+        elif key == 'eol':
+            parsed['eol'] = value[:1]
+    return parsed
+
+def _for_f_variables(line, var, options):
+    """Split one FOR /F input line into {%var: token, %next_var: token, ...} or None to skip"""
+    if not line or (options['eol'] and line.startswith(options['eol'])):
+        return None
+    delims = options['delims']
+    if delims:
+        fields = [f for f in re.split('[' + re.escape(delims) + ']+', line) if f]
+    else:
+        fields = [line]
+    if not fields:
+        return None
+    values = [fields[i - 1] if i <= len(fields) else "" for i in options['tokens']]
+    if options['rest']:
+        consumed = max(options['tokens'], default=0)
+        if delims:
+            rest = re.split('[' + re.escape(delims) + ']+', line.lstrip(delims), maxsplit=consumed)
+            values.append(rest[consumed] if len(rest) > consumed else "")
+        else:
+            values.append(line)
+    letters = string.ascii_letters
+    start = letters.index(var)
+    return {letters[(start + i) % len(letters)]: value for i, value in enumerate(values)}
+
+def _for_items(mode, options, var, item_set):
+    """Yield the variable bindings for each FOR iteration, lazily"""
+    mode = (mode or '').upper()
+    item_set = item_set.strip()
+    if mode == 'L':
+        start, step, end = (int(v) for v in re.split(r'[,\s]+', item_set)[:3])
+        value = start
+        while (step > 0 and value <= end) or (step < 0 and value >= end):
+            yield {var: str(value)}
+            value += step
+        return
+    if mode == 'F':
+        options = _parse_for_options(options or "")
+        if item_set.startswith("'") and item_set.endswith("'"):
+            output, _ = capture_command(item_set[1:-1])
+            lines = iter(output.splitlines())
+        elif item_set.startswith('"') and item_set.endswith('"'):
+            lines = iter([item_set[1:-1]])
+        else:
+            def file_lines():
+                for filename in _split_args(item_set):
+                    with _open_text(filename) as f:
+                        for line in f:
+                            yield line.rstrip('\r\n')
+            lines = file_lines()
+        for _ in zip(range(options['skip']), lines):
+            pass
+        for line in lines:
+            variables = _for_f_variables(line, var, options)
+            if variables is not None:
+                yield variables
+        return
+    for item in _split_args(item_set):
+        if any(c in item for c in '*?'):
+            for path in sorted(glob.iglob(item)):
+                if (mode == 'D') == os.path.isdir(path):
+                    yield {var: path}
+        else:
+            yield {var: item}
+
+def _substitute_for(command, variables):
+    return re.sub(r'%%?([A-Za-z])', lambda m: variables.get(m.group(1), m.group(0)), command)
+
+def _fan_out(commands, jobs, keep_order=False, use_processes=False):
+    """Run command lines concurrently, yielding (command, output, status) per item.
+
+    At most a small multiple of `jobs` items are in flight, so FOR /F over a
+    huge file streams. Output is yielded whole per item, either in input
+    order (keep_order) or as items complete.
+    """
+    if use_processes:
+        pool = ProcessPoolExecutor(max_workers=jobs, mp_context=_process_context())
+        cwd, env = os.getcwd(), dict(ENVIRONMENT_VARS)
+        submit = lambda line: pool.submit(_capture_in_process, line, cwd, env)
+    else:
+        pool = ThreadPoolExecutor(max_workers=jobs)
+        capture = _bind_session(capture_command)
+        submit = lambda line: pool.submit(capture, line)
 
-            # Execute command
-            if command in commands:
-                result = commands[command](args)
-                if result is True:  # Exit command
-                    break
+    def result(future, line):
+        try:
+            output, status = future.result()
+        except Exception as e:
+            output, status = f"Error: {e}\n", 1
+        return line, output, status
+
+    with pool:
+        pending = collections.OrderedDict()
+        for line in commands:
+            _check_cancelled()
+            pending[submit(line)] = line
+            while len(pending) >= jobs * 4:
+                if keep_order:
+                    future, first = pending.popitem(last=False)
+                    yield result(future, first)
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield result(future, pending.pop(future))
+        while pending:
+            _check_cancelled()
+            if keep_order:
+                future, first = pending.popitem(last=False)
+                yield result(future, first)
             else:
-                # Try to execute as system command
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield result(future, pending.pop(future))
+
+def _run_for(args, jobs=None, keep_order=False, use_processes=False):
+    match = _FOR_SYNTAX.match(args.strip())
+    if not match:
+        print("The syntax of the command is incorrect.")
+        print("FOR [/L | /D | /F [\"options\"]] %variable IN (set) DO command")
+        return
+    var = match.group('var')
+    template = match.group('command').strip()
+    try:
+        items = _for_items(match.group('mode'), match.group('options'), var, match.group('set'))
+        commands = (_substitute_for(template, variables) for variables in items)
+
+        failures = []
+        count = 0
+        if jobs is None:
+            for line in commands:
+                _check_cancelled()
+                count += 1
                 try:
-                    os.system(user_input)
+                    run_command(line)
+                    status = last_status()
+                except CommandCancelled:
+                    raise
                 except Exception as e:
-                    print(f"{COLOR_CODES['red']}'{command}' is not recognized as an internal or external command,")
-                    print(f"operable program or batch file.{COLOR_CODES['default']}")
+                    print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+                    status = 1
+                if status:
+                    failures.append((line, status))
+        else:
+            for line, output, status in _fan_out(commands, jobs, keep_order, use_processes):
+                count += 1
+                sys.stdout.write(output)
+                if status:
+                    failures.append((line, status))
+    except (OSError, ValueError) as e:
+        print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+        _STATUS.code = 1
+        return
+
+    if failures:
+        print(f"{COLOR_CODES['red']}{len(failures)} of {count} iteration(s) failed:{COLOR_CODES['default']}")
+        for line, status in failures[:20]:
+            print(f"  [{status}] {line}")
+        if len(failures) > 20:
+            print(f"  ... and {len(failures) - 20} more.")
+    _STATUS.code = max((status for _, status in failures), default=0)
+    ENVIRONMENT_VARS['ERRORLEVEL'] = str(_STATUS.code)
+
+def cmd_for(args=""):
+    """Run a command for each item in a set (equivalent to Windows FOR command)"""
+    if not args.strip() or args.strip() == '/?':
+        print("FOR %variable IN (set) DO command")
+        print("FOR /D %variable IN (set) DO command")
+        print("FOR /L %variable IN (start,step,end) DO command")
+        print("FOR /F [\"options\"] %variable IN (file-set | \"string\" | 'command') DO command")
+        print()
+        print("  options: tokens=1,2* delims=,; skip=n eol=c")
+        print("  Use PARALLEL to run the iterations concurrently.")
+        return
+    _run_for(args)
+
+def cmd_parallel(args=""):
+    """Run the iterations of a FOR loop concurrently on a thread or process pool"""
+    tokens = args.strip().split()
+    jobs = os.cpu_count() or 1
+    keep_order = use_processes = False
+    while tokens and tokens[0].startswith('-'):
+        flag = tokens.pop(0).lower()
+        if flag == '-j' and tokens:
+            try:
+                jobs = max(1, int(tokens.pop(0)))
+            except ValueError:
+                tokens = []
+        elif flag == '-k':
+            keep_order = True
+        elif flag == '-p':
+            use_processes = True
+        else:
+            tokens = []
+    if not tokens or tokens[0].lower() != 'for':
+        print("PARALLEL [-j N] [-k] [-p] FOR ... DO command")
+        print()
+        print("  -j N  Number of iterations run at once (default: CPU count).")
+        print("  -k    Print each item's output in input order instead of as it completes.")
+        print("  -p    Use a process pool, for CPU-bound built-ins such as hashing.")
+        return
+    # Everything after the options and the FOR keyword is the loop itself
+    consumed = len(args.split()) - len(tokens) + 1
+    _run_for(args.strip().split(None, consumed)[-1], jobs, keep_order, use_processes)
+
+# ========== COMMAND DISPATCH ==========
+
+# Built-in commands by group, mapped to the names of their functions in this
+# module. Every built-in is defined when the module loads; the registry only
+# groups them and gives plugins a way in. Plugins register "module:function"
+# targets (or entry points), which are imported when first run.
+COMMAND_GROUPS = {
+    'file': {
+        'dir': 'cmd_dir',
+        'cd': 'cmd_cd',
+        'md': 'cmd_md',
+        'mkdir': 'cmd_md',
+        'rd': 'cmd_rd',
+        'rmdir': 'cmd_rd',
+        'copy': 'cmd_copy',
+        'move': 'cmd_move',
+        'del': 'cmd_del',
+        'delete': 'cmd_del',
+        'ren': 'cmd_ren',
+        'rename': 'cmd_ren',
+        'type': 'cmd_type',
+        'more': 'cmd_more',
+        'split': 'cmd_split',
+        'join': 'cmd_join',
+        'hexdump': 'cmd_hexdump',
+        'format-hex': 'cmd_hexdump',
+        'tree': 'cmd_tree',
+        'attrib': 'cmd_attrib',
+    },
+    'system': {
+        'ver': 'cmd_ver',
+        'version': 'cmd_ver',
+        'systeminfo': 'cmd_systeminfo',
+        'perfmon': 'cmd_perfmon',
+        'top': 'cmd_perfmon',
+        'winsat': 'cmd_winsat',
+        'diskbench': 'cmd_winsat',
+        'hostname': 'cmd_hostname',
+        'whoami': 'cmd_whoami',
+        'date': 'cmd_date',
+        'time': 'cmd_time',
+        'diskpart': 'cmd_diskpart',
+    },
+    'process': {
+        'tasklist': 'cmd_tasklist',
+        'taskkill': 'cmd_taskkill',
+    },
+    'network': {
+        'ipconfig': 'cmd_ipconfig',
+        'ping': 'cmd_ping',
+        'netstat': 'cmd_netstat',
+        'nslookup': 'cmd_nslookup',
+        'curl': 'cmd_curl',
+        'wget': 'cmd_wget',
+        'serve': 'cmd_serve',
+        'netperf': 'cmd_netperf',
+    },
+    'text': {
+        'locate': 'cmd_locate',
+        'index': 'cmd_index',
+        'findstr': 'cmd_findstr',
+        'find': 'cmd_findstr',
+        'sort': 'cmd_sort',
+        'fc': 'cmd_fc',
+        'wc': 'cmd_wc',
+        'uniq': 'cmd_uniq',
+        'topk': 'cmd_topk',
+        'distinct': 'cmd_distinct',
+        'chcp': 'cmd_chcp',
+        'iconv': 'cmd_iconv',
+    },
+    'archive': {
+        'compact': 'cmd_compact',
+    },
+    'security': {
+        'cipher': 'cmd_cipher',
+    },
+    'environment': {
+        'set': 'cmd_set',
+        'path': 'cmd_path',
+        'echo': 'cmd_echo',
+    },
+    'batch': {
+        'for': 'cmd_for',
+        'parallel': 'cmd_parallel',
+    },
+    'jobs': {
+        'start': 'cmd_start',
+        'jobs': 'cmd_jobs',
+        'fg': 'cmd_fg',
+        'wait': 'cmd_wait',
+        'schtasks': 'cmd_schtasks',
+        'at': 'cmd_at',
+    },
+    'utility': {
+        'where': 'cmd_where',
+        'timeout': 'cmd_timeout',
+        'title': 'cmd_title',
+        'color': 'cmd_color',
+        'help': 'cmd_help',
+        'cls': 'cmd_clear',
+        'clear': 'cmd_clear',
+        'exit': 'cmd_quit',
+        'quit': 'cmd_quit',
+    },
+}
+
+# Third-party packages can add commands with an entry point in this group,
+# e.g. ``mycmd = mypackage.commands:cmd_mycmd``.
+PLUGIN_ENTRY_POINT_GROUP = 'terminalx.commands'
+
+_COMMAND_INDEX = {name: target for group in COMMAND_GROUPS.values() for name, target in group.items()}
+_RESOLVED_COMMANDS = {}
+_PLUGINS_DISCOVERED = False
+
+def register_command(name, target, group='plugins'):
+    """Register a command under a group.
+
+    target may be a callable, a "module:function" string imported on first
+    use, or an importlib.metadata EntryPoint.
+    """
+    name = name.lower()
+    COMMAND_GROUPS.setdefault(group, {})[name] = target
+    _COMMAND_INDEX[name] = target
+    _RESOLVED_COMMANDS.pop(name, None)
+
+def discover_plugins():
+    """Index entry-point commands by name without importing them"""
+    global _PLUGINS_DISCOVERED
+    if _PLUGINS_DISCOVERED:
+        return
+    _PLUGINS_DISCOVERED = True
+    try:
+        from importlib.metadata import entry_points
+        found = entry_points()
+        if hasattr(found, 'select'):
+            found = found.select(group=PLUGIN_ENTRY_POINT_GROUP)
+        else:
+            found = found.get(PLUGIN_ENTRY_POINT_GROUP, [])
+    except Exception:
+        return
+    for entry_point in found:
+        if entry_point.name.lower() not in _COMMAND_INDEX:
+            register_command(entry_point.name, entry_point)
+
+def resolve_command(name):
+    """Return the function for a command name (importing plugin targets on first use), or None"""
+    func = _RESOLVED_COMMANDS.get(name)
+    if func is not None:
+        return func
+
+    target = _COMMAND_INDEX.get(name)
+    if target is None:
+        discover_plugins()
+        target = _COMMAND_INDEX.get(name)
+        if target is None:
+            return None
+
+    if hasattr(target, 'load'):
+        func = target.load()
+    elif callable(target):
+        func = target
+    elif ':' in target:
+        import importlib
+        module_name, attr = target.split(':', 1)
+        func = getattr(importlib.import_module(module_name), attr)
+    else:
+        func = globals()[target]
+    _RESOLVED_COMMANDS[name] = func
+    return func
+
+def build_prompt():
+    """CMD-style prompt for the current directory"""
+    cwd = os.getcwd()
+    drive = os.path.splitdrive(cwd)[0]
+    if not drive:
+        drive = "~"
+    return f"{_session().color}{drive}{cwd[len(drive):]}>{COLOR_CODES['default']}"
+
+def execute_command(user_input):
+    """Parse and run one command line. Returns True when the session should end."""
+    # Add to history
+    COMMAND_HISTORY.append(user_input)
+    return run_command(user_input)
+
+_STATUS = threading.local()
+
+def last_status():
+    """Exit status of the last command run on this thread (0 for built-ins that return)"""
+    return getattr(_STATUS, 'code', 0)
+
+def run_command(user_input):
+    """Run one command line without recording history. Returns True on exit."""
+    # Parse command and arguments
+    parts = user_input.strip().split(' ', 1)
+    command = parts[0].lower()
+    args = parts[1] if len(parts) > 1 else ""
+
+    # Handle aliases
+    command = ALIASES.get(command, command)
+
+    # Execute command
+    _STATUS.code = 0
+    if '|' in args and run_pipeline(user_input):
+        return False
+    func = resolve_command(command)
+    if func is not None:
+        return func(args) is True
+
+    # Try to execute as system command
+    try:
+        _STATUS.code = _run_external(user_input, shell=True)
+    except Exception as e:
+        _STATUS.code = 9009
+        print(f"{COLOR_CODES['red']}'{command}' is not recognized as an internal or external command,")
+        print(f"operable program or batch file.{COLOR_CODES['default']}")
+    return False
+
+def capture_command(user_input):
+    """Run a command line with its output captured. Returns (output, status)."""
+    _install_stream_proxies()
+    buffer = io.StringIO()
+    previous = getattr(sys.stdout._local, 'stream', None)
+    sys.stdout.redirect(buffer)
+    try:
+        run_command(user_input)
+        status = last_status()
+    except CommandCancelled:
+        raise
+    except Exception as e:
+        print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+        status = 1
+    finally:
+        sys.stdout.redirect(previous)
+    return buffer.getvalue(), status
+
+def _capture_in_process(user_input, cwd, env):
+    """Process-pool entry point: run a command line in a worker's own cwd/environment"""
+    os.chdir(cwd)
+    ENVIRONMENT_VARS.clear()
+    ENVIRONMENT_VARS.update(env)
+    return capture_command(user_input)
+
+# ========== SESSIONS AND SERVER MODE ==========
+
+class Session:
+    """Per-client state: working directory, environment, history, prompt colour and code page"""
+
+    def __init__(self, cwd=None, env=None, code_page=None):
+        self.cwd = cwd or os.getcwd()
+        self.env = dict(os.environ if env is None else env)
+        self.history = []
+        self.color = CURRENT_COLOR
+        self.code_page = code_page
+        self.jobs = {}
+        self.job_ids = itertools.count(1)
+
+# The console's state; threads that never activate a session (the main loop
+# and anything it starts without binding) use this one.
+_CONSOLE_SESSION = Session()
+
+def _session():
+    """The Session whose environment, history and code page the calling thread uses"""
+    return getattr(_SESSION_LOCAL, 'session', None) or _CONSOLE_SESSION
+
+def _bind_session(func):
+    """Wrap func so it runs with the caller's session, output and job when called on a worker thread.
+
+    Redirected output (server sessions, background jobs) is per thread, so
+    without this a worker's progress lines would go to the server's console.
+    """
+    session = _session()
+    job = _current_job()
+    stream = sys.stdout.current if _stdout_redirected() else None
+
+    def call(*args, **kwargs):
+        previous = getattr(_SESSION_LOCAL, 'session', None), _current_job()
+        _SESSION_LOCAL.session, _JOB_LOCAL.job = session, job
+        if stream is not None:
+            previous_stream = getattr(sys.stdout._local, 'stream', None)
+            sys.stdout.redirect(stream)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _SESSION_LOCAL.session, _JOB_LOCAL.job = previous
+            if stream is not None:
+                sys.stdout.redirect(previous_stream)
+    return call
+
+class _SessionEnvironment(collections.abc.MutableMapping):
+    """ENVIRONMENT_VARS: a view of the calling thread's session environment"""
+
+    def __getitem__(self, key):
+        return _session().env[key]
+
+    def __setitem__(self, key, value):
+        _session().env[key] = value
+
+    def __delitem__(self, key):
+        del _session().env[key]
+
+    def __iter__(self):
+        return iter(_session().env)
+
+    def __len__(self):
+        return len(_session().env)
+
+    def __repr__(self):
+        return repr(_session().env)
+
+class _SessionHistory(collections.abc.MutableSequence):
+    """COMMAND_HISTORY: a view of the calling thread's session history"""
+
+    def __getitem__(self, index):
+        return _session().history[index]
+
+    def __setitem__(self, index, value):
+        _session().history[index] = value
+
+    def __delitem__(self, index):
+        del _session().history[index]
+
+    def __len__(self):
+        return len(_session().history)
+
+    def insert(self, index, value):
+        _session().history.insert(index, value)
+
+def _cancel_jobs(session):
+    """Cancel a session's unfinished background jobs (when it exits)"""
+    for job in list(session.jobs.values()):
+        if not job.done:
+            job.cancel()
+
+ENVIRONMENT_VARS = _SessionEnvironment()
+COMMAND_HISTORY = _SessionHistory()
+
+# Sessions keep their own working directory by giving each session thread a
+# private fs context (Linux unshare(CLONE_FS)); threads it starts share it.
+# Where that is unavailable, the process cwd is swapped in under a lock for
+# the duration of each command.
+_CLONE_FS = 0x00000200
+_SESSION_LOCK = threading.RLock()
+
+def _private_cwd():
+    """Give the calling thread its own working directory. Returns False if unsupported."""
+    private = getattr(_SESSION_LOCAL, 'private_cwd', None)
+    if private is None:
+        private = False
+        if sys.platform.startswith('linux'):
+            try:
+                import ctypes
+                private = ctypes.CDLL(None, use_errno=True).unshare(_CLONE_FS) == 0
+            except (OSError, AttributeError):
+                pass
+        _SESSION_LOCAL.private_cwd = private
+    return private
+
+@contextlib.contextmanager
+def activate_session(session, lock_cwd=True):
+    """Run the calling thread's next command in session's directory and environment.
+
+    Without per-thread working directories, lock_cwd=False leaves the process
+    cwd alone instead of serialising on it (background jobs use this).
+    """
+    previous = getattr(_SESSION_LOCAL, 'session', None)
+    private = _private_cwd()
+    lock = _SESSION_LOCK if not private and lock_cwd else contextlib.nullcontext()
+    with lock:
+        saved = None if private else os.getcwd()
+        if private or lock_cwd:
+            try:
+                os.chdir(session.cwd)
+            except OSError:
+                session.cwd = os.getcwd()
+        _SESSION_LOCAL.session = session
+        try:
+            yield session
+        finally:
+            _SESSION_LOCAL.session = previous
+            session.cwd = os.getcwd()
+            if saved is not None and lock_cwd:
+                with contextlib.suppress(OSError):
+                    os.chdir(saved)
+
+def _default_socket_path():
+    """$XDG_RUNTIME_DIR/terminalx.sock, or else a socket in a private (0700) per-user temp directory"""
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime and os.path.isdir(runtime):
+        return os.path.join(runtime, 'terminalx.sock')
+    directory = os.path.join(tempfile.gettempdir(), f"terminalx-{os.getuid()}")
+    with contextlib.suppress(FileExistsError):
+        os.mkdir(directory, 0o700)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(errno.EACCES, "not a private directory owned by you", directory)
+    return os.path.join(directory, 'terminalx.sock')
+
+def _check_socket_owner(socket_path):
+    """Refuse a socket file that is not a socket owned by the current user"""
+    info = os.lstat(socket_path)
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(errno.EACCES, "not a socket owned by you", socket_path)
+
+def _peer_uid(sock):
+    """Uid of the process at the other end of a Unix socket (None without SO_PEERCRED)"""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    credentials = struct.Struct('3i')  # struct ucred: pid, uid, gid
+    return credentials.unpack(sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, credentials.size))[1]
+
+def _run_client_session(rfile, wfile, home):
+    """Run one attached client as an independent TerminalX session"""
+    session = Session(cwd=home)
+    out = io.TextIOWrapper(wfile, encoding='utf-8', errors='replace', write_through=True)
+    inp = io.TextIOWrapper(rfile, encoding='utf-8', errors='replace')
+    sys.stdout.redirect(out)
+    sys.stdin.redirect(inp)
+    try:
+        print(f"{COLOR_CODES['bright_green']}TerminalX [Version X.1] - attached to {HOST_NAME} "
+              f"(pid {os.getpid()}){COLOR_CODES['default']}")
+        while True:
+            with activate_session(session):
+                report_finished_jobs()
+                prompt = build_prompt()
+            out.write(prompt)
+            line = inp.readline()
+            if not line:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                with activate_session(session):
+                    if execute_command(line):
+                        break
+            except Exception as e:
+                print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
+    except (BrokenPipeError, ConnectionResetError, ValueError):
+        pass
+    finally:
+        _cancel_jobs(session)
+        sys.stdout.reset()
+        sys.stdin.reset()
+
+def serve_sessions(socket_path):
+    """Listen on a Unix domain socket and serve each client as its own session"""
+    if os.path.lexists(socket_path):
+        try:
+            _check_socket_owner(socket_path)
+        except PermissionError as e:
+            print(f"{COLOR_CODES['red']}Cannot serve on {socket_path}: {e.strerror}{COLOR_CODES['default']}")
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            print(f"{COLOR_CODES['red']}A TerminalX server is already listening on {socket_path}.{COLOR_CODES['default']}")
+            return
+        except OSError:
+            os.remove(socket_path)  # stale socket from a previous server
+        finally:
+            probe.close()
+
+
+    class SessionHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            if _peer_uid(self.connection) not in (None, os.getuid()):
+                return  # only the user who started the server may attach
+            _run_client_session(self.rfile, self.wfile, self.server.home)
+
+    class SessionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    _install_stream_proxies()
+    old_umask = os.umask(0o177)
+    try:
+        server = SessionServer(socket_path, SessionHandler)
+    finally:
+        os.umask(old_umask)
+    server.home = os.getcwd()
+    start_scheduler()
+    print(f"{COLOR_CODES['green']}TerminalX server listening on {socket_path} (Ctrl+C to stop){COLOR_CODES['default']}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("^C")
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+def attach_session(socket_path):
+    """Thin client: relay the terminal to a running TerminalX server"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        _check_socket_owner(socket_path)
+        sock.connect(socket_path)
+        if _peer_uid(sock) not in (None, os.getuid()):
+            raise PermissionError(errno.EACCES, "the server runs as another user")
+    except OSError as e:
+        print(f"Cannot attach to {socket_path}: {e}")
+        sock.close()
+        return
+
+    def send_input():
+        try:
+            for line in sys.stdin:
+                sock.sendall(line.encode('utf-8'))
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+    threading.Thread(target=send_input, daemon=True).start()
+    try:
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+
+# ========== MAIN TERMINAL LOOP ==========
+
+def main():
+    """Main terminal loop"""
+    cmd_clear()
+    show_banner()
+    start_scheduler()
+
+    while True:
+        try:
+            report_finished_jobs()
+
+            user_input = input(build_prompt()).strip()
+
+            if not user_input:
+                continue
+
+            if execute_command(user_input):  # Exit command
+                break
 
         except KeyboardInterrupt:
             print(f"^C")
@@ -1158,6 +7076,18 @@ def main():
         except Exception as e:
             print(f"{COLOR_CODES['red']}Error: {e}{COLOR_CODES['default']}")
 
-if __name__ == '__main__':
-    main()
+    # Stop long-running jobs (e.g. SERVE) so interpreter exit does not wait on them
+    _cancel_jobs(_CONSOLE_SESSION)
 
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] in ('--server', '--attach'):
+        try:
+            path = sys.argv[2] if len(sys.argv) > 2 else _default_socket_path()
+        except OSError as e:
+            sys.exit(f"Cannot use the default socket directory: {e}")
+        if sys.argv[1] == '--server':
+            serve_sessions(path)
+        else:
+            attach_session(path)
+    else:
+        main()
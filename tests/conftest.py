@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# TerminalX keeps its state under ~/.terminalx; keep the suite's out of the real home
+os.environ['HOME'] = tempfile.mkdtemp(prefix='terminalx-home-')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
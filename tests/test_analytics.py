@@ -0,0 +1,45 @@
+import functools
+
+import pytest
+
+import TerminalX
+
+
+@pytest.fixture
+def split_ranges(monkeypatch):
+    """Split even small files into four ranges, each counted in its own worker process"""
+    monkeypatch.setattr(TerminalX.os, 'cpu_count', lambda: 4)
+    monkeypatch.setattr(TerminalX, '_line_aligned_ranges',
+                        functools.partial(TerminalX._line_aligned_ranges, threshold=0))
+
+
+@pytest.fixture
+def records(tmp_path):
+    path = tmp_path / 'records.csv'
+    with open(path, 'w') as f:
+        for i in range(200000):
+            f.write(f"user{i % 5000},item{i % 37},{i}\n")
+    return path
+
+
+def test_distinct_across_workers(split_ranges, records):
+    output, status = TerminalX.capture_command(f'DISTINCT -f 1 -d , "{records}"')
+    assert status == 0
+    estimate = int(output.strip().lstrip('~').split()[0].replace(',', ''))
+    assert abs(estimate - 5000) < 5000 * 0.03
+
+
+def test_hll_registers_match_across_processes(split_ranges, records):
+    size = records.stat().st_size
+    local = TerminalX._hll_range(str(records), 0, size, 1, b',', TerminalX._HLL_PRECISION)
+    merged = bytearray(len(local))
+    for partial in TerminalX._run_ranges(TerminalX._hll_range, str(records), 1, b',', TerminalX._HLL_PRECISION):
+        merged = bytearray(map(max, merged, partial))
+    assert bytes(merged) == local
+
+
+def test_wc_across_workers(split_ranges, records):
+    output, status = TerminalX.capture_command(f'WC "{records}"')
+    assert status == 0
+    lines, words, size = output.split()[:3]
+    assert (int(lines.replace(',', '')), int(size.replace(',', ''))) == (200000, records.stat().st_size)
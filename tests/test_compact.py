@@ -0,0 +1,47 @@
+import gzip
+
+import pytest
+
+import TerminalX
+
+TEXT = "".join(f"{i:08d} the quick brown fox jumps over the lazy dog\r\n" for i in range(20000)).encode()
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_bytes(TEXT)
+    return path
+
+
+def test_round_trip(log):
+    _, status = TerminalX.capture_command(f'COMPACT /C /Q "{log}"')
+    assert status == 0
+    compacted = log.read_bytes()
+    assert len(compacted) < len(TEXT) // 4
+    assert gzip.decompress(compacted) == TEXT
+    assert TerminalX._compact_size(compacted[:TerminalX._COMPACT_HEADER.size]) == len(TEXT)
+    with TerminalX._open_binary(str(log)) as f:
+        assert f.read() == TEXT
+
+    _, status = TerminalX.capture_command(f'COMPACT /U /Q "{log}"')
+    assert status == 0
+    assert log.read_bytes() == TEXT
+
+
+def test_plain_gzip_is_left_alone(tmp_path):
+    path = tmp_path / 'other.gz'
+    path.write_bytes(gzip.compress(TEXT))
+    assert not TerminalX._is_compacted(str(path))
+    _, status = TerminalX.capture_command(f'COMPACT /U /Q "{path}"')
+    assert status == 0
+    assert gzip.decompress(path.read_bytes()) == TEXT
+
+
+def test_analytics_read_compacted_files(log):
+    TerminalX.capture_command(f'COMPACT /C /Q "{log}"')
+    output, _ = TerminalX.capture_command(f'WC -l "{log}"')
+    assert output.split()[0].replace(',', '') == '20000'
+    output, _ = TerminalX.capture_command(f'DISTINCT "{log}"')
+    estimate = int(output.strip().lstrip('~').split()[0].replace(',', ''))
+    assert abs(estimate - 20000) < 20000 * 0.03
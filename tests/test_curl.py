@@ -0,0 +1,124 @@
+import functools
+import http.server
+import json
+import os
+import threading
+
+import pytest
+
+import TerminalX
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 MiB
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Stand-in file server: Range support, a redirect, and an optional cut-off"""
+    protocol_version = 'HTTP/1.1'
+    cut_after = None  # stop range responses after this many bytes (simulates a dropped transfer)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/redirect':
+            self.send_response(302)
+            self.send_header('Location', '/file')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        size = len(PAYLOAD)
+        requested = self.headers.get('Range')
+        if not requested:
+            self.send_response(200)
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('Content-Length', str(size))
+            self.end_headers()
+            self.wfile.write(PAYLOAD)
+            return
+        first, _, last = requested[len('bytes='):].partition('-')
+        first, last = int(first), int(last) if last else size - 1
+        if first >= size:
+            self.send_response(416)
+            self.send_header('Content-Range', f"bytes */{size}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = PAYLOAD[first:last + 1]
+        self.send_response(206)
+        self.send_header('Content-Range', f"bytes {first}-{last}/{size}")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.cut_after is not None:
+            self.wfile.write(body[:self.cut_after])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(TerminalX, '_RANGE_THRESHOLD', 64 * 1024)
+    handler = type('Handler', (_Handler,), {})
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield handler, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_ranged_download(server, tmp_path):
+    _, base = server
+    target = tmp_path / 'out.bin'
+    _, status = TerminalX.capture_command(f'CURL -s -x 4 -o "{target}" {base}/file')
+    assert status == 0
+    assert _read(target) == PAYLOAD
+
+
+def test_resume_after_redirect(server, tmp_path):
+    handler, base = server
+    target = tmp_path / 'out.bin'
+    handler.cut_after = 1000
+    _, status = TerminalX.capture_command(f'CURL -s -L -x 4 -o "{target}" {base}/redirect')
+    assert status == 1
+    with open(f"{target}.part.json", encoding='utf-8') as f:
+        state = json.load(f)
+    assert state['url'] == f"{base}/redirect"
+    assert all(done == 1000 for _, _, done in state['ranges'])
+
+    handler.cut_after = None
+    _, status = TerminalX.capture_command(f'CURL -s -L -C - -x 4 -o "{target}" {base}/redirect')
+    assert status == 0
+    assert _read(target) == PAYLOAD
+    assert not os.path.exists(f"{target}.part.json")
+
+
+def test_preallocated_part_without_state_is_refetched(server, tmp_path):
+    _, base = server
+    target = tmp_path / 'out.bin'
+    (tmp_path / 'out.bin.part').write_bytes(bytes(len(PAYLOAD)))
+    _, status = TerminalX.capture_command(f'CURL -s -C - -o "{target}" {base}/file')
+    assert status == 0
+    assert _read(target) == PAYLOAD
+
+
+def test_sequential_resume_appends(server, tmp_path):
+    _, base = server
+    target = tmp_path / 'out.bin'
+    (tmp_path / 'out.bin.part').write_bytes(PAYLOAD[:5000])
+    _, status = TerminalX.capture_command(f'CURL -s -C - -x 1 -o "{target}" {base}/file')
+    assert status == 0
+    assert _read(target) == PAYLOAD
+
+
+def test_progress_follows_redirected_output(server, tmp_path, monkeypatch):
+    _, base = server
+    monkeypatch.setattr(TerminalX, '_Progress', functools.partial(TerminalX._Progress, interval=0))
+    output, status = TerminalX.capture_command(f'CURL -x 1 -o "{tmp_path / "out.bin"}" {base}/file')
+    assert status == 0
+    assert 'Downloading: ' in output
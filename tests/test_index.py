@@ -0,0 +1,62 @@
+import pytest
+
+import TerminalX
+
+QUERIES = ['needle', 'Needle in', 'héllo wörld', 'zzz-not-there', 'line 42']
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / 'tree'
+    (root / 'sub').mkdir(parents=True)
+    for i in range(20):
+        (root / f"plain{i}.txt").write_text("".join(f"line {i * 100 + n}\n" for n in range(100)))
+    (root / 'sub' / 'hay.txt').write_text("some hay\na needle in it\n")
+    (root / 'sub' / 'latin.txt').write_bytes("héllo wörld\n".encode('latin-1'))
+    (root / 'sub' / 'wide.txt').write_bytes("﻿Needle in UTF-16\r\n".encode('utf-16-le'))
+    (root / 'sub' / 'blob.bin').write_bytes(b"\x00\x01\x02needle\x00\xffline 42\x00" * 64)
+    _, status = TerminalX.capture_command(f'INDEX "{root}"')
+    assert status == 0
+    yield root
+    TerminalX.capture_command(f'INDEX /D "{root}"')
+
+
+@pytest.fixture
+def code_page():
+    session = TerminalX._session()
+    saved = session.code_page
+    yield session
+    session.code_page = saved
+
+
+def _findstr(root, query, noindex):
+    output, _ = TerminalX.capture_command(f'FINDSTR /S {"/NOINDEX " if noindex else ""}"{query}" "{root}"')
+    return sorted(output.splitlines())
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_index_matches_full_scan(tree, query):
+    assert _findstr(tree, query, False) == _findstr(tree, query, True)
+
+
+@pytest.mark.parametrize('encoding', ['latin-1', 'utf-8'])
+@pytest.mark.parametrize('query', QUERIES)
+def test_index_matches_full_scan_with_code_page(tree, code_page, encoding, query):
+    code_page.code_page = encoding
+    assert _findstr(tree, query, False) == _findstr(tree, query, True)
+
+
+def test_forced_code_page_searches_binary_files(tree, code_page):
+    code_page.code_page = 'latin-1'
+    assert any('blob.bin' in line for line in _findstr(tree, 'needle', False))
+
+
+def test_changed_files_are_searched(tree):
+    (tree / 'plain3.txt').write_text("a fresh needle\n")
+    assert any('plain3.txt' in line for line in _findstr(tree, 'needle', False))
+
+
+def test_index_narrows_the_search(tree):
+    files = list(TerminalX._walk_files(str(tree), recursive=True))
+    kept = list(TerminalX._narrow_with_index(str(tree), iter(files), 'needle'))
+    assert sorted(entry.name for entry in kept) == ['hay.txt', 'wide.txt']